@@ -0,0 +1,211 @@
+"""
+4KTube Free - Availability Pre-flight
+Özel, silinmiş, üyelere özel veya bölge kısıtlı videoları indirme slotuna
+girmeden önce ayıklar.
+
+İki ucuz kaynak kullanılır:
+- Flat metadata (playlist/arama girişleri, info cache): "[Private video]"
+  başlıkları ve yt-dlp'nin "availability" alanı — ek istek yok
+- YouTube oEmbed uç noktası: video başına tek küçük JSON isteği, kuyruğa
+  verilen parçalar için toplu ve eşzamanlı çalışır. Sadece 404 (silinmiş)
+  kesin kabul edilir; 401/403 gömme kapalı videolarda da döndüğü için
+  belirsiz sayılır ve indirme normal denenir.
+
+İndirme sırasında yakalanan erişim hataları (bölge kilidi vb.) da aynı
+önbelleğe yazılır, tekrar denemede parça slot almaz.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from http_pool import http_pool
+from concurrency import is_throttle_message
+
+OEMBED_URL = "https://www.youtube.com/oembed"
+PROBE_WORKERS = 8
+PROBE_TIMEOUT = 5
+RESULT_TTL = 3600  # Sonuçlar (erişilebilir/erişilemez) bu süre geçerli
+
+# Erişilemezlik nedenleri
+REASON_PRIVATE = "private"
+REASON_REMOVED = "removed"
+REASON_MEMBERS = "members"
+REASON_REGION = "region"
+REASON_UPCOMING = "upcoming"
+
+REASON_LABELS = {
+    REASON_PRIVATE: "Özel video",
+    REASON_REMOVED: "Kaldırılmış",
+    REASON_MEMBERS: "Üyelere özel",
+    REASON_REGION: "Bölge kısıtlı",
+    REASON_UPCOMING: "Henüz yayında değil",
+}
+
+STATUS_PREFIX = "Erişilemez"
+
+# Flat girişlerde YouTube'un yer tutucu başlıkları
+PLACEHOLDER_TITLES = {
+    "[private video]": REASON_PRIVATE,
+    "[deleted video]": REASON_REMOVED,
+    "[unavailable video]": REASON_REMOVED,
+}
+
+# yt-dlp "availability" alanı
+AVAILABILITY_REASONS = {
+    "private": REASON_PRIVATE,
+    "premium_only": REASON_MEMBERS,
+    "subscriber_only": REASON_MEMBERS,
+}
+
+# Geçici hatalar: YouTube kısıtlama altında "Video unavailable. This content
+# isn't available, try again later" der; bu metin silinmiş video sayılmamalı
+TRANSIENT_PATTERNS = (
+    "content isn't available",
+    "content is not available",
+)
+
+# yt-dlp hata metinleri (küçük harf) -> neden
+ERROR_PATTERNS = (
+    ("private video", REASON_PRIVATE),
+    ("members-only", REASON_MEMBERS),
+    ("join this channel", REASON_MEMBERS),
+    ("not made this video available in your country", REASON_REGION),
+    ("not available in your country", REASON_REGION),
+    ("blocked it in your country", REASON_REGION),
+    ("premieres in", REASON_UPCOMING),
+    ("live event will begin", REASON_UPCOMING),
+    ("has been removed", REASON_REMOVED),
+    ("account associated with this video has been terminated", REASON_REMOVED),
+    ("video unavailable", REASON_REMOVED),
+)
+
+
+def status_text(reason):
+    """Kuyrukta gösterilen durum metni"""
+    return f"{STATUS_PREFIX}: {REASON_LABELS.get(reason, 'Bilinmiyor')}"
+
+
+def classify_entry(entry):
+    """Flat/önbellek metadata'sından neden (veya None = bilinmiyor/erişilebilir)"""
+    if not entry:
+        return None
+    title = (entry.get("title") or "").strip().casefold()
+    if title in PLACEHOLDER_TITLES:
+        return PLACEHOLDER_TITLES[title]
+    reason = AVAILABILITY_REASONS.get(entry.get("availability"))
+    if reason:
+        return reason
+    if entry.get("live_status") == "is_upcoming":
+        return REASON_UPCOMING
+    return None
+
+
+def classify_error(message):
+    """
+    yt-dlp hata metninden neden. Kısıtlama / "try again later" metinleri ve
+    tanınmayan hatalar geçici sayılır (None): video erişilemez işaretlenmez,
+    kayıtlı Spotify eşleşmesi silinmez.
+    """
+    text = (message or "").casefold()
+    if is_throttle_message(text) or any(p in text for p in TRANSIENT_PATTERNS):
+        return None
+    for pattern, reason in ERROR_PATTERNS:
+        if pattern in text:
+            return reason
+    return None
+
+
+class AvailabilityChecker:
+    """Video ID -> erişilemezlik nedeni önbelleği ve toplu oEmbed yoklaması (thread-safe)"""
+
+    def __init__(self, workers=PROBE_WORKERS):
+        self.lock = threading.Lock()
+        self._results = {}   # video_id -> (neden veya None, zaman)
+        self._pending = {}   # video_id -> Future
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="downx-preflight")
+
+        self.probes = 0
+        self.rejected = 0
+
+    def _cached(self, video_id):
+        """(bulundu mu, neden) — lock altında çağrılır"""
+        cached = self._results.get(video_id)
+        if cached and time.time() - cached[1] < RESULT_TTL:
+            return True, cached[0]
+        return False, None
+
+    def _probe(self, video_id):
+        """Tek oEmbed isteği; kesin olmayan her yanıt None döner"""
+        self.probes += 1
+        try:
+            response = http_pool.get(
+                OEMBED_URL,
+                params={"url": f"https://www.youtube.com/watch?v={video_id}", "format": "json"},
+                timeout=PROBE_TIMEOUT,
+            )
+        except requests.RequestException:
+            return None
+        if response.status_code == 404:
+            return REASON_REMOVED
+        return None
+
+    def _run_probe(self, video_id):
+        reason = self._probe(video_id)
+        with self.lock:
+            self._pending.pop(video_id, None)
+            if reason or video_id not in self._results:
+                self._results[video_id] = (reason, time.time())
+        return reason
+
+    def prefetch(self, video_ids):
+        """Önbellekte olmayan videoları arka planda yokla (bloklamaz)"""
+        with self.lock:
+            for video_id in video_ids:
+                if not video_id or video_id in self._pending or self._cached(video_id)[0]:
+                    continue
+                self._pending[video_id] = self._pool.submit(self._run_probe, video_id)
+
+    def check(self, video_id, entry=None):
+        """
+        Video erişilemezse nedenini döndür, aksi halde None.
+        Önce verilen metadata, sonra önbellek; gerekirse yoklamanın bitmesi beklenir.
+        """
+        if not video_id:
+            return None
+
+        reason = classify_entry(entry)
+        if reason:
+            self.mark(video_id, reason)
+            self.rejected += 1
+            return reason
+
+        with self.lock:
+            found, reason = self._cached(video_id)
+            if not found:
+                future = self._pending.get(video_id)
+                if future is None:
+                    future = self._pool.submit(self._run_probe, video_id)
+                    self._pending[video_id] = future
+
+        if not found:
+            try:
+                reason = future.result(timeout=PROBE_TIMEOUT * 2)
+            except Exception:
+                reason = None
+
+        if reason:
+            self.rejected += 1
+        return reason
+
+    def mark(self, video_id, reason):
+        """İndirme sırasında öğrenilen nedeni kaydet"""
+        if video_id and reason:
+            with self.lock:
+                self._results[video_id] = (reason, time.time())
+
+
+# Global checker
+availability = AvailabilityChecker()
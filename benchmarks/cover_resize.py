@@ -0,0 +1,110 @@
+"""
+4KTube Free - Kapak küçültme ölçümü
+Kapak başına küçültme maliyetini ölçer: eski yol (tam kod çözme + 85→45
+arası beş kaliteye kadar optimize encode) ile cover_resize (draft + tahmin
++ kalite araması).
+
+Kullanım (proje kökünden):
+    python benchmarks/cover_resize.py                    # sentetik 640px ve 1280x720 kapaklar
+    python benchmarks/cover_resize.py kapak1.jpg -n 50   # gerçek dosyalarla
+    python benchmarks/cover_resize.py --max-kb 10        # kalite aramasını zorla
+"""
+
+import argparse
+import functools
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageFilter  # noqa: E402
+
+import cover_resize  # noqa: E402
+
+MAX_PX = 300
+MAX_KB = 80
+
+
+def legacy_resize(cover_data, max_size_px=MAX_PX, max_size_kb=MAX_KB):
+    """Eski resize_cover_for_car (kayıt satırları çıkarılmış); (bytes, encode sayısı)"""
+    img = Image.open(io.BytesIO(cover_data))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img.thumbnail((max_size_px, max_size_px), Image.LANCZOS)
+    encodes = 0
+    for quality in [85, 75, 65, 55, 45]:
+        output = io.BytesIO()
+        img.save(output, format='JPEG', quality=quality, optimize=True)
+        encodes += 1
+        if output.tell() <= max_size_kb * 1024:
+            break
+    return output.getvalue(), encodes
+
+
+def fast_resize(cover_data, max_size_px=MAX_PX, max_size_kb=MAX_KB):
+    """cover_resize yolu (kayıt satırları olmadan); (bytes, encode sayısı)"""
+    img = Image.open(io.BytesIO(cover_data))
+    ratio = max(img.size) / max_size_px
+    img.draft('RGB', (int(img.size[0] / ratio * 2), int(img.size[1] / ratio * 2)))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img.thumbnail((max_size_px, max_size_px), Image.LANCZOS)
+    data, _, encodes = cover_resize.encode_within(img, max_size_kb * 1024)
+    return data, encodes
+
+
+def synthetic_cover(width, height, seed):
+    """Gürültülü, ayrıntılı (sıkıştırması zor) JPEG kapak"""
+    rnd = random.Random(seed)
+    img = Image.effect_noise((width, height), 64).convert('RGB')
+    gradient = Image.linear_gradient('L').resize((width, height))
+    img = Image.merge('RGB', (gradient, img.getchannel(1), gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+    img = img.filter(ImageFilter.GaussianBlur(rnd.uniform(0.3, 1.2)))
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=92)
+    return output.getvalue()
+
+
+def measure(label, fn, covers, count):
+    """Seri ölçüm: kapak başına süre ve encode sayısı"""
+    encodes = 0
+    start = time.perf_counter()
+    for i in range(count):
+        _, n = fn(covers[i % len(covers)])
+        encodes += n
+    per_item = (time.perf_counter() - start) / count * 1000
+    print(f"{label:<32} {per_item:8.2f} ms/kapak · {encodes / count:.1f} encode/kapak")
+    return per_item
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("files", nargs="*", help="Ölçülecek kapak dosyaları")
+    parser.add_argument("-n", "--count", type=int, default=40, help="Kapak sayısı")
+    parser.add_argument("--max-kb", type=int, default=MAX_KB, help="Hedef kapak boyutu (KB)")
+    args = parser.parse_args()
+
+    if args.files:
+        covers = []
+        for path in args.files:
+            with open(path, "rb") as f:
+                covers.append(f.read())
+        label = f"{len(covers)} dosya"
+    else:
+        covers = [synthetic_cover(640, 640, 1), synthetic_cover(1280, 720, 2)]
+        label = "sentetik 640x640 + 1280x720"
+
+    print(f"{label} · {args.count} kapak · hedef {MAX_PX}px / {args.max_kb}KB\n")
+
+    legacy = functools.partial(legacy_resize, max_size_kb=args.max_kb)
+    fast = functools.partial(fast_resize, max_size_kb=args.max_kb)
+    before = measure("Eski yol (önce)", legacy, covers, args.count)
+    after = measure("draft + kalite araması (sonra)", fast, covers, args.count)
+    print(f"\nKazanç: {before - after:.2f} ms/kapak ({before / after if after else 0:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
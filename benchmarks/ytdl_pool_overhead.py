@@ -0,0 +1,72 @@
+"""
+4KTube Free - YoutubeDL havuz ölçümü
+Parça başına yt-dlp kurulum maliyetini ölçer: her iş için yeni
+YoutubeDL (eski davranış) ile ytdl_pool'dan alınan sıcak örnek.
+
+Kullanım (proje kökünden):
+    python benchmarks/ytdl_pool_overhead.py                 # sadece kurulum maliyeti
+    python benchmarks/ytdl_pool_overhead.py --url URL -n 5  # + gerçek flat extract
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp  # noqa: E402
+
+from settings import COOKIES_FILE  # noqa: E402
+from ytdl_pool import YtdlPool, PROFILES, PROFILE_FLAT  # noqa: E402
+
+
+def fresh_job(url):
+    """Eski davranış: her iş için yeni örnek (cookies.txt her seferinde okunur)"""
+    opts = dict(PROFILES[PROFILE_FLAT])
+    if os.path.exists(COOKIES_FILE):
+        opts["cookiefile"] = COOKIES_FILE
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        if url:
+            ydl.extract_info(url, download=False)
+        else:
+            ydl.cookiejar  # cookie dosyası okunur
+
+
+def pooled_job(pool, url):
+    with pool.acquire(PROFILE_FLAT) as ydl:
+        if url:
+            ydl.extract_info(url, download=False)
+        else:
+            ydl.cookiejar
+
+
+def measure(label, fn, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    per_item = (time.perf_counter() - start) / count * 1000
+    print(f"{label:<28} {per_item:8.2f} ms/iş")
+    return per_item
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--url", help="Her işte flat extract edilecek URL (ağ gerekir)")
+    parser.add_argument("-n", "--count", type=int, default=None, help="İş sayısı")
+    args = parser.parse_args()
+
+    count = args.count or (5 if args.url else 200)
+    print(f"yt-dlp {yt_dlp.version.__version__} · {count} iş · "
+          f"cookies.txt {'var' if os.path.exists(COOKIES_FILE) else 'yok'}\n")
+
+    before = measure("Yeni YoutubeDL (önce)", lambda: fresh_job(args.url), count)
+    pool = YtdlPool()
+    after = measure("ytdl_pool (sonra)", lambda: pooled_job(pool, args.url), count)
+
+    print(f"\nKazanç: {before - after:.2f} ms/iş ({before / after if after else 0:.1f}x) · "
+          f"oluşturulan {pool.created}, yeniden kullanılan {pool.reused}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+4KTube Free - Cancellation
+İş başına iptal jetonu. QueueManager her parça için bir jeton üretir;
+Downloader yt-dlp progress hook'unda, transcoder ffmpeg alt sürecinde
+bu jetonu dinler. Durdur'a basıldığında tüm jetonlar iptal edilir ve
+çalışan aktarımlar/ffmpeg süreçleri bir saniyeden kısa sürede kesilir.
+"""
+
+import threading
+
+
+class JobCancelled(Exception):
+    """İş kullanıcı tarafından iptal edildi"""
+
+
+class CancelToken:
+    """Thread-safe iptal bayrağı + iptal anında çağrılacak geri çağrımlar"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """Jetonu iptal et, kayıtlı geri çağrımları (ör. ffmpeg terminate) çalıştır"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+            self._callbacks.clear()
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[CANCEL] Geri çağrım hatası: {e}")
+
+    def register(self, callback):
+        """
+        İptal anında çağrılacak fonksiyonu kaydet.
+        Jeton zaten iptal edilmişse hemen çağrılır.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def unregister(self, callback):
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled("İptal edildi")
+
+    def wait(self, timeout=None):
+        """İptal edilene kadar (veya timeout) bekle; iptal edildiyse True"""
+        return self._event.wait(timeout)
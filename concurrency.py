@@ -0,0 +1,166 @@
+"""
+4KTube Free - Adaptive Concurrency
+Eşzamanlı indirme slot sayısını çalışma anında ölçülen değerlere göre
+ayarlar: toplam throughput, slot başına hız ve HTTP 429 / throttle oranı.
+
+Politika (AIMD benzeri tepe tırmanma):
+- Pencerede throttle olduysa slot sayısı yarıya iner, bir süre artırılmaz
+- Son artış toplam throughput'u %10 artırmadıysa geri alınır ve
+  REVERT_HOLD pencere boyunca yeniden denenmez (düz hatta salınım olmaz)
+- Slot başına hız en iyi gözlenenin çok altına düştüyse bir slot azaltılır
+- Tüm slotlar doluysa ve sorun yoksa bir slot eklenerek denenir
+"""
+
+import re
+import threading
+import time
+
+THROTTLE_PATTERN = re.compile(
+    r"HTTP Error 429|Too Many Requests|rate.?limit|throttl|try again later",
+    re.IGNORECASE
+)
+
+
+def is_throttle_message(message):
+    """yt-dlp hata/uyarı metni sunucu kaynaklı kısıtlama mı?"""
+    return bool(message) and bool(THROTTLE_PATTERN.search(str(message)))
+
+
+class AdaptiveConcurrency:
+    """Slot sayısı denetleyicisi. Tüm metotlar thread-safe'tir."""
+
+    THROTTLE_HOLD = 3  # Throttle sonrası artış yapılmayan pencere sayısı
+    REVERT_HOLD = 6    # Geri alınan artıştan sonra artış yapılmayan pencere sayısı
+
+    def __init__(self, initial=3, minimum=1, maximum=8, interval=10.0, enabled=True):
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.limit = min(max(int(initial), self.minimum), self.maximum)
+        self.interval = interval
+        self.enabled = enabled
+
+        self.lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._window_throttles = 0
+        self._job_bytes = {}   # job_id -> son downloaded_bytes (taban)
+        self._job_speed = {}   # job_id -> son hız (byte/s)
+
+        self._last_throughput = None
+        self._last_change = 0
+        self._best_slot_speed = 0.0
+        self._cooldown_until = 0.0
+
+        # UI için son ölçümler
+        self.throughput = 0.0
+        self.total_throttles = 0
+
+    # --- ÖLÇÜM ---
+
+    def record_progress(self, job_id, downloaded_bytes, speed):
+        """
+        yt-dlp progress hook'undan gelen kümülatif byte ve anlık hız.
+        Taban işin ilk raporuyla kurulur: devam eden indirmede diskteki .part
+        boyutu bu pencerenin throughput'una sayılmaz. Sayaç geriye giderse
+        (ör. ikinci formata geçiş) taban yeni değere sıfırlanır.
+        """
+        with self.lock:
+            if downloaded_bytes is not None:
+                previous = self._job_bytes.get(job_id)
+                if previous is not None and downloaded_bytes >= previous:
+                    self._window_bytes += downloaded_bytes - previous
+                self._job_bytes[job_id] = downloaded_bytes
+            if speed:
+                self._job_speed[job_id] = speed
+
+    def record_throttle(self):
+        """HTTP 429 veya benzeri kısıtlama görüldü"""
+        with self.lock:
+            self._window_throttles += 1
+            self.total_throttles += 1
+
+    def job_finished(self, job_id):
+        with self.lock:
+            self._job_bytes.pop(job_id, None)
+            self._job_speed.pop(job_id, None)
+
+    # --- KARAR ---
+
+    def maybe_adjust(self, active_jobs):
+        """Pencere dolduysa slot sayısını güncelle; değiştiyse True döndür"""
+        now = time.monotonic()
+        with self.lock:
+            elapsed = now - self._window_start
+            if elapsed < self.interval:
+                return False
+
+            throughput = self._window_bytes / elapsed
+            throttles = self._window_throttles
+            speeds = list(self._job_speed.values())
+            self._window_start = now
+            self._window_bytes = 0
+            self._window_throttles = 0
+            self.throughput = throughput
+
+            if not self.enabled:
+                return False
+
+            old = self.limit
+            slot_speed = sum(speeds) / len(speeds) if speeds else 0.0
+            self._best_slot_speed = max(self._best_slot_speed, slot_speed)
+
+            if throttles:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._cooldown_until = now + self.THROTTLE_HOLD * self.interval
+                reason = f"{throttles} throttle/429"
+            elif self._last_change > 0 and self._last_throughput and \
+                    throughput < self._last_throughput * 1.10:
+                self.limit = max(self.minimum, self.limit - 1)
+                self._cooldown_until = now + self.REVERT_HOLD * self.interval
+                reason = "artış throughput getirmedi"
+            elif slot_speed and self._best_slot_speed and \
+                    slot_speed < self._best_slot_speed * 0.3 and self.limit > self.minimum:
+                self.limit -= 1
+                reason = "slot başına hız düştü"
+            elif active_jobs >= self.limit and now >= self._cooldown_until:
+                self.limit = min(self.maximum, self.limit + 1)
+                reason = "slotlar dolu, deneniyor"
+            else:
+                reason = None
+
+            self._last_change = self.limit - old
+            self._last_throughput = throughput
+
+        if self.limit != old:
+            print(f"[CONCURRENCY] Slot: {old} → {self.limit} ({reason}, "
+                  f"{throughput / 1024 / 1024:.2f} MB/s)")
+            return True
+        return False
+
+
+class YtdlThrottleLogger:
+    """
+    yt-dlp logger'ı: mesajları konsola aynen basar,
+    429/throttle uyarılarını denetleyiciye bildirir.
+    """
+
+    def __init__(self, controller):
+        self.controller = controller
+
+    def debug(self, msg):
+        # yt-dlp bilgi mesajlarını da debug ile gönderir
+        if not msg.startswith('[debug] '):
+            print(msg)
+
+    def info(self, msg):
+        print(msg)
+
+    def warning(self, msg):
+        if self.controller and is_throttle_message(msg):
+            self.controller.record_throttle()
+        print(msg)
+
+    def error(self, msg):
+        if self.controller and is_throttle_message(msg):
+            self.controller.record_throttle()
+        print(msg)
@@ -0,0 +1,240 @@
+"""
+4KTube Free - Cover Cache
+Küçültülmüş kapak resimlerini CACHE_DIR/covers altında diskte tutar.
+
+- Kayıtlar (URL, küçültme profili) ile anahtarlanır; JPEG'ler içeriklerinin
+  SHA-256'sı ile adlandırılır: aynı albüm kapağı farklı URL'lerden gelse de
+  diskte bir kez durur
+- Toplam boyut cover_cache_mb bütçesini aşınca en uzun süredir
+  kullanılmayan dosyalar silinir (LRU)
+- 404 veren URL'ler (ör. olmayan maxresdefault) NEGATIVE_TTL boyunca
+  hatırlanır, tekrar istenmez
+- REVALIDATE_AFTER'dan eski kayıtlar ETag / Last-Modified ile koşullu
+  istekle doğrulanır; değişmemişse yeniden indirilip küçültülmez
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from settings import CACHE_DIR, GLOBAL_CONFIG
+
+COVER_DIR = os.path.join(CACHE_DIR, "covers")
+
+DEFAULT_BUDGET_MB = 64
+NEGATIVE_TTL = 86400            # 404 sonuçları 1 gün hatırlanır
+REVALIDATE_AFTER = 30 * 86400   # Bu süreden eski kapaklar koşullu istekle doğrulanır
+
+MISSING_PROFILE = "*"  # 404 kayıtları profilden bağımsızdır
+
+
+class CoverCache:
+    """(URL, profil) -> küçültülmüş JPEG. Tüm metotlar thread-safe'tir."""
+
+    def __init__(self, path=COVER_DIR, budget_mb=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if budget_mb is None:
+            budget_mb = GLOBAL_CONFIG.get("cover_cache_mb", DEFAULT_BUDGET_MB)
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(
+            os.path.join(path, "index.db"), check_same_thread=False, isolation_level=None
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " url TEXT NOT NULL,"
+            " profile TEXT NOT NULL,"
+            " digest TEXT,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " checked_at REAL NOT NULL,"
+            " PRIMARY KEY (url, profile))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " digest TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS blobs_lru ON blobs (accessed_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest)")
+        self._bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _blob_path(self, digest):
+        return os.path.join(self.path, digest[:2], f"{digest}.jpg")
+
+    # --- OKUMA ---
+
+    def get(self, url, profile):
+        """
+        Kayıt veya None:
+        {"data": bytes veya None, "missing": 404 mü, "stale": doğrulanmalı mı,
+         "etag": ..., "last_modified": ...}
+        """
+        if not url:
+            return None
+        now = time.time()
+        with self.lock:
+            missing = self.conn.execute(
+                "SELECT checked_at FROM entries WHERE url = ? AND profile = ?",
+                (url, MISSING_PROFILE)
+            ).fetchone()
+            if missing and now - missing[0] < NEGATIVE_TTL:
+                self.hits += 1
+                return {"data": None, "missing": True, "stale": False,
+                        "etag": None, "last_modified": None}
+
+            row = self.conn.execute(
+                "SELECT digest, etag, last_modified, checked_at FROM entries"
+                " WHERE url = ? AND profile = ?", (url, profile)
+            ).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+
+            digest, etag, last_modified, checked_at = row
+            try:
+                with open(self._blob_path(digest), "rb") as f:
+                    data = f.read()
+            except OSError:
+                # Dosya dışarıdan silinmiş: kaydı da unut
+                self._drop_blob(digest)
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE blobs SET accessed_at = ? WHERE digest = ?", (now, digest))
+            self.hits += 1
+
+        return {"data": data, "missing": False, "stale": now - checked_at > REVALIDATE_AFTER,
+                "etag": etag, "last_modified": last_modified}
+
+    # --- YAZMA ---
+
+    def put(self, url, profile, data, etag=None, last_modified=None):
+        """Küçültülmüş kapağı kaydet, bütçe aşıldıysa eski dosyaları sil"""
+        if not url or not data:
+            return
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        now = time.time()
+
+        with self.lock:
+            known = self.conn.execute(
+                "SELECT 1 FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone()
+            if not known or not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                tmp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, blob_path)
+                if not known:
+                    self._bytes += len(data)
+
+            self.conn.execute("BEGIN")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO blobs (digest, size, accessed_at) VALUES (?, ?, ?)",
+                (digest, len(data), now)
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (url, profile, digest, etag, last_modified, checked_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (url, profile, digest, etag, last_modified, now)
+            )
+            self.conn.execute("DELETE FROM entries WHERE url = ? AND profile = ?", (url, MISSING_PROFILE))
+            self.conn.execute("COMMIT")
+            self._evict()
+
+    def put_missing(self, url):
+        """URL 404 verdi: NEGATIVE_TTL boyunca tekrar isteme"""
+        if not url:
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (url, profile, digest, checked_at) VALUES (?, ?, NULL, ?)",
+                (url, MISSING_PROFILE, time.time())
+            )
+
+    def touch(self, url, profile):
+        """Koşullu istek 304 döndü: kayıt yeniden doğrulandı"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE entries SET checked_at = ? WHERE url = ? AND profile = ?",
+                (time.time(), url, profile)
+            )
+
+    # --- BÜTÇE ---
+
+    def _drop_blob(self, digest):
+        """Dosyayı ve ona işaret eden kayıtları sil (lock altında çağrılır)"""
+        row = self.conn.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        self.conn.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+        self.conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        if row:
+            self._bytes -= row[0]
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Bütçe aşıldıysa en eski erişilen dosyaları sil (lock altında çağrılır)"""
+        if self._bytes <= self.budget:
+            return
+        rows = self.conn.execute("SELECT digest, size FROM blobs ORDER BY accessed_at").fetchall()
+        evicted = 0
+        for digest, size in rows:
+            if self._bytes <= self.budget:
+                break
+            self._drop_blob(digest)
+            evicted += 1
+        self.conn.execute(
+            "DELETE FROM entries WHERE profile = ? AND checked_at < ?",
+            (MISSING_PROFILE, time.time() - NEGATIVE_TTL)
+        )
+        print(f"[COVER CACHE] Bütçe aşıldı, {evicted} kapak silindi ({self._bytes // 1024}KB)")
+
+    def stats(self):
+        """Araçlar sekmesi için gerçek değerler"""
+        with self.lock:
+            covers = self.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+            missing = self.conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE profile = ?", (MISSING_PROFILE,)
+            ).fetchone()[0]
+            return {
+                "covers": covers,
+                "missing": missing,
+                "bytes": self._bytes,
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def clear(self):
+        """Tüm kapakları ve kayıtları sil"""
+        with self.lock:
+            digests = [row[0] for row in self.conn.execute("SELECT digest FROM blobs")]
+            for digest in digests:
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("DELETE FROM blobs")
+            self._bytes = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# Global cache
+cover_cache = CoverCache()
@@ -0,0 +1,142 @@
+"""
+4KTube Free - Cover Resize
+Kapak resmini teyp uyumlu boyuta (varsayılan 300x300, en fazla 80KB) küçültür.
+
+- JPEG kaynaklar draft() ile DCT ölçeğinde (1/2, 1/4, 1/8) kod çözülür;
+  640px / 1280px kapak tam çözünürlükte açılmaz (ölçülen kazanç buradan)
+- Önce en yüksek kalite denenir (çoğu kapak tek encode'da sığar);
+  sığmazsa boyut tahminiyle daraltılan arama, eski 10'luk adımlar yerine
+  sınırın altındaki en yüksek kaliteyi bulur. Encode sayısı eski
+  döngüyle aynı kalır: bu adım hız değil kalite içindir
+"""
+
+import io
+
+# PIL/Pillow import - Kapak resmi küçültme için
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+QUALITY_MAX = 85
+QUALITY_MIN = 45
+QUALITY_TOLERANCE = 5  # Sığan en yüksek kaliteye bu kadar yaklaşınca arama biter
+FILL_TARGET = 0.9      # Sınırın %90'ını dolduran sonuç da yeterli
+
+
+def _encode(img, quality):
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def encode_within(img, limit_bytes):
+    """
+    limit_bytes altına sığan en yüksek kaliteli JPEG.
+
+    Önce QUALITY_MAX denenir. Sığmazsa kalite, sığan ve sığmayan en yakın
+    iki denemenin boyutları arasında doğrusal tahminle seçilir; tahmin
+    aralığın çeyreklerine sıkıştırılır, böylece her adımda aralık en az
+    %25 daralır (kötü tahminde ikili aramaya döner).
+
+    Returns:
+        tuple: (jpeg bytes, quality, encode sayısı). Hiçbir kalite sığmazsa
+        QUALITY_MIN ile üretilen (en küçük) sonuç döner.
+    """
+    data = _encode(img, QUALITY_MAX)
+    encodes = 1
+    if len(data) <= limit_bytes:
+        return data, QUALITY_MAX, encodes
+
+    low, high = QUALITY_MIN, QUALITY_MAX - 1
+    fit = None                            # (quality, size, data): sığan en yüksek kalite
+    over = (QUALITY_MAX, len(data), data)  # sığmayan en düşük kalite
+    while low <= high:
+        # Henüz sığan yoksa boyutun kaliteyle orantılı olduğu varsayılır (orijinden doğru)
+        q0, s0 = (fit[0], fit[1]) if fit else (0, 0)
+        q1, s1 = over[0], over[1]
+        estimate = q0 + (limit_bytes - s0) * (q1 - q0) // max(s1 - s0, 1)
+        margin = (high - low) // 4
+        quality = min(max(estimate, low + margin), high - margin)
+
+        data = _encode(img, quality)
+        encodes += 1
+        if len(data) <= limit_bytes:
+            fit = (quality, len(data), data)
+            low = quality + 1
+            if high - low < QUALITY_TOLERANCE or len(data) >= limit_bytes * FILL_TARGET:
+                break
+        else:
+            over = (quality, len(data), data)
+            high = quality - 1
+
+    if fit:
+        return fit[2], fit[0], encodes
+    return over[2], over[0], encodes
+
+
+def resize_cover_for_car(cover_data, max_size_px=300, max_size_kb=80):
+    """
+    Kapak resmini teyp uyumlu boyuta küçült.
+
+    Args:
+        cover_data: Orijinal kapak resmi (bytes)
+        max_size_px: Maksimum boyut (piksel) - varsayılan 300x300
+        max_size_kb: Maksimum dosya boyutu (KB) - varsayılan 80KB
+
+    Returns:
+        bytes: Küçültülmüş kapak resmi veya None
+    """
+    if not PIL_AVAILABLE:
+        print("[TAGGER] Pillow yok, orijinal kapak kullanılıyor")
+        return cover_data
+
+    try:
+        # Resmi aç (henüz kod çözülmez)
+        img = Image.open(io.BytesIO(cover_data))
+
+        # Orijinal boyut bilgisi
+        original_size = len(cover_data)
+        original_dimensions = img.size
+        print(f"[TAGGER] Orijinal kapak: {original_dimensions[0]}x{original_dimensions[1]}, {original_size // 1024}KB")
+
+        # Eğer zaten küçükse ve boyut limiti altındaysa, direkt dön
+        if original_dimensions[0] <= max_size_px and original_dimensions[1] <= max_size_px:
+            if original_size <= max_size_kb * 1024:
+                print(f"[TAGGER] Kapak zaten uygun boyutta, küçültme gerekmiyor")
+                return cover_data
+
+        # JPEG: hedefin en az iki katı kalacak en küçük DCT ölçeğinde kod çöz
+        # (LANCZOS için yeterli örnek kalır, piksel sayısı 4-64 kat azalır)
+        if img.format == 'JPEG':
+            ratio = max(original_dimensions) / max_size_px
+            img.draft('RGB', (int(original_dimensions[0] / ratio * 2), int(original_dimensions[1] / ratio * 2)))
+
+        # RGB formatına çevir (RGBA varsa)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        # Oranı koruyarak küçült (thumbnail)
+        img.thumbnail((max_size_px, max_size_px), Image.LANCZOS)
+
+        result, quality, encodes = encode_within(img, max_size_kb * 1024)
+        new_dimensions = img.size
+        if len(result) <= max_size_kb * 1024:
+            print(f"[TAGGER] ✅ Kapak küçültüldü: {new_dimensions[0]}x{new_dimensions[1]}, "
+                  f"{len(result) // 1024}KB (quality={quality}, {encodes} encode)")
+        else:
+            # En düşük quality ile bile büyük
+            print(f"[TAGGER] ⚠️ Kapak küçültüldü ama hala büyük: {len(result) // 1024}KB")
+        return result
+
+    except Exception as e:
+        print(f"[TAGGER HATA] Kapak küçültme hatası: {e}")
+        print(f"[TAGGER] Orijinal kapak kullanılıyor")
+        return cover_data
@@ -1,7 +1,8 @@
 """
 4KTube Free - YouTube Downloader (GELİŞTİRİLMİŞ)
-Sadece YouTube videoları için yt-dlp kullanır
-Spotify indirmeleri queue_manager.py içinde SpotDL ile yapılır
+Pipeline'ın ağ (indirme) aşaması: yt-dlp ile ham dosyayı indirir.
+Format dönüştürme transcoder.py, etiketleme tagger.py aşamasında yapılır.
+Spotify parçaları da YouTube eşleşmesi bulunduktan sonra buradan iner.
 
 DEĞİŞİKLİKLER:
 - Config key bug düzeltildi: "mode" -> "download_mode"
@@ -11,12 +12,15 @@ DEĞİŞİKLİKLER:
 
 import yt_dlp
 import os
-import threading
 import re 
-import glob 
 import copy
-from settings import COOKIES_FILE, GLOBAL_CONFIG, get_download_dir
-from tagger import set_id3_tags 
+from dataclasses import dataclass
+from settings import GLOBAL_CONFIG, get_download_dir
+from concurrency import YtdlThrottleLogger
+from cancellation import JobCancelled
+from ytdl_pool import ytdl_pool, PROFILE_DOWNLOAD
+from info_cache import info_cache, video_id_from_url, formats_fresh
+import availability as preflight
 
 # Terminal Renk Kodlarını Temizleyen Regex
 ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
@@ -49,77 +53,81 @@ def sanitize_filename(filename, max_length=200):
     return clean if clean else "Unknown"
 
 
-class Downloader(threading.Thread):
+@dataclass
+class DownloadResult:
+    """Bir indirme işinin sonucu"""
+    success: bool
+    message: str
+    file_path: str = None      # İndirilen ham dosya
+    output_base: str = None    # Dönüştürme aşaması için uzantısız hedef yol
+    mode: str = None           # "audio", "video" veya "video+audio"
+    cancelled: bool = False    # Kullanıcı durdurdu (hata sayılmaz)
+    unavailable: bool = False  # Video silinmiş/özel/kısıtlı: yeniden denemek anlamsız
+
+
+class Downloader:
     """
-    YouTube Video/Ses İndirici
-    NOT: Spotify için kullanılmaz! (queue_manager.py içinde SpotDL kullanılır)
+    YouTube Video/Ses İndirme İşi (job)
+    Thread değildir: çağıran thread'de (ör. ThreadPoolExecutor worker'ı)
+    doğrudan çalışır ve DownloadResult döndürür. Ek thread açmaz.
+    Sadece ağ aşamasıdır: ffmpeg dönüştürme ve etiketleme yapmaz.
     """
     
-    def __init__(self, video_url, track_info, progress_callback, finished_callback):
-        super().__init__()
+    def __init__(self, video_url, track_info, progress_callback=None, finished_callback=None,
+                 throughput_monitor=None, mode=None, target_directory=None, output_name=None,
+                 cancel_token=None, staging_directory=None, info=None):
         self.video_url = video_url
+        # Çözümleme aşamasında bulunan info dict (varsa yeniden çıkarılmaz)
+        self.info = info
+        # İptal jetonu: progress hook'ta kontrol edilir, aktarımı yarıda keser
+        self.cancel_token = cancel_token
+        # Adaptif slot denetleyicisi (byte/hız ve 429 bildirimleri için, opsiyonel)
+        self.throughput_monitor = throughput_monitor
         
         # KRİTİK: track_info'nun derin kopyasını al
         self.track_info = copy.deepcopy(track_info) if track_info else {}
         
-        self.progress_callback = progress_callback
-        self.finished_callback = finished_callback
+        self.progress_callback = progress_callback or (lambda pct, msg: None)
+        self.finished_callback = finished_callback or (lambda success, msg: None)
         self.is_downloading = False
 
         # AYARLARI AL - DÜZELTİLDİ: "download_mode" key kullan!
-        download_mode = GLOBAL_CONFIG.get("download_mode", "audio")
-        
-        # SES AYARLARI
-        audio_format = (GLOBAL_CONFIG.get("audio_format") or "mp3").lower()
-        
-        audio_quality = GLOBAL_CONFIG.get("audio_quality", "192")
-        # Sadece sayı varsa 'k' ekle
-        if audio_quality.isdigit():
-            audio_quality = f"{audio_quality}k"
+        # (Spotify parçaları her zaman "audio" ile çağrılır)
+        self.mode = mode or GLOBAL_CONFIG.get("download_mode", "audio")
         
-        audio_bitrate_mode = GLOBAL_CONFIG.get("audio_bitrate_mode", "cbr")
-        mp3_codec = GLOBAL_CONFIG.get("mp3_codec", "libmp3lame")
-        aac_codec = GLOBAL_CONFIG.get("aac_codec", "aac")
-        audio_sample_rate = GLOBAL_CONFIG.get("audio_sample_rate", "44100")
-        audio_channels = GLOBAL_CONFIG.get("audio_channels", "2")
-        
-        # VIDEO AYARLARI
+        # VIDEO AYARLARI (format seçimi için; codec ayarları transcoder.py'de)
         video_format = (GLOBAL_CONFIG.get("video_format") or "mp4").lower()
-        video_codec = GLOBAL_CONFIG.get("video_codec", "h264")
         video_quality = GLOBAL_CONFIG.get("video_quality", "1080p")
-        video_bitrate = GLOBAL_CONFIG.get("video_bitrate", "auto")
-        video_fps = GLOBAL_CONFIG.get("video_fps", "source")
-        video_crf = GLOBAL_CONFIG.get("video_crf", "23")
-        video_preset = GLOBAL_CONFIG.get("video_preset", "medium")
-        video_include_audio = GLOBAL_CONFIG.get("video_include_audio", True)
         
         # DEBUG
-        print(f"\n[YOUTUBE] {track_info.get('title', '?')[:40]}")
-        print(f"  Mod: {download_mode}")
-        print(f"  Video Format: {video_format}, Ses Format: {audio_format}")
-        print(f"  Ses Kalitesi: {audio_quality}")
+        print(f"\n[YOUTUBE] {self.track_info.get('title', '?')[:40]}")
+        print(f"  Mod: {self.mode}")
         
         # Klasör
-        download_dir = get_download_dir()
-        
-        playlist_album_name = sanitize_filename(track_info.get('album', 'YouTube'))
-        
-        if track_info.get('is_playlist') and playlist_album_name not in ['Tekli', 'YouTube']:
-            target_directory = os.path.join(download_dir, playlist_album_name)
-        else:
-            target_directory = download_dir
+        if not target_directory:
+            download_dir = get_download_dir()
+            
+            playlist_album_name = sanitize_filename(self.track_info.get('album', 'YouTube'))
+            
+            if self.track_info.get('is_playlist') and playlist_album_name not in ['Tekli', 'YouTube']:
+                target_directory = os.path.join(download_dir, playlist_album_name)
+            else:
+                target_directory = download_dir
             
         os.makedirs(target_directory, exist_ok=True)
         
-        # yt-dlp'nin kendi metadata'sını kullan
+        # Ham dosya parçanın staging klasörüne iner; yarım kalırsa orada devam eder
+        self.staging_directory = staging_directory or target_directory
+        os.makedirs(self.staging_directory, exist_ok=True)
         output_template = os.path.join(
-            target_directory,
-            "%(title)s.%(ext)s"
+            self.staging_directory,
+            "%(title)s [%(id)s].%(ext)s"
         )
         
-        # Postprocessor ile dosya adını temizleyeceğiz
         self.target_directory = target_directory
-        self.safe_filename = None  # Sonra set edilecek 
+        # Son dosya adı (uzantısız); verilmezse başlıktan temizlenerek türetilir
+        self.output_name = sanitize_filename(output_name) if output_name else None
+        self.downloaded_path = None
         
         # YT-DLP OPTIONS
         self.ytdlp_opts = {
@@ -131,6 +139,9 @@ class Downloader(threading.Thread):
             "noplaylist": True, 
             "youtube_client": "web", 
             "keepvideo": False, 
+            # Yarım dosyalar silinmez: .part/.ytdl üzerinden range ile devam
+            "continuedl": True,
+            "nopart": False,
             "socket_timeout": 30,
             "retries": 2,
             "extractor_args": {
@@ -140,54 +151,29 @@ class Downloader(threading.Thread):
             }
         }
         
-        if os.path.exists(COOKIES_FILE):
-            self.ytdlp_opts["cookiefile"] = COOKIES_FILE
+        # cookies.txt havuzun ortak cookie jar'ından gelir (ytdl_pool)
+        
+        if throughput_monitor:
+            self.ytdlp_opts["logger"] = YtdlThrottleLogger(throughput_monitor)
         
         # FORMAT SEÇİMİ
-        if download_mode == "audio":
+        if self.mode == "audio":
             # Sadece ses
-            self._setup_audio(audio_format, audio_quality, audio_bitrate_mode, mp3_codec, aac_codec, audio_sample_rate, audio_channels)
-            self.final_path = os.path.join(target_directory, f"temp.{audio_format}")
+            self._setup_audio()
         
-        elif download_mode == "video":
+        elif self.mode == "video":
             # Sadece video (sessiz)
-            self._setup_video(video_format, video_codec, video_quality, video_bitrate, video_fps, video_crf, video_preset, include_audio=False)
-            self.final_path = os.path.join(target_directory, f"temp.{video_format}")
+            self._setup_video(video_format, video_quality, include_audio=False)
         
         else:  # "video+audio" veya "both"
             # Video + Ses
-            self._setup_video(video_format, video_codec, video_quality, video_bitrate, video_fps, video_crf, video_preset, include_audio=True)
-            self.final_path = os.path.join(target_directory, f"temp.{video_format}")
+            self._setup_video(video_format, video_quality, include_audio=True)
 
-    def _setup_audio(self, fmt, quality, bitrate_mode, mp3_codec, aac_codec, sample_rate, channels):
-        """Ses indirme ayarları"""
+    def _setup_audio(self):
+        """Ses indirme ayarları (dönüştürme transcoder aşamasında)"""
         self.ytdlp_opts["format"] = "bestaudio/best"
-        
-        audio_pp = {
-            "key": "FFmpegExtractAudio", 
-            "preferredcodec": fmt,
-            "preferredquality": quality.replace('k', '') if not quality.isdigit() else quality,
-        }
-        
-        pp_args = []
-        
-        if fmt == "mp3":
-            pp_args.extend(['-acodec', mp3_codec])
-        elif fmt in ["m4a", "aac"]:
-            pp_args.extend(['-acodec', aac_codec])
-        
-        if not quality.isdigit():
-            if bitrate_mode == "cbr":
-                pp_args.extend(['-b:a', quality, '-minrate', quality, '-maxrate', quality, '-bufsize', '2M'])
-            elif bitrate_mode == "abr":
-                pp_args.extend(['-b:a', quality])
-        
-        pp_args.extend(['-ar', sample_rate, '-ac', channels])
-        
-        self.ytdlp_opts["postprocessors"] = [audio_pp, {"key": "FFmpegMetadata"}]
-        self.ytdlp_opts['postprocessor_args'] = pp_args
 
-    def _setup_video(self, fmt, codec, quality, bitrate, fps, crf, preset, include_audio=True):
+    def _setup_video(self, fmt, quality, include_audio=True):
         """Video indirme ayarları"""
         if include_audio:
             if quality == "best":
@@ -198,110 +184,44 @@ class Downloader(threading.Thread):
                 height = quality.replace('p', '')
                 format_str = f"bestvideo[height<={height}]+bestaudio/best[height<={height}]"
         else:
-            # Sadece video (sessiz)
+            # Sadece video (sessiz): önce hedef kapsayıcıdaki akış, yoksa herhangi biri
+            # (dönüştürme aşaması sadece remux yapar, yeniden kodlamaz)
             if quality == "best":
-                format_str = "bestvideo"
+                selector = "bestvideo"
             elif quality == "worst":
-                format_str = "worstvideo"
+                selector = "worstvideo"
             else:
                 height = quality.replace('p', '')
-                format_str = f"bestvideo[height<={height}]"
+                selector = f"bestvideo[height<={height}]"
+            format_str = f"{selector}[ext={fmt}]/{selector}"
         
         self.ytdlp_opts["format"] = format_str
         
-        pp_args = []
-        
-        if codec == "h264":
-            pp_args.extend(['-vcodec', 'libx264'])
-        elif codec == "h265":
-            pp_args.extend(['-vcodec', 'libx265'])
-        elif codec == "copy":
-            pp_args.extend(['-vcodec', 'copy'])
-        
-        if codec in ["h264", "h265"] and crf != "auto":
-            pp_args.extend(['-crf', crf])
-            pp_args.extend(['-preset', preset])
-        
-        if bitrate != "auto":
-            pp_args.extend(['-b:v', bitrate])
-        
-        if fps != "source":
-            pp_args.extend(['-r', fps])
-        
-        if include_audio:
-            pp_args.extend(['-acodec', 'aac', '-b:a', '192k'])
-        
-        postprocessors = []
-        if include_audio:
-            postprocessors.append({
-                "key": "FFmpegVideoConvertor", 
-                "preferedformat": fmt
-            })
-        postprocessors.append({"key": "FFmpegMetadata"})
-        
-        self.ytdlp_opts["postprocessors"] = postprocessors
-        self.ytdlp_opts['postprocessor_args'] = pp_args
-        
-        # merge_output_format ekle
+        # Birleştirme (merge) indirme aşamasında kalır; codec dönüşümü transcoder'da
         self.ytdlp_opts["merge_output_format"] = fmt
 
+    def _check_cancelled(self):
+        """İptal edildiyse yt-dlp'yi durduran istisnayı fırlat"""
+        if self.cancel_token and self.cancel_token.cancelled:
+            raise yt_dlp.utils.DownloadCancelled("İptal edildi")
+
     def postprocessor_hook(self, d):
-        """Dosya adını temizle (FFmpeg postprocess SONRASI)"""
-        if d.get('status') != 'finished':
-            return
-        
-        postprocessor = d.get('postprocessor')
-        if postprocessor and 'FFmpeg' not in postprocessor:
-            return
-        
-        filepath = d.get('info_dict', {}).get('filepath') or d.get('filepath')
-        
-        if not filepath or not os.path.exists(filepath):
-            return
-        
-        self._cleanup_temp_files(os.path.dirname(filepath))
-        
-        directory = os.path.dirname(filepath)
-        filename = os.path.basename(filepath)
-        name, ext = os.path.splitext(filename)
-        
-        cleaned_name = self._clean_title(name)
-        
-        if cleaned_name != name:
-            new_filepath = os.path.join(directory, f"{cleaned_name}{ext}")
-            
-            try:
-                if not os.path.exists(new_filepath):
-                    os.rename(filepath, new_filepath)
-                    print(f"[RENAME] {filename} → {cleaned_name}{ext}")
-                    self.safe_filename = cleaned_name
-                    self.final_path = new_filepath
-                else:
-                    print(f"[RENAME] Hedef zaten var: {new_filepath}")
-                    self.final_path = filepath
-            except Exception as e:
-                print(f"[RENAME] Hata: {e}")
-                self.final_path = filepath
-        else:
-            self.safe_filename = name
-            self.final_path = filepath
-    
-    def _cleanup_temp_files(self, directory):
-        """Geçici dosyaları temizle"""
-        patterns = [
-            os.path.join(directory, "*.temp.*"),
-            os.path.join(directory, "*.f[0-9]*.webm"),
-            os.path.join(directory, "*.f[0-9]*.mp4"),
-            os.path.join(directory, "*.f[0-9]*.m4a"),
-        ]
-        
-        for pattern in patterns:
-            for temp_file in glob.glob(pattern):
-                try:
-                    os.remove(temp_file)
-                    print(f"[CLEANUP] Silindi: {os.path.basename(temp_file)}")
-                except Exception as e:
-                    print(f"[CLEANUP] Hata: {e}")
+        """Merge başlamadan önce iptal edildiyse ffmpeg'e hiç girme"""
+        if d.get('status') == 'started':
+            self._check_cancelled()
+
+    @staticmethod
+    def _final_filepath(info):
+        """
+        yt-dlp'nin yazdığı son dosyanın tam yolu (merge sonrası dahil).
+        Klasör taraması yok: yol doğrudan info_dict'ten okunur.
+        """
+        if not info:
+            return None
+        for download in info.get('requested_downloads') or ():
+            if download.get('filepath'):
+                return download['filepath']
+        return info.get('filepath') or info.get('_filename')
     
     def _clean_title(self, title):
         """YouTube başlığını temizle"""
@@ -350,7 +270,14 @@ class Downloader(threading.Thread):
 
     def progress_hook(self, d):
         """Progress callback"""
+        # Aktarım sürerken hook sık çağrılır: iptal burada yakalanır
+        self._check_cancelled()
+        
         if d['status'] == 'downloading':
+            if self.throughput_monitor:
+                self.throughput_monitor.record_progress(
+                    self.track_info.get('id'), d.get('downloaded_bytes'), d.get('speed')
+                )
             if d.get('total_bytes'):
                 percent = ANSI_ESCAPE.sub('', d['_percent_str']).replace('%', '').strip()
                 try:
@@ -358,62 +285,90 @@ class Downloader(threading.Thread):
                 except:
                     percent_float = 0.0
                 self.progress_callback(percent_float, f"İndiriliyor: {percent}%")
-        elif d['status'] == 'postprocessing':
-            self.progress_callback(99.0, "Dönüştürülüyor...")
         
+    def _download_with_cache(self, ydl):
+        """
+        Tek geçişte indir: izleme sayfası indirme başına en fazla bir kez çekilir.
+        Sıra: parçayla gelen tam info dict -> önbellek -> çözümlemede bulunan
+        flat giriş (extractor belli) -> URL'den çıkarma.
+        """
+        video_id = video_id_from_url(self.video_url) or (self.info or {}).get('id')
+        
+        resolved = self.info if formats_fresh(self.info) else info_cache.get_info(video_id)
+        if resolved:
+            try:
+                print(f"[YTDLP] Çözümlenmiş formatlarla indiriliyor: {video_id}")
+                return ydl.process_ie_result(copy.deepcopy(resolved), download=True)
+            except yt_dlp.utils.DownloadError as e:
+                print(f"[YTDLP] Formatlar kullanılamadı, yeniden çıkarılıyor: {e}")
+                info_cache.invalidate_formats(video_id)
+                self.info = None
+        
+        if self.info and self.info.get('_type') in ('url', 'url_transparent'):
+            # Flat arama/playlist girişi: URL eşleştirme yapılmadan doğrudan extractor'a gider
+            info = ydl.process_ie_result(dict(self.info), download=True)
+        else:
+            info = ydl.extract_info(self.video_url, download=True)
+        info_cache.put(info)
+        return info
+
+    def __call__(self):
+        """İşi çağıran thread'de çalıştır (executor.submit(job) ile kullanılabilir)"""
+        return self.run()
+
     def run(self):
-        """İndirme başlat"""
+        """İndirmeyi çalıştır, DownloadResult döndür"""
         self.is_downloading = True
-        self.final_path = None
+        self.downloaded_path = None
         
         try:
+            if self.cancel_token:
+                self.cancel_token.raise_if_cancelled()
             self.progress_callback(0.0, "Başlatılıyor...")
             
-            with yt_dlp.YoutubeDL(self.ytdlp_opts) as ydl:
-                ydl.download([self.video_url])
-            
-            if not self.final_path:
-                # Fallback: glob ile bul
-                possible = []
-                for f in glob.glob(os.path.join(self.target_directory, "*.*")):
-                    if '.temp.' in f or re.search(r'\.f\d+\.', f):
-                        continue
-                    possible.append(f)
-                
-                if possible:
-                    self.final_path = max(possible, key=os.path.getmtime)
+            # Worker'ın sıcak YoutubeDL örneği bu işin ayarlarıyla kullanılır
+            with ytdl_pool.acquire(PROFILE_DOWNLOAD, self.ytdlp_opts) as ydl:
+                info = self._download_with_cache(ydl)
             
-            if not self.final_path or not os.path.exists(self.final_path):
+            self.downloaded_path = self._final_filepath(info)
+            if not self.downloaded_path or not os.path.exists(self.downloaded_path):
                 raise FileNotFoundError(f"İndirilen dosya bulunamadı!")
             
-            self._cleanup_temp_files(self.target_directory)
-            
-            # Etiket ekle (sadece ses için) - DÜZELTİLDİ: download_mode key
-            download_mode = GLOBAL_CONFIG.get("download_mode", "audio")
-            if download_mode == "audio":
-                self.progress_callback(95.0, "Etiketler ekleniyor...")
-                set_id3_tags(self.final_path, self.track_info)
+            # Son dosya adı: verilen ad veya temizlenmiş video başlığı
+            output_name = self.output_name
+            if not output_name:
+                output_name = self._clean_title(info.get('title') or self.track_info.get('title', ''))
             
-            self.finished_callback(True, f"Başarılı: {self.final_path}")
+            result = DownloadResult(
+                True, f"İndirildi: {self.downloaded_path}", self.downloaded_path,
+                output_base=os.path.join(self.target_directory, output_name), mode=self.mode
+            )
+
+        except (yt_dlp.utils.DownloadCancelled, JobCancelled):
+            # Yarım dosyalar staging'de kalır, sonraki başlatmada devam edilir
+            print(f"\n[İPTAL] {self.track_info.get('title', '?')[:40]}\n")
+            result = DownloadResult(False, "İptal edildi", cancelled=True)
 
         except yt_dlp.utils.DownloadError as e:
             error_msg = str(e)
-            if "Video unavailable" in error_msg:
-                print(f"\n[HATA] Video bulunamadı veya kaldırıldı\n")
-                self.finished_callback(False, "Video bulunamadı")
-            elif "Private video" in error_msg:
-                print(f"\n[HATA] Video özel (private)\n")
-                self.finished_callback(False, "Video özel")
+            reason = preflight.classify_error(error_msg)
+            if reason:
+                # Sonraki denemede parça çözümleme aşamasında elenir
+                status = preflight.status_text(reason)
+                print(f"\n[HATA] {status}\n")
+                preflight.availability.mark(
+                    video_id_from_url(self.video_url) or (self.info or {}).get('id'), reason
+                )
+                result = DownloadResult(False, status, unavailable=True)
             else:
                 print(f"\n[HATA] İndirme hatası: {e}\n")
-                self.finished_callback(False, f"İndirme hatası: {error_msg[:100]}")
+                result = DownloadResult(False, f"İndirme hatası: {error_msg[:100]}")
         except Exception as e:
             print(f"\n[HATA] Beklenmeyen hata: {e}\n")
-            try:
-                self._cleanup_temp_files(self.target_directory)
-            except:
-                pass
-            self.finished_callback(False, str(e))
+            result = DownloadResult(False, str(e))
         
         finally:
             self.is_downloading = False
+
+        self.finished_callback(result.success, result.message)
+        return result
@@ -13,6 +13,11 @@ from gi.repository import Gtk, Adw, GObject, Pango, GLib, Gio, Gdk
 import time
 from collections import deque
 
+# Pipeline aşamalarında (çözümleme/indirme/dönüştürme/etiketleme) görülen durumlar
+ACTIVE_STATUS_PREFIXES = ("Aranıyor", "İndiriliyor", "Dönüştürülüyor", "Etiketleniyor")
+# Pre-flight'ta elenen (özel/silinmiş/kısıtlı) videolar
+UNAVAILABLE_STATUS_PREFIX = "Erişilemez"
+
 
 # --- DATA MODEL ---
 class DownloadObject(GObject.Object):
@@ -76,7 +81,7 @@ class DownloadsTab(Adw.Bin):
         self._update_interval = 500  # ms
 
         # Statistics
-        self.stats = {"queue": 0, "active": 0, "completed": 0, "failed": 0}
+        self.stats = {"queue": 0, "active": 0, "completed": 0, "failed": 0, "unavailable": 0}
 
         self._setup_ui()
         self._add_custom_css()
@@ -419,6 +424,13 @@ class DownloadsTab(Adw.Bin):
         btn_remove.add_css_class("circular")
         actions.append(btn_remove)
 
+        btn_next = Gtk.Button()
+        btn_next.set_icon_name("go-top-symbolic")
+        btn_next.set_tooltip_text("Sıradaki İndir")
+        btn_next.add_css_class("flat")
+        btn_next.add_css_class("circular")
+        actions.append(btn_next)
+
         card.append(actions)
 
         list_item.set_child(card)
@@ -463,10 +475,10 @@ class DownloadsTab(Adw.Bin):
             if "Tamamlandı" in status or "Atlandı" in status:
                 status_label.add_css_class("status-completed")
                 progress.set_visible(False)
-            elif "İndiriliyor" in status or "Dönüştürülüyor" in status or "%" in status:
+            elif status.startswith(ACTIVE_STATUS_PREFIXES) or "%" in status:
                 status_label.add_css_class("status-downloading")
                 progress.set_visible(True)
-            elif "Hata" in status:
+            elif "Hata" in status or status.startswith(UNAVAILABLE_STATUS_PREFIX):
                 status_label.add_css_class("status-error")
                 progress.set_visible(False)
             else:
@@ -479,6 +491,7 @@ class DownloadsTab(Adw.Bin):
         # Action button handlers
         btn_retry = actions.get_first_child()
         btn_remove = btn_retry.get_next_sibling()
+        btn_next = btn_remove.get_next_sibling()
 
         def on_retry_clicked(btn):
             # TODO: Implement retry logic
@@ -486,16 +499,17 @@ class DownloadsTab(Adw.Bin):
 
         def on_remove_clicked(btn):
             if self.queue_manager:
-                with self.queue_manager.lock:
-                    self.queue_manager.queue = [
-                        i for i in self.queue_manager.queue
-                        if i.get("id") != item.uid
-                    ]
+                self.queue_manager.remove_item(item.uid)
                 self.update_from_queue()
                 self.main_window.show_toast("🗑️ Kuyruktan kaldırıldı")
 
+        def on_next_clicked(btn):
+            if self.queue_manager and self.queue_manager.download_next(item.uid):
+                self.main_window.show_toast(f"⏫ Sıradaki: {item.title}")
+
         btn_retry.connect("clicked", on_retry_clicked)
         btn_remove.connect("clicked", on_remove_clicked)
+        btn_next.connect("clicked", on_next_clicked)
 
     # --- UPDATE LOGIC (Performance unchanged) ---
 
@@ -574,16 +588,18 @@ class DownloadsTab(Adw.Bin):
 
     def _calculate_stats(self, queue):
         """Calculate download statistics"""
-        self.stats = {"queue": 0, "active": 0, "completed": 0, "failed": 0}
+        self.stats = {"queue": 0, "active": 0, "completed": 0, "failed": 0, "unavailable": 0}
 
         for item in queue:
             status = item.get("status", "")
             if "Tamamlandı" in status or "Atlandı" in status:
                 self.stats["completed"] += 1
-            elif "İndiriliyor" in status or "Dönüştürülüyor" in status or "%" in status:
+            elif status.startswith(ACTIVE_STATUS_PREFIXES) or "%" in status:
                 self.stats["active"] += 1
             elif "Hata" in status:
                 self.stats["failed"] += 1
+            elif status.startswith(UNAVAILABLE_STATUS_PREFIX):
+                self.stats["unavailable"] += 1
             else:
                 self.stats["queue"] += 1
 
@@ -599,6 +615,14 @@ class DownloadsTab(Adw.Bin):
             parts.append(f"✓ {self.stats['completed']} bitti")
         if self.stats['failed'] > 0:
             parts.append(f"✗ {self.stats['failed']} hata")
+        if self.stats['unavailable'] > 0:
+            parts.append(f"⊘ {self.stats['unavailable']} erişilemez")
+
+        # Adaptif denetleyicinin canlı slot sayısı
+        qm = self.queue_manager
+        if qm and getattr(qm, 'is_downloading', False) and hasattr(qm, 'concurrency'):
+            speed_mb = qm.concurrency.throughput / (1024 * 1024)
+            parts.append(f"🎚 {qm.max_slots} slot · {speed_mb:.1f} MB/s")
 
         text = " · ".join(parts) if parts else "Kuyruk boş"
         self.stats_label.set_text(text)
@@ -622,15 +646,7 @@ class DownloadsTab(Adw.Bin):
         if not self.queue_manager:
             return
 
-        with self.queue_manager.lock:
-            before = len(self.queue_manager.queue)
-            self.queue_manager.queue = [
-                i for i in self.queue_manager.queue
-                if i.get("status") not in ["Tamamlandı", "Atlandı (Mevcut)"]
-                and "Hata" not in i.get("status", "")
-            ]
-            after = len(self.queue_manager.queue)
-            removed = before - after
+        removed = self.queue_manager.clear_finished()
 
         if removed > 0:
             self.main_window.show_toast(f"🧹 {removed} öğe temizlendi")
@@ -358,6 +358,8 @@ class MainWindow(Adw.ApplicationWindow):
         self.toast_overlay.add_toast(toast)
     
     def on_close_request(self, *args):
+        if self.queue_manager:
+            self.queue_manager.shutdown()
         return False
 
 
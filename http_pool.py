@@ -0,0 +1,137 @@
+"""
+4KTube Free - HTTP Pool
+Kapak resimleri ve Spotify API'si için ortak, thread-safe HTTP istemcisi.
+
+- Tek requests.Session: bağlantılar keep-alive ile yeniden kullanılır,
+  her kapak/sayfa için DNS + TCP + TLS el sıkışması tekrarlanmaz
+- Host başına eşzamanlı bağlantı sınırı (HOST_LIMITS): çok sayıda worker
+  aynı anda etiketlese de i.scdn.co / i.ytimg.com'a sınırlı bağlantı açılır
+- 429/5xx yanıtlarında Retry-After'a uyan (üst sınırlı) yeniden deneme
+- Koşullu istek: elinde kopya olan çağıran ETag / Last-Modified verir,
+  değişmemişse gövdesiz 304 döner
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Host başına aynı anda açık istek sayısı
+HOST_LIMITS = {
+    "api.spotify.com": 8,
+    "accounts.spotify.com": 2,
+    "i.scdn.co": 4,
+    "i.ytimg.com": 4,
+    "www.youtube.com": 8,  # Erişilebilirlik (oEmbed) yoklamaları
+}
+DEFAULT_HOST_LIMIT = 4
+
+DEFAULT_TIMEOUT = 10
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+class RetryAfterRetry(Retry):
+    """
+    429/5xx yanıtlarında Retry-After başlığına uyar; Spotify'ın bazen
+    döndürdüğü çok uzun bekleme sürelerini sınırlar.
+    """
+    RETRY_AFTER_CAP = 30
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.RETRY_AFTER_CAP)
+
+
+class HostLimitedAdapter(HTTPAdapter):
+    """Her host için ayrı semafor: o hosta aynı anda en fazla N istek gider"""
+
+    def __init__(self, host_limits=None, default_limit=DEFAULT_HOST_LIMIT, **kwargs):
+        self.host_limits = dict(host_limits or {})
+        self.default_limit = default_limit
+        self._limits_lock = threading.Lock()
+        self._semaphores = {}
+        # urllib3 havuzu host başına en az sınır kadar bağlantı tutabilmeli
+        kwargs.setdefault("pool_maxsize", max([default_limit, *self.host_limits.values()]))
+        super().__init__(**kwargs)
+
+    def _semaphore(self, host):
+        with self._limits_lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                limit = self.host_limits.get(host, self.default_limit)
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(limit)
+            return semaphore
+
+    def send(self, request, **kwargs):
+        with self._semaphore(urlsplit(request.url).hostname or ""):
+            return super().send(request, **kwargs)
+
+
+def build_session(host_limits=HOST_LIMITS, default_limit=DEFAULT_HOST_LIMIT):
+    """Bağlantıları yeniden kullanan, 429'da Retry-After ile bekleyen session"""
+    retry = RetryAfterRetry(
+        total=5,
+        status=5,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HostLimitedAdapter(
+        host_limits, default_limit, pool_connections=len(host_limits) + 4, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class HttpPool:
+    """
+    Uygulama genelindeki ortak session. Oturum oluşturulduktan sonra
+    değiştirilmez; istek başına ayarlar (başlık, timeout) parametreyle verilir,
+    bu yüzden worker thread'leri aynı örneği güvenle paylaşır.
+    """
+
+    def __init__(self, host_limits=HOST_LIMITS, default_limit=DEFAULT_HOST_LIMIT):
+        self.session = build_session(host_limits, default_limit)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+
+    def get(self, url, timeout=DEFAULT_TIMEOUT, headers=None, etag=None, last_modified=None, **kwargs):
+        """
+        GET isteği. etag / last_modified verilirse koşullu istek yapılır;
+        kaynak değişmemişse yanıt 304 (gövdesiz) olur.
+        """
+        request_headers = {"User-Agent": USER_AGENT}
+        if headers:
+            request_headers.update(headers)
+        if etag:
+            request_headers["If-None-Match"] = etag
+        if last_modified:
+            request_headers["If-Modified-Since"] = last_modified
+
+        response = self.session.get(url, timeout=timeout, headers=request_headers, **kwargs)
+        with self.lock:
+            self.requests += 1
+            if response.status_code == 304:
+                self.not_modified += 1
+        return response
+
+    @staticmethod
+    def validators(response):
+        """Sonraki koşullu istek için (etag, last_modified)"""
+        return response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    def close(self):
+        self.session.close()
+
+
+# Global pool
+http_pool = HttpPool()
@@ -0,0 +1,216 @@
+"""
+4KTube Free - yt-dlp Info Cache
+extract_info sonuçlarını video ID'siyle CACHE_DIR altında SQLite'ta tutar.
+
+İki ayrı ömür vardır:
+- Kalıcı metadata (başlık, kanal, süre, kapak): META_TTL
+- Format listesi (imzalı akış URL'leri): URL'deki "expire" parametresine
+  göre, bulunamazsa FORMATS_TTL. Süresi geçen formatlar metadata'yı
+  geçersiz kılmaz.
+
+Kuyruğa ekleme önce metadata'ya, indirme önce formatlara bakar;
+yeniden içe aktarılan playlist'lerde izleme sayfası tekrar çekilmez.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from settings import CACHE_DIR
+
+INFO_CACHE_FILE = os.path.join(CACHE_DIR, "ytdl_info.db")
+
+META_TTL = 30 * 86400       # 30 gün
+FORMATS_TTL = 4 * 3600      # expire parametresi yoksa 4 saat
+FORMATS_MARGIN = 15 * 60    # expire'dan önce bu kadar pay bırak
+
+# Metadata'da tutulan alanlar (flat sonuçlarda da bulunanlar)
+META_KEYS = (
+    "id", "title", "uploader", "channel", "channel_id", "duration",
+    "thumbnail", "webpage_url", "upload_date", "release_year",
+    "artist", "track", "album", "availability", "live_status",
+)
+
+# Tam info dict'ten atılan büyük/gereksiz alanlar
+DROP_KEYS = ("automatic_captions", "subtitles", "heatmap", "thumbnails", "chapters", "description")
+
+YOUTUBE_ID = re.compile(r"(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([0-9A-Za-z_-]{11})")
+
+
+def video_id_from_url(url):
+    """YouTube URL'sinden 11 karakterlik video ID'si (bulunamazsa None)"""
+    if not url:
+        return None
+    match = YOUTUBE_ID.search(url)
+    return match.group(1) if match else None
+
+
+def _formats_expiry(formats, extracted_at):
+    """Format URL'lerinin en erken 'expire' zamanı (pay düşülmüş)"""
+    expiries = []
+    for fmt in formats or ():
+        try:
+            value = parse_qs(urlparse(fmt.get("url") or "").query).get("expire")
+        except ValueError:
+            continue
+        if value and value[0].isdigit():
+            expiries.append(int(value[0]))
+    if expiries:
+        return min(expiries) - FORMATS_MARGIN
+    return extracted_at + FORMATS_TTL
+
+
+def formats_fresh(info):
+    """Tam info dict'in format URL'leri hâlâ kullanılabilir mi?"""
+    if not info or not info.get("formats"):
+        return False
+    extracted_at = info.get("epoch") or 0
+    return time.time() < _formats_expiry(info["formats"], extracted_at)
+
+
+def _sanitize(info):
+    """JSON'a yazılabilir, özel anahtarları temizlenmiş kopya (yt-dlp info JSON'u gibi)"""
+    try:
+        import yt_dlp
+        info = yt_dlp.YoutubeDL.sanitize_info(info, remove_private_keys=True)
+    except Exception:
+        info = {k: v for k, v in info.items() if not str(k).startswith("_")}
+    return {k: v for k, v in info.items() if k not in DROP_KEYS}
+
+
+class InfoCache:
+    """Video ID -> (metadata, format listesi). Tüm metotlar thread-safe'tir."""
+
+    def __init__(self, path=INFO_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS videos ("
+            " id TEXT PRIMARY KEY,"
+            " meta TEXT NOT NULL,"
+            " meta_at REAL NOT NULL,"
+            " info TEXT,"
+            " formats_until REAL)"
+        )
+
+    def _count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    # --- OKUMA ---
+
+    def get_meta(self, video_id):
+        """Süresi geçmemiş metadata (dict) veya None"""
+        if not video_id:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT meta, meta_at FROM videos WHERE id = ?", (video_id,)
+            ).fetchone()
+        hit = bool(row) and time.time() - row[1] < META_TTL
+        self._count(hit)
+        return json.loads(row[0]) if hit else None
+
+    def get_info(self, video_id):
+        """Formatları hâlâ geçerli tam info dict (process_ie_result için) veya None"""
+        if not video_id:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT info, formats_until FROM videos WHERE id = ?", (video_id,)
+            ).fetchone()
+        hit = bool(row) and row[0] is not None and time.time() < (row[1] or 0)
+        self._count(hit)
+        return json.loads(row[0]) if hit else None
+
+    # --- YAZMA ---
+
+    def put(self, info):
+        """Tam extract_info sonucunu (metadata + formatlar) kaydet"""
+        if not info or not info.get("id") or info.get("_type") not in (None, "video"):
+            return
+        now = time.time()
+        info = _sanitize(info)
+        meta = {k: info[k] for k in META_KEYS if info.get(k) is not None}
+        formats_until = (
+            _formats_expiry(info["formats"], info.get("epoch") or now) if info.get("formats") else None
+        )
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO videos (id, meta, meta_at, info, formats_until)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (info["id"], json.dumps(meta, ensure_ascii=False), now,
+                 json.dumps(info, ensure_ascii=False) if formats_until else None, formats_until)
+            )
+
+    def put_flat(self, entries):
+        """
+        Flat sonuçların (arama, playlist) metadata'sını kaydet.
+        Zaten kayıtlı videoların tam bilgisinin üzerine yazılmaz.
+        """
+        now = time.time()
+        rows = []
+        for entry in entries or ():
+            if not entry or not entry.get("id"):
+                continue
+            meta = {k: entry[k] for k in META_KEYS if entry.get(k) is not None}
+            if "uploader" not in meta and entry.get("channel"):
+                meta["uploader"] = entry["channel"]
+            rows.append((entry["id"], json.dumps(meta, ensure_ascii=False), now))
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO videos (id, meta, meta_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET meta = excluded.meta, meta_at = excluded.meta_at"
+                " WHERE videos.info IS NULL",
+                rows
+            )
+
+    def invalidate_formats(self, video_id):
+        """Formatlar kullanılamadı (ör. 403): sonraki indirme yeniden çıkarır"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE videos SET info = NULL, formats_until = NULL WHERE id = ?", (video_id,)
+            )
+
+    def prune(self):
+        """Metadata'sı da süresi geçmiş kayıtları sil"""
+        with self.lock:
+            self.conn.execute("DELETE FROM videos WHERE meta_at < ?", (time.time() - META_TTL,))
+            self.conn.execute(
+                "UPDATE videos SET info = NULL, formats_until = NULL WHERE formats_until < ?",
+                (time.time(),)
+            )
+
+    def clear(self):
+        """
+        Tüm kayıtları açık bağlantı üzerinden sil ve dosyayı küçült.
+        Veritabanı dosyaları yerinde kalır (dışarıdan silinmemeli).
+        """
+        with self.lock:
+            self.conn.execute("DELETE FROM videos")
+            self.conn.execute("VACUUM")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# Global cache
+info_cache = InfoCache()
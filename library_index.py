@@ -0,0 +1,228 @@
+"""
+4KTube Free - Library Index
+İndirme klasöründeki ses dosyalarının bellek içi indeksi.
+Bir kez os.scandir ile kurulur, Gio.FileMonitor (inotify) olaylarıyla
+güncel tutulur; "dosya zaten var mı?" kontrolü O(1) set araması olur.
+"""
+
+import os
+import re
+import threading
+
+try:
+    from gi.repository import GLib, Gio
+    GIO_AVAILABLE = True
+except ImportError:
+    GIO_AVAILABLE = False
+
+AUDIO_EXTENSIONS = {'.mp3', '.m4a', '.opus', '.flac', '.wav', '.ogg'}
+
+_FORBIDDEN_CHARS = re.compile(r'[<>:"/\\|?*]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_name(text):
+    """Karşılaştırma anahtarı: dosya adında yasak karakterler atılır, küçük harf, tek boşluk"""
+    if not text:
+        return ""
+    clean = _FORBIDDEN_CHARS.sub('', str(text))
+    clean = _WHITESPACE.sub(' ', clean).strip('. ')
+    return clean.casefold()
+
+
+def make_key(artist, title):
+    """Sanatçı/başlık çiftinden indeks anahtarı"""
+    return f"{normalize_name(artist)} - {normalize_name(title)}"
+
+
+class LibraryIndex:
+    """
+    Normalize edilmiş "sanatçı - başlık" anahtarı -> dosya yolları.
+    Gizli klasörler ('.' ile başlayanlar) indekslenmez.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.root = None
+        self._keys = {}      # anahtar -> {yol, ...}
+        self._paths = {}     # yol -> anahtar
+        self._monitors = {}  # klasör -> Gio.FileMonitor
+
+    # --- KURULUM ---
+
+    def ensure_built(self, root):
+        """İndeks bu kök için kurulmamışsa kur (indirme klasörü değişmişse yeniden)"""
+        root = os.path.abspath(root)
+        if self.root == root:
+            return
+        with self._build_lock:
+            if self.root != root:
+                self.build(root)
+
+    def build(self, root):
+        """Kök klasörü os.scandir ile tara ve indeksi sıfırdan kur"""
+        root = os.path.abspath(root)
+        keys, paths, dirs = {}, {}, []
+
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            dirs.append(directory)
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.name.startswith('.'):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            key = self._key_for_file(entry.name)
+                            if key:
+                                keys.setdefault(key, set()).add(entry.path)
+                                paths[entry.path] = key
+            except OSError as e:
+                print(f"[INDEX] Klasör okunamadı: {directory} ({e})")
+
+        with self.lock:
+            self._keys = keys
+            self._paths = paths
+            self.root = root
+
+        print(f"[INDEX] {len(paths)} ses dosyası indekslendi ({len(dirs)} klasör)")
+
+        if GIO_AVAILABLE:
+            # Monitörler ana döngünün context'inde oluşturulmalı (olaylar orada gelir)
+            GLib.idle_add(self._reset_monitors, dirs)
+
+    @staticmethod
+    def _key_for_file(filename):
+        name, ext = os.path.splitext(filename)
+        if ext.lower() not in AUDIO_EXTENSIONS:
+            return None
+        # Dosya adı zaten "Sanatçı - Başlık" biçiminde; aynı normalizasyondan geçir
+        if " - " in name:
+            artist, title = name.split(" - ", 1)
+            return make_key(artist, title)
+        return normalize_name(name)
+
+    # --- SORGULAMA / GÜNCELLEME ---
+
+    def contains(self, artist, title):
+        """Bu sanatçı/başlık için kütüphanede dosya var mı? (O(1))"""
+        key = make_key(artist, title)
+        with self.lock:
+            return bool(self._keys.get(key))
+
+    def find(self, artist, title):
+        """Eşleşen ilk dosya yolunu döndür"""
+        key = make_key(artist, title)
+        with self.lock:
+            paths = self._keys.get(key)
+            return next(iter(paths)) if paths else None
+
+    def add_file(self, path):
+        """Tek dosyayı indekse ekle (indirme bittiğinde veya CREATED olayında)"""
+        if self.root is None or os.path.basename(path).startswith('.'):
+            return
+        key = self._key_for_file(os.path.basename(path))
+        if not key:
+            return
+        with self.lock:
+            self._keys.setdefault(key, set()).add(path)
+            self._paths[path] = key
+
+    def remove_file(self, path):
+        """Dosyayı indeksten çıkar"""
+        with self.lock:
+            key = self._paths.pop(path, None)
+            if key is None:
+                return
+            paths = self._keys.get(key)
+            if paths:
+                paths.discard(path)
+                if not paths:
+                    del self._keys[key]
+
+    def _remove_tree(self, directory):
+        prefix = directory.rstrip(os.sep) + os.sep
+        with self.lock:
+            doomed = [p for p in self._paths if p.startswith(prefix)]
+        for path in doomed:
+            self.remove_file(path)
+        for d in [d for d in self._monitors if d == directory or d.startswith(prefix)]:
+            self._monitors.pop(d).cancel()
+
+    def _add_tree(self, directory):
+        """Sonradan oluşturulan/taşınan klasörü tara ve izlemeye al"""
+        stack, new_dirs = [directory], []
+        while stack:
+            d = stack.pop()
+            new_dirs.append(d)
+            try:
+                with os.scandir(d) as it:
+                    for entry in it:
+                        if entry.name.startswith('.'):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            self.add_file(entry.path)
+            except OSError:
+                pass
+        for d in new_dirs:
+            self._watch(d)
+
+    # --- GIO FILE MONITOR ---
+
+    def _reset_monitors(self, dirs):
+        for monitor in self._monitors.values():
+            monitor.cancel()
+        self._monitors = {}
+        for d in dirs:
+            self._watch(d)
+        return False
+
+    def _watch(self, directory):
+        if not GIO_AVAILABLE or directory in self._monitors:
+            return
+        try:
+            monitor = Gio.File.new_for_path(directory).monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None
+            )
+            monitor.connect("changed", self._on_changed)
+            self._monitors[directory] = monitor
+        except Exception as e:
+            print(f"[INDEX] İzleme başlatılamadı: {directory} ({e})")
+
+    def _on_changed(self, monitor, file, other_file, event_type):
+        path = file.get_path()
+        if not path or os.path.basename(path).startswith('.'):
+            return
+
+        E = Gio.FileMonitorEvent
+        if event_type in (E.CREATED, E.MOVED_IN):
+            if os.path.isdir(path):
+                self._add_tree(path)
+            else:
+                self.add_file(path)
+        elif event_type in (E.DELETED, E.MOVED_OUT):
+            self.remove_file(path)
+            self._remove_tree(path)
+        elif event_type == E.RENAMED:
+            self.remove_file(path)
+            self._remove_tree(path)
+            new_path = other_file.get_path() if other_file else None
+            if new_path:
+                if os.path.isdir(new_path):
+                    self._add_tree(new_path)
+                else:
+                    self.add_file(new_path)
+
+    def size(self):
+        with self.lock:
+            return len(self._paths)
+
+
+# Global indeks (QueueManager ve indirme işleri paylaşır)
+library_index = LibraryIndex()
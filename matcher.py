@@ -0,0 +1,175 @@
+"""
+4KTube Free - Spotify → YouTube Matcher
+Tek bir flat aramanın ilk N sonucunu Spotify parçasıyla puanlar:
+normalize edilmiş başlık/sanatçı benzerliği, süre (duration_ms) ve
+varsa ISRC. En iyi aday güven eşiğinin altındaysa hiç indirilmez.
+
+ISRC sadece flat girişte gelen açıklama ve etiketlerde aranır. Flat
+arama sonuçlarında bunlar çoğu zaman boştur ya da kısaltılmıştır, bu
+yüzden ISRC yalnızca bonus sayılır; puanın asıl dayanağı başlık ve süredir.
+"""
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+# Ağırlıklar (toplam 1.0)
+WEIGHT_TITLE = 0.45
+WEIGHT_DURATION = 0.30
+WEIGHT_ARTIST = 0.25
+
+TITLE_REJECT = 0.5       # Başlık benzerliği bunun altındaysa aday elenir (başka şarkı)
+
+DURATION_EXACT = 3       # sn: bu farka kadar tam puan
+DURATION_ZERO = 30       # sn: aday kısaysa bu farkta süre puanı sıfır
+DURATION_ZERO_LONGER = 120  # sn: aday uzunsa (klip girişi/kapanışı) bu farkta sıfır
+DURATION_REJECT = 90     # sn: bu farktan büyükse aday elenir (loop, derleme vb.)
+
+ISRC_BONUS = 0.30
+OFFICIAL_BONUS = 0.05    # "Sanatçı - Topic" / VEVO kanalları
+UNWANTED_PENALTY = 0.30
+OTHER_ARTIST_PENALTY = 0.30  # "Başka Sanatçı - Aynı Başlık" yüklemeleri
+
+# Spotify başlığında yoksa adayda istenmeyen sürüm işaretleri (tam kelime;
+# "oliver" içindeki "live" veya "discover" içindeki "cover" sayılmaz)
+UNWANTED_MARKERS = (
+    "live", "canli", "cover", "covers", "karaoke", "reaction", "remix", "sped up",
+    "slowed", "nightcore", "8d", "hour", "hours", "saat", "loop", "instrumental",
+    "fan made", "tutorial", "shorts",
+)
+
+_BRACKETS = re.compile(r"[\(\[].*?[\)\]]")
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_NOISE = re.compile(r"\b(official|video|audio|music|lyrics?|hd|hq|4k|mv|clip|klip|feat|ft)\b")
+_UNWANTED = re.compile(r"\b(" + "|".join(re.escape(m) for m in UNWANTED_MARKERS) + r")\b")
+
+
+def normalize(text, keep_brackets=True):
+    """Aksan/büyük harf/noktalama farklarını yok sayan karşılaştırma metni"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = text.replace("ı", "i")
+    if not keep_brackets:
+        text = _BRACKETS.sub(" ", text)
+    text = _NON_ALNUM.sub(" ", text)
+    return " ".join(text.split())
+
+
+def _similarity(expected, candidate):
+    """Beklenen metnin kelimeleri adayda ne kadar var + dizi benzerliği (0..1)"""
+    expected = normalize(expected, keep_brackets=False)
+    # Gürültü kelimeleri sadece beklenen metinde yoksa atılır ("Music", "Video Games")
+    wanted = set(expected.split())
+    candidate = _NOISE.sub(
+        lambda m: m.group(0) if m.group(0) in wanted else " ", normalize(candidate)
+    )
+    if not expected or not candidate:
+        return 0.0
+    tokens = expected.split()
+    candidate_tokens = set(candidate.split())
+    recall = sum(1 for t in tokens if t in candidate_tokens) / len(tokens)
+    ratio = SequenceMatcher(None, expected, " ".join(candidate.split())).ratio()
+    return 0.7 * recall + 0.3 * ratio
+
+
+def _duration_score(expected_ms, candidate_sec):
+    """
+    Süre puanı (0..1); None = eleme, bilinmiyorsa nötr 0.5.
+    Resmi klipler giriş/kapanış sahneleriyle sık sık uzundur; bu yüzden
+    uzun adaylara kısa olanlardan daha fazla tolerans tanınır.
+    """
+    if not expected_ms or not candidate_sec:
+        return 0.5
+    diff = candidate_sec - expected_ms / 1000
+    if abs(diff) > max(DURATION_REJECT, expected_ms / 1000 * 0.5):
+        return None
+    if abs(diff) <= DURATION_EXACT:
+        return 1.0
+    zero = DURATION_ZERO_LONGER if diff > 0 else DURATION_ZERO
+    return max(0.0, 1 - (abs(diff) - DURATION_EXACT) / (zero - DURATION_EXACT))
+
+
+def unwanted_markers(text):
+    """Metindeki istenmeyen sürüm işaretleri (tam kelime eşleşmesi)"""
+    return set(_UNWANTED.findall(normalize(text)))
+
+
+def _isrc_listed(isrc, entry):
+    """ISRC flat girişin açıklamasında veya etiketlerinde geçiyor mu"""
+    haystack = " ".join([entry.get("description") or "", *(entry.get("tags") or ())]).upper()
+    return isrc in haystack
+
+
+def _other_artist(track, cand_title):
+    """
+    Aday "Sanatçı - Başlık" biçimindeyse ve soldaki ad ne parçanın sanatçısı
+    ne de başlığıysa True (aynı adlı başka bir şarkı)
+    """
+    if " - " not in cand_title:
+        return False
+    left = cand_title.split(" - ", 1)[0]
+    return (_similarity(track.get("artist"), left) < TITLE_REJECT
+            and _similarity(track.get("title"), left) < TITLE_REJECT)
+
+
+def score_candidate(track, entry):
+    """
+    Flat arama girişini Spotify parçasına göre puanla.
+
+    Args:
+        track: {"title", "artist", "duration_ms", "isrc"} (kuyruk öğesi)
+        entry: yt-dlp flat arama girişi
+
+    Returns:
+        float: 0..1 güven puanı (elenen adaylar 0)
+    """
+    duration = _duration_score(track.get("duration_ms"), entry.get("duration"))
+    if duration is None:
+        return 0.0
+
+    cand_title = entry.get("title") or ""
+    channel = entry.get("channel") or entry.get("uploader") or ""
+
+    title = _similarity(track.get("title"), cand_title)
+    if title < TITLE_REJECT:
+        return 0.0
+    artist = max(_similarity(track.get("artist"), cand_title),
+                 _similarity(track.get("artist"), channel))
+
+    score = WEIGHT_DURATION * duration + WEIGHT_TITLE * title + WEIGHT_ARTIST * artist
+
+    if channel.endswith(" - Topic") or "vevo" in channel.casefold():
+        score += OFFICIAL_BONUS
+
+    isrc = (track.get("isrc") or "").upper()
+    if isrc and _isrc_listed(isrc, entry):
+        score += ISRC_BONUS
+
+    if unwanted_markers(cand_title) - unwanted_markers(track.get("title")):
+        score -= UNWANTED_PENALTY
+
+    if _other_artist(track, cand_title):
+        score -= OTHER_ARTIST_PENALTY
+
+    return max(0.0, min(1.0, score))
+
+
+def best_match(track, entries, min_confidence):
+    """
+    En yüksek puanlı aday.
+
+    Returns:
+        tuple: (giriş veya None, puan) — eşik altındaysa giriş None
+    """
+    best, best_score = None, 0.0
+    for entry in entries or ():
+        if not entry or not entry.get("id"):
+            continue
+        score = score_candidate(track, entry)
+        if score > best_score:
+            best, best_score = entry, score
+    if best_score < min_confidence:
+        return None, best_score
+    return best, best_score
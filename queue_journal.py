@@ -0,0 +1,158 @@
+"""
+4KTube Free - Queue Journal
+Kuyruğu SQLite (WAL) üzerinde kalıcı olarak tutar.
+Çökme veya pencere kapanması sonrası bitmemiş parçalar, metadata
+yeniden çekilmeden (Spotify API / yt-dlp çağrısı olmadan) geri yüklenir.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+from settings import TASKS_FILE
+
+# Parça aşamaları (journal'daki "stage" sütunu)
+STAGE_QUEUED = "queued"
+STAGE_RESOLVING = "resolving"
+STAGE_DOWNLOADING = "downloading"
+STAGE_TRANSCODING = "transcoding"
+STAGE_TAGGING = "tagging"
+STAGE_DONE = "done"
+STAGE_SKIPPED = "skipped"
+STAGE_FAILED = "failed"
+STAGE_UNAVAILABLE = "unavailable"  # Pre-flight: özel/silinmiş/kısıtlı video
+
+FINISHED_STAGES = (STAGE_DONE, STAGE_SKIPPED)
+
+
+class QueueJournal:
+    """
+    Kuyruk öğelerini, çözümlenmiş metadata'larını ve aşama durumlarını
+    tek bir SQLite dosyasında saklar. Tüm metotlar thread-safe'tir.
+    """
+
+    def __init__(self, path=TASKS_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+
+        # isolation_level=None: her ifade kendi transaction'ında (autocommit)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " id TEXT PRIMARY KEY,"
+            " position INTEGER NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " status TEXT,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+
+    @staticmethod
+    def _serialize(item):
+        """'_' ile başlayan geçici anahtarlar (future, callback vb.) yazılmaz"""
+        data = {k: v for k, v in item.items() if not k.startswith("_")}
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+    def add_items(self, items):
+        """Yeni öğeleri kuyruğun sonuna ekle"""
+        if not items:
+            return
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT COALESCE(MAX(position), -1) FROM items").fetchone()
+            position = row[0] + 1
+            rows = []
+            for item in items:
+                rows.append((
+                    item["id"], position,
+                    item.get("stage", STAGE_QUEUED), item.get("status", ""),
+                    self._serialize(item), now
+                ))
+                position += 1
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO items (id, position, stage, status, data, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self.conn.execute("COMMIT")
+
+    def update_item(self, item):
+        """Öğenin tüm verisini (metadata + aşama) güncelle"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE items SET stage = ?, status = ?, data = ?, updated_at = ? WHERE id = ?",
+                (item.get("stage", STAGE_QUEUED), item.get("status", ""),
+                 self._serialize(item), time.time(), item["id"])
+            )
+
+    def set_stage(self, item_id, stage, status=""):
+        """Sadece aşama ve durum metnini güncelle (ucuz yazma)"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE items SET stage = ?, status = ?, updated_at = ? WHERE id = ?",
+                (stage, status, time.time(), item_id)
+            )
+
+    def remove_items(self, item_ids):
+        """Öğeleri journal'dan sil"""
+        if not item_ids:
+            return
+        with self.lock:
+            self.conn.executemany("DELETE FROM items WHERE id = ?", [(i,) for i in item_ids])
+
+    def clear(self):
+        """Tüm kuyruğu sil"""
+        with self.lock:
+            self.conn.execute("DELETE FROM items")
+
+    def load_unfinished(self):
+        """Bitmemiş öğeleri kuyruk sırasıyla döndür"""
+        placeholders = ",".join("?" for _ in FINISHED_STAGES)
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT data, stage FROM items WHERE stage NOT IN ({placeholders})"
+                " ORDER BY position",
+                FINISHED_STAGES
+            ).fetchall()
+
+        items = []
+        for data, stage in rows:
+            try:
+                item = json.loads(data)
+            except ValueError:
+                continue
+            item["stage"] = stage
+            items.append(item)
+        return items
+
+    def prune_finished(self):
+        """Tamamlanmış/atlanmış öğeleri sil (journal büyümesin)"""
+        placeholders = ",".join("?" for _ in FINISHED_STAGES)
+        with self.lock:
+            self.conn.execute(f"DELETE FROM items WHERE stage IN ({placeholders})", FINISHED_STAGES)
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+            )
+
+    def close(self):
+        """WAL'ı ana dosyaya aktar ve bağlantıyı kapat"""
+        with self.lock:
+            try:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error:
+                pass
+            self.conn.close()
@@ -11,10 +11,28 @@ import subprocess
 import uuid
 import glob
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from gi.repository import GLib
 from settings import GLOBAL_CONFIG, get_download_dir
+from concurrency import AdaptiveConcurrency, YtdlThrottleLogger
+from library_index import library_index
+from cancellation import CancelToken, JobCancelled
+from scheduler import (
+    DownloadScheduler, lane_limits, LANE_AUDIO, LANE_VIDEO, PRIORITY_NORMAL, PRIORITY_NEXT
+)
+from queue_journal import (
+    QueueJournal, STAGE_QUEUED, STAGE_RESOLVING, STAGE_DOWNLOADING, STAGE_TRANSCODING,
+    STAGE_TAGGING, STAGE_DONE, STAGE_SKIPPED, STAGE_FAILED, STAGE_UNAVAILABLE
+)
+import transcoder
+import staging
+from ytdl_pool import ytdl_pool, PROFILE_FLAT
+from info_cache import info_cache, video_id_from_url
+from spotify_cache import spotify_cache, spotify_track_id
+import matcher
+import availability as preflight
 
 
 def sanitize_filename(name):
@@ -27,20 +45,104 @@ def sanitize_filename(name):
 
 
 class QueueManager:
+    # Aşama havuzu boyutları (indirme slotları adaptif, CPU havuzu çekirdek sayısı kadar)
+    RESOLVE_WORKERS = 4
+    TAG_WORKERS = 2
+    INGEST_WORKERS = 4  # Kuyruğa eklemede URL çözümleme (TXT / çoklu link)
+
     def __init__(self, main_window, spotify_client=None, youtube_client=None):
         self.main_window = main_window
         self.spotify_client = spotify_client
         self.youtube_client = youtube_client
 
         self.queue = []
+        self._by_id = {}  # item_id -> item (kuyrukla birlikte güncellenir)
         self.selected_indices = set()
         self.lock = threading.RLock()
 
         self.is_downloading = False
         self.stop_requested = False
 
+        # Dispatcher: sabit slot sayısı, indirme sırasında eklenenler de alınır
+        # Slot sayısı çalışma anında ölçümlere göre ayarlanır
+        initial = GLOBAL_CONFIG.get(
+            "concurrent_downloads", GLOBAL_CONFIG.get("max_concurrent_downloads", 3)
+        )
+        self.concurrency = AdaptiveConcurrency(
+            initial=initial,
+            minimum=GLOBAL_CONFIG.get("concurrent_downloads_min", 1),
+            maximum=GLOBAL_CONFIG.get("concurrent_downloads_max", 8),
+            enabled=GLOBAL_CONFIG.get("adaptive_concurrency", True),
+        )
+        self.scheduler = DownloadScheduler()
+        self._active = 0
+        self._active_lanes = {LANE_AUDIO: 0, LANE_VIDEO: 0}
+        self._dispatch_cond = threading.Condition(self.lock)
+        self._dispatcher = None
+
+        # Pipeline durumu: çözümlenmiş tampon ve aşama sayaçları
+        self._ready = deque()
+        self._resolving = 0
+        self._resolving_lanes = {LANE_AUDIO: 0, LANE_VIDEO: 0}
+        self._inflight = 0  # scheduler'dan çıkmış ama henüz bitmemiş parçalar
+        self._resolve_pool = None
+        self._executor = None
+        self._transcode_pool = None
+        self._tag_pool = None
+        self._tokens = {}  # item_id -> CancelToken (indirme aşamasına girmiş parçalar)
+
+        # Kuyruğa ekleme havuzu (URL çözümleme)
+        self._ingest_pool = None
+
+        # Kalıcı kuyruk (çökme sonrası geri yükleme)
+        self.journal = QueueJournal()
+        self._restore_from_journal()
+
+        # Sahipsiz, eski yarım indirmeleri ve süresi geçmiş önbellek kayıtlarını arka planda topla
+        threading.Thread(target=self._housekeeping, name="downx-housekeeping", daemon=True).start()
+
         print(f"[QUEUE] Başlatıldı")
 
+    def _restore_from_journal(self):
+        """Önceki oturumdan kalan bitmemiş parçaları geri yükle"""
+        try:
+            self.journal.prune_finished()
+            items = self.journal.load_unfinished()
+        except Exception as e:
+            print(f"[QUEUE] Journal okunamadı: {e}")
+            return
+
+        if not items:
+            return
+
+        for item in items:
+            item["stage"] = STAGE_QUEUED
+            item["status"] = "Beklemede"
+
+        with self.lock:
+            self.queue.extend(items)
+            self._by_id.update((i["id"], i) for i in items)
+            self.selected_indices.update(range(len(self.queue)))
+
+        print(f"[QUEUE] Journal'dan {len(items)} bitmemiş parça geri yüklendi")
+        self._prefetch_covers(items)
+
+        # Önceki oturum indirme sırasında kapandıysa kaldığı yerden devam et
+        if self.journal.get_meta("interrupted") == "1":
+            print("[QUEUE] Yarım kalan indirme oturumu devam ettiriliyor")
+            GLib.idle_add(self.start_downloads)
+
+    def _housekeeping(self):
+        """Başlangıç temizliği (arka plan thread'i)"""
+        # Journal'dan geri yüklenen parçaların yarım dosyaları devam için korunur
+        with self.lock:
+            live_ids = set(self._by_id)
+        staging.collect_stale(live_ids=live_ids)
+        try:
+            info_cache.prune()
+        except Exception as e:
+            print(f"[CACHE] Temizlik hatası: {e}")
+
     # ========================================
     # BÖLÜM 1: KUYRUĞA EKLEME
     # ========================================
@@ -49,125 +151,201 @@ class QueueManager:
         """URL'yi arka planda işle ve kuyruğa ekle"""
         if not url or not url.strip():
             return
-        threading.Thread(
-            target=self._add_url_worker,
-            args=(url.strip(), is_playlist, clear_queue, batch_name),
-            daemon=True
-        ).start()
+        self.add_urls_to_queue([url], clear_queue=clear_queue, batch_name=batch_name)
+
+    def add_urls_to_queue(self, urls, clear_queue=False, batch_name=None, on_complete=None):
+        """
+        Birden fazla URL'yi (TXT içe aktarma, çoklu link) sınırlı bir havuzda
+        paralel çözümle. Her URL'nin parçaları çözümlendiği anda kuyruğa eklenir.
+
+        Args:
+            urls: URL listesi
+            clear_queue: Eklemeden önce kuyruğu temizle
+            batch_name: Tüm URL'ler için ortak batch/albüm adı
+            on_complete: Hepsi bitince eklenen parça sayısıyla çağrılır (worker thread'inde)
+        """
+        urls = [u.strip() for u in urls if u and u.strip()]
+        if not urls:
+            if on_complete:
+                on_complete(0)
+            return
+
+        if clear_queue:
+            with self.lock:
+                # Scheduler'daki ve çözümlenip bekleyen parçalar da düşer
+                self._remove_where(lambda i: True)
+                self.journal.clear()
+            self._update_ui()
+
+        pool = self._ensure_ingest_pool()
+        remaining = [len(urls)]
+        added = [0]
+        counter_lock = threading.Lock()
+
+        def done(future):
+            with counter_lock:
+                added[0] += future.result() if not future.exception() else 0
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished and on_complete:
+                on_complete(added[0])
+
+        print(f"\n[QUEUE] {len(urls)} URL alındı ({self.INGEST_WORKERS} paralel)")
+        for url in urls:
+            pool.submit(self._add_url_worker, url, batch_name).add_done_callback(done)
 
-    def _add_url_worker(self, url, is_playlist, clear_queue, batch_name=None):
-        """URL işleme worker thread"""
-        print(f"\n[QUEUE] URL alındı: {url[:60]}...")
+    def _ensure_ingest_pool(self):
+        with self.lock:
+            if self._ingest_pool is None:
+                self._ingest_pool = ThreadPoolExecutor(
+                    max_workers=self.INGEST_WORKERS, thread_name_prefix="downx-ingest"
+                )
+            return self._ingest_pool
+
+    def _add_url_worker(self, url, batch_name=None):
+        """
+        Tek URL'yi çözümle ve parçalarını kuyruğa ekle (ingest worker'ında), eklenen sayıyı döndür.
+        Playlist/albümler sayfa sayfa eklenir: ilk sayfa kuyruğa girdiğinde
+        dispatcher (indirme sürüyorsa) hemen başlayabilir.
+        """
+        print(f"[QUEUE] URL işleniyor: {url[:60]}...")
 
         is_spotify = "spotify.com" in url or "spotify.link" in url
         is_youtube = "youtube.com" in url or "youtu.be" in url
 
-        new_items = []
+        # Her ekleme (playlist, TXT içe aktarma, tekli link) ayrı bir batch
+        batch_id = f"batch:{batch_name}" if batch_name else str(uuid.uuid4())
+        added = 0
 
         try:
             if is_spotify:
-                new_items = self._parse_spotify_url(url)
+                pages = self._iter_spotify_items(url)
             elif is_youtube:
-                new_items = self._parse_youtube_url(url, batch_name=batch_name)
-
-            if not new_items:
-                print(f"[QUEUE] API'den veri alınamadı, ham URL ekleniyor")
-                new_items.append({
-                    "id": str(uuid.uuid4()),
-                    "type": "spotify" if is_spotify else "youtube",
-                    "url": url,
-                    "title": "Bilinmeyen Parça",
-                    "artist": "Bilinmeyen",
-                    "album": "Tekli",
-                    "status": "Beklemede",
-                    "is_playlist": False
-                })
-
-            with self.lock:
-                if clear_queue:
-                    self.queue.clear()
-                    self.selected_indices.clear()
-
-                start_idx = len(self.queue)
-                self.queue.extend(new_items)
-
-                for i in range(start_idx, start_idx + len(new_items)):
-                    self.selected_indices.add(i)
+                pages = self._iter_youtube_items(url, batch_name=batch_name)
+            else:
+                pages = ()
 
-            print(f"[QUEUE] ✓ {len(new_items)} parça eklendi. Toplam kuyruk: {len(self.queue)}")
-            self._update_ui()
+            for page in pages:
+                if page:
+                    self._append_items(page, batch_id)
+                    added += len(page)
 
         except Exception as e:
             print(f"[QUEUE] HATA: {e}")
             import traceback
             traceback.print_exc()
 
-    def _parse_spotify_url(self, url):
-        """Spotify URL'sinden parça listesi çıkar"""
-        items = []
+        if not added:
+            print(f"[QUEUE] API'den veri alınamadı, ham URL ekleniyor")
+            self._append_items([{
+                "id": str(uuid.uuid4()),
+                "type": "spotify" if is_spotify else "youtube",
+                "url": url,
+                "title": "Bilinmeyen Parça",
+                "artist": "Bilinmeyen",
+                "album": "Tekli",
+                "status": "Beklemede",
+                "is_playlist": False
+            }], batch_id)
+            added = 1
+
+        print(f"[QUEUE] ✓ {added} parça eklendi. Toplam kuyruk: {len(self.queue)}")
+        return added
+
+    def _append_items(self, new_items, batch_id):
+        """Parçaları kuyruğa ve journal'a ekle; indirme sürüyorsa hemen dispatcher'a ver"""
+        for item in new_items:
+            item.setdefault("stage", STAGE_QUEUED)
+            item.setdefault("batch_id", batch_id)
+            item.setdefault("priority", PRIORITY_NORMAL)
 
-        if not self.spotify_client or not self.spotify_client.sp:
-            print("[SPOTIFY] Client bağlı değil, ham URL kullanılacak")
-            return items
+        with self.lock:
+            start_idx = len(self.queue)
+            self.queue.extend(new_items)
+            self._by_id.update((i["id"], i) for i in new_items)
+            self.journal.add_items(new_items)
 
-        try:
-            print("[SPOTIFY] API'den veri çekiliyor...")
-            info = self.spotify_client.get_content_info(url)
+            for i in range(start_idx, start_idx + len(new_items)):
+                self.selected_indices.add(i)
 
-            if not info:
-                print("[SPOTIFY] API boş döndü")
-                return items
+            # İndirme sürüyorsa yeni parçalar hemen boş slotlara akar
+            if self.is_downloading and not self.stop_requested:
+                self._enqueue_for_download([i["id"] for i in new_items])
 
-            playlist_name = sanitize_filename(info.get('title', 'Spotify'))
-            tracks = info.get('tracks', [])
+        self._prefetch_covers(new_items)
+        self._update_ui()
 
-            print(f"[SPOTIFY] '{playlist_name}' - {len(tracks)} parça bulundu")
+    def _prefetch_covers(self, items):
+        """Etiketlenecek parçaların kapaklarını arka planda önbelleğe al"""
+        audio = GLOBAL_CONFIG.get("download_mode", "audio") == "audio"
+        urls = [i.get("cover_url") for i in items if i.get("type") == "spotify" or audio]
+        try:
+            import tagger
+            tagger.cover_prefetcher.prefetch(urls)
+        except Exception as e:
+            print(f"[TAGGER] Kapak ön yükleme başlatılamadı: {e}")
 
-            for i, track in enumerate(tracks):
-                track_url = track.get('url', '')
+    def _iter_spotify_items(self, url):
+        """Spotify URL'sinden parçaları API sayfaları geldikçe üret"""
+        if not self.spotify_client or not self.spotify_client.sp:
+            print("[SPOTIFY] Client bağlı değil, ham URL kullanılacak")
+            return
 
-                item = {
-                    "id": str(uuid.uuid4()),
-                    "type": "spotify",
-                    "url": track_url if track_url else url,
-                    "title": sanitize_filename(track.get('title', 'Bilinmeyen')),
-                    "artist": sanitize_filename(track.get('artist', 'Bilinmeyen')),
-                    "album": playlist_name,
-                    "cover_url": track.get('cover_url', ''),
-                    "year": track.get('year', ''),
-                    "track_no": track.get('track_no', i + 1),
-                    "status": "Beklemede",
-                    "is_playlist": len(tracks) > 1
-                }
-                items.append(item)
+        print("[SPOTIFY] API'den veri çekiliyor...")
+        info = self.spotify_client.stream_content_info(url)
 
-        except Exception as e:
-            print(f"[SPOTIFY] Parse hatası: {e}")
+        if not info:
+            print("[SPOTIFY] API boş döndü")
+            return
 
-        return items
+        playlist_name = sanitize_filename(info.get('title', 'Spotify'))
+        is_playlist = info.get('type') != 'track'
+        print(f"[SPOTIFY] '{playlist_name}' - {info.get('total') or '?'} parça")
 
-    def _parse_youtube_url(self, url, batch_name=None):
-        """YouTube URL'sinden video listesi çıkar"""
-        items = []
+        index = 0
+        try:
+            for tracks in info['pages']:
+                items = []
+                for track in tracks:
+                    index += 1
+                    track_url = track.get('url', '')
+                    items.append({
+                        "id": str(uuid.uuid4()),
+                        "type": "spotify",
+                        "url": track_url if track_url else url,
+                        "title": sanitize_filename(track.get('title', 'Bilinmeyen')),
+                        "artist": sanitize_filename(track.get('artist', 'Bilinmeyen')),
+                        "album": playlist_name,
+                        "cover_url": track.get('cover_url', ''),
+                        "year": track.get('year', ''),
+                        "track_no": track.get('track_no', index),
+                        "duration_ms": track.get('duration_ms'),
+                        "isrc": track.get('isrc'),
+                        "status": "Beklemede",
+                        "is_playlist": is_playlist
+                    })
+                yield items
+        except Exception as e:
+            print(f"[SPOTIFY] Parse hatası: {e}")
 
+    def _iter_youtube_items(self, url, batch_name=None):
+        """YouTube URL'sinden videoları (playlist ise sayfa sayfa) üret"""
         # Playlist mi tekli video mu kontrol et
         is_playlist = "list=" in url or "/playlist" in url
 
         if is_playlist and self.youtube_client:
-            # Playlist için youtube_client kullan
+            # Playlist için youtube_client kullan (girişler tembel okunur)
+            added = 0
             try:
                 print("[YOUTUBE] Playlist API'den veri çekiliyor...")
-                tracks = self.youtube_client.get_playlist_tracks_meta(url)
-
-                if tracks:
-                    playlist_name = sanitize_filename(
-                        tracks[0].get('playlist_title', 'YouTube Playlist')
-                    )
+                playlist = self.youtube_client.stream_playlist_tracks(url)
 
-                    print(f"[YOUTUBE] '{playlist_name}' - {len(tracks)} video bulundu")
+                if playlist:
+                    playlist_name = sanitize_filename(playlist.get('title') or 'YouTube Playlist')
+                    print(f"[YOUTUBE] '{playlist_name}' - videolar sayfa sayfa ekleniyor")
 
-                    for t in tracks:
-                        items.append({
+                    for tracks in playlist['pages']:
+                        yield [{
                             "id": str(uuid.uuid4()),
                             "type": "youtube",
                             "url": t.get('url', url),
@@ -177,55 +355,55 @@ class QueueManager:
                             "cover_url": t.get('thumbnail') or t.get('cover_url', ''),
                             "status": "Beklemede",
                             "is_playlist": True
-                        })
-                    return items
+                        } for t in tracks]
+                        added += len(tracks)
             except Exception as e:
                 print(f"[YOUTUBE] Playlist parse hatası: {e}")
+            if added:
+                return
 
-        # Tekli video için yt-dlp ile başlık çek
-        try:
-            import yt_dlp
-
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': True,
-                'skip_download': True,
-            }
+        yield self._parse_youtube_video(url, batch_name)
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+    def _parse_youtube_video(self, url, batch_name=None):
+        """Tekli YouTube videosunu kuyruk öğesine çevir (tek elemanlı liste)"""
+        # Eğer batch_name varsa (TXT'den yüklendiyse) onu kullan
+        album_name = batch_name if batch_name else "Tekli"
 
-                if info:
-                    title = info.get('title', 'YouTube Video')
-                    channel = info.get('uploader', 'YouTube')
-                    thumbnail = info.get('thumbnail', '')
+        # Tekli video için başlık: önce önbellek, yoksa yt-dlp (havuzdaki sıcak extractor)
+        try:
+            info = info_cache.get_meta(video_id_from_url(url))
+            if info:
+                print(f"[CACHE] Metadata önbellekten: {info.get('id')}")
+            else:
+                with ytdl_pool.acquire(PROFILE_FLAT) as ydl:
+                    info = ydl.extract_info(url, download=False)
+                # Tekli video tam çıkarılır: formatlar da indirme için saklanır
+                info_cache.put(info)
 
-                    print(f"[YOUTUBE] Tekli video: {title[:50]}...")
+            if info:
+                title = info.get('title', 'YouTube Video')
+                channel = info.get('uploader', 'YouTube')
+                thumbnail = info.get('thumbnail', '')
 
-                    # Eğer batch_name varsa (TXT'den yüklendiyse) onu kullan
-                    album_name = batch_name if batch_name else "Tekli"
+                print(f"[YOUTUBE] Tekli video: {title[:50]}...")
 
-                    items.append({
-                        "id": str(uuid.uuid4()),
-                        "type": "youtube",
-                        "url": url,
-                        "title": sanitize_filename(title),
-                        "artist": sanitize_filename(channel),
-                        "album": sanitize_filename(album_name),
-                        "cover_url": thumbnail,
-                        "status": "Beklemede",
-                        "is_playlist": bool(batch_name)  # TXT'den geliyorsa True
-                    })
-                    return items
+                return [{
+                    "id": str(uuid.uuid4()),
+                    "type": "youtube",
+                    "url": url,
+                    "title": sanitize_filename(title),
+                    "artist": sanitize_filename(channel),
+                    "album": sanitize_filename(album_name),
+                    "cover_url": thumbnail,
+                    "status": "Beklemede",
+                    "is_playlist": bool(batch_name)  # TXT'den geliyorsa True
+                }]
 
         except Exception as e:
             print(f"[YOUTUBE] Tekli video parse hatası: {e}")
 
         # Fallback: Başlık çekilemezse ham URL ekle
-        album_name = batch_name if batch_name else "Tekli"
-
-        items.append({
+        return [{
             "id": str(uuid.uuid4()),
             "type": "youtube",
             "url": url,
@@ -234,16 +412,14 @@ class QueueManager:
             "album": sanitize_filename(album_name),
             "status": "Beklemede",
             "is_playlist": bool(batch_name)
-        })
-
-        return items
+        }]
 
     # ========================================
     # BÖLÜM 2: İNDİRME KONTROLÜ
     # ========================================
 
     def start_downloads(self):
-        """İndirmeleri başlat"""
+        """İndirmeleri başlat (seçili parçalar dispatcher'a verilir)"""
         if self.is_downloading:
             print("[DOWNLOAD] Zaten indirme yapılıyor")
             return
@@ -252,215 +428,584 @@ class QueueManager:
             GLib.idle_add(self.main_window.status_label.set_text, "⚠️ Parça seçin!")
             return
 
-        self.is_downloading = True
-        self.stop_requested = False
+        with self.lock:
+            item_ids = [
+                self.queue[i]["id"] for i in sorted(self.selected_indices)
+                if i < len(self.queue)
+                and self.queue[i].get("stage") not in (STAGE_DONE, STAGE_SKIPPED)
+            ]
+
+        if not item_ids:
+            print("[DOWNLOAD] İndirilecek parça yok")
+            return
+
+        print(f"\n{'='*70}")
+        print(f"[DOWNLOAD] İndirme başlatıldı: {len(item_ids)} parça ({self.max_slots} eşzamanlı)")
+        print(f"{'='*70}\n")
+
+        with self._dispatch_cond:
+            self.is_downloading = True
+            self.stop_requested = False
+            self.journal.set_meta("interrupted", 1)
+            self._enqueue_for_download(item_ids)
 
-        threading.Thread(target=self._download_worker, daemon=True).start()
+        self._ensure_dispatcher()
+        self._update_ui()
 
     def stop_downloads(self):
-        """İndirmeleri durdur"""
+        """İndirmeleri durdur: bekleyenler kuyruğa döner, çalışan işler iptal edilir"""
         print("[DOWNLOAD] Durdurma isteği alındı")
-        self.stop_requested = True
+        with self._dispatch_cond:
+            self.stop_requested = True
+            self.scheduler.clear()
+            dropped = list(self._ready)
+            self._ready.clear()
+            tokens = list(self._tokens.values())
+            self._dispatch_cond.notify_all()
+
+        # yt-dlp aktarımları sonraki progress hook'ta, ffmpeg süreçleri hemen kesilir
+        for token in tokens:
+            token.cancel()
+
+        # Çözümlenip indirmeyi bekleyenler kuyruğa geri döner
+        for item in dropped:
+            self._finish_item(item, STAGE_QUEUED, "Beklemede")
+
+    def download_next(self, item_id):
+        """Parçayı 'sıradaki indir' olarak işaretle"""
+        return self.set_priority(item_id, PRIORITY_NEXT)
+
+    def set_priority(self, item_id, priority):
+        """Parçanın önceliğini değiştir (yüksek olan önce iner)"""
+        with self._dispatch_cond:
+            item = self._get_item_by_id(item_id)
+            if not item:
+                return False
+            item["priority"] = priority
+            self.journal.update_item(item)
+            self.scheduler.reprioritize(item_id, priority, item.get("batch_id"))
+            self._dispatch_cond.notify_all()
+        print(f"[QUEUE] Öncelik {priority}: {item.get('title', '?')}")
+        return True
+
+    def remove_item(self, item_id):
+        """Öğeyi kuyruktan (ve journal'dan) kaldır"""
+        with self.lock:
+            self._remove_where(lambda i: i.get("id") == item_id)
 
-    def _download_worker(self):
-        """Ana indirme worker thread"""
-        print(f"\n{'='*70}")
-        print(f"[DOWNLOAD] İndirme başlatıldı")
-        print(f"{'='*70}\n")
+    def clear_finished(self):
+        """Tamamlanan/atlanan/hatalı öğeleri temizle, kaldırılan sayıyı döndür"""
+        with self.lock:
+            return self._remove_where(
+                lambda i: i.get("status") in ["Tamamlandı", "Atlandı (Mevcut)"]
+                or "Hata" in i.get("status", "")
+                or i.get("stage") == STAGE_UNAVAILABLE
+            )
+
+    def _remove_where(self, predicate):
+        """predicate'i sağlayan öğeleri sil, seçim indekslerini yeniden eşle (lock altında çağrılır)"""
+        selected_ids = {self.queue[i].get("id") for i in self.selected_indices if i < len(self.queue)}
+        removed = [i for i in self.queue if predicate(i)]
+        if not removed:
+            return 0
+
+        self.queue = [i for i in self.queue if not predicate(i)]
+        for i in removed:
+            self._by_id.pop(i.get("id"), None)
+        removed_ids = {i.get("id") for i in removed}
+        self.selected_indices = {
+            idx for idx, i in enumerate(self.queue) if i.get("id") in selected_ids
+        }
+        # Çözümlenmiş, slot bekleyen parçalar indirilmez: pipeline'dan burada çıkar
+        dropped = [i for i in self._ready if i.get("id") in removed_ids]
+        if dropped:
+            self._ready = deque(i for i in self._ready if i.get("id") not in removed_ids)
+            self._inflight -= len(dropped)
+            self._dispatch_cond.notify_all()
+
+        for i in removed:
+            self.scheduler.discard(i.get("id"))
+            token = self._tokens.get(i.get("id"))
+            if token:
+                # Çalışan iş: yarım dosyaları iş bitince _finish_item siler
+                token.cancel()
+            else:
+                staging.discard(i.get("id"))
+        self.journal.remove_items([i.get("id") for i in removed])
+        return len(removed)
 
+    def shutdown(self):
+        """Uygulama kapanırken journal'ı kapat (yarım oturum bayrağı korunur)"""
         try:
-            max_concurrent = GLOBAL_CONFIG.get("max_concurrent_downloads", 3)
+            self.journal.close()
+        except Exception as e:
+            print(f"[QUEUE] Journal kapatma hatası: {e}")
+        ytdl_pool.close()
+
+    # --- DISPATCHER / PIPELINE ---
+    #
+    # Her parça dört aşamadan geçer, her aşamanın kendi havuzu vardır:
+    #   çözümleme (ağ, hafif) -> indirme (ağ, adaptif slot)
+    #   -> dönüştürme (CPU, çekirdek sayısı kadar) -> etiketleme
+    # Aşamalar arası kuyruklar sınırlıdır: her şeridin çözümlenmiş parça
+    # tamponu o şeridin slot sayısının iki katını, dönüştürme birikimi çekirdek
+    # sayısının iki katını geçemez (geri basınç). Böylece ağ ve CPU aynı anda
+    # dolu çalışır. Tampondan slota öncelik sırasıyla çıkılır; "sıradaki indir"
+    # parçaları tampon sınırını beklemeden çözümlenir.
+
+    @property
+    def max_slots(self):
+        """Şu anki aktif slot limiti (adaptif denetleyiciden)"""
+        return self.concurrency.limit
+
+    def _enqueue_for_download(self, item_ids):
+        """Parçaları scheduler'a ekle ve dispatcher'ı uyandır"""
+        video_ids = []
+        with self._dispatch_cond:
+            for item_id in item_ids:
+                item = self._get_item_by_id(item_id)
+                if not item:
+                    continue
+                self.scheduler.push(
+                    item_id, item.get("batch_id"), self._lane_for(item),
+                    item.get("priority", PRIORITY_NORMAL)
+                )
+                video_ids.append(self._video_id_for(item))
+            self._dispatch_cond.notify_all()
+
+        # Erişilebilirlik yoklaması toplu başlar; çözümleme aşaması sonucu bekler
+        preflight.availability.prefetch(video_ids)
+
+    @staticmethod
+    def _lane_for(item):
+        """Video modundaki YouTube işleri ayrı şeritte koşar"""
+        if item.get("type") == "youtube" and GLOBAL_CONFIG.get("download_mode", "audio") != "audio":
+            return LANE_VIDEO
+        return LANE_AUDIO
+
+    def _lane_has_slot(self, lane):
+        limits = lane_limits(self.max_slots, GLOBAL_CONFIG.get("video_lane_slots"))
+        return self._active_lanes[lane] < limits[lane]
+
+    def _lane_has_room(self, lane):
+        """Şeridin çözümlenen + hazır parça tamponunda yer var mı (lock altında)"""
+        limits = lane_limits(self.max_slots, GLOBAL_CONFIG.get("video_lane_slots"))
+        buffered = self._resolving_lanes[lane] + sum(1 for i in self._ready if i["_lane"] == lane)
+        return buffered < limits[lane] * 2
+
+    def _ensure_dispatcher(self):
+        """Uzun ömürlü dispatcher thread'ini ve aşama havuzlarını (bir kez) başlat"""
+        with self._dispatch_cond:
+            if self._dispatcher and self._dispatcher.is_alive():
+                return
+            cpu_workers = os.cpu_count() or 2
+            self._resolve_pool = ThreadPoolExecutor(
+                max_workers=self.RESOLVE_WORKERS, thread_name_prefix="downx-resolve"
+            )
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.concurrency.maximum, thread_name_prefix="downx-dl"
+            )
+            self._transcode_pool = ThreadPoolExecutor(
+                max_workers=cpu_workers, thread_name_prefix="downx-ffmpeg"
+            )
+            self._tag_pool = ThreadPoolExecutor(
+                max_workers=self.TAG_WORKERS, thread_name_prefix="downx-tag"
+            )
+            self._transcode_backlog = threading.BoundedSemaphore(cpu_workers * 2)
+            self._tag_backlog = threading.BoundedSemaphore(self.TAG_WORKERS * 4)
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop, name="downx-dispatcher", daemon=True
+            )
+            self._dispatcher.start()
+
+    def _feed_resolvers(self):
+        """
+        Scheduler'dan sıradaki parçaları çözümleme havuzuna ver (lock altında çağrılır).
+        Tampon sınırı şerit başınadır: video tamponu dolu olsa da ses parçaları
+        çözümlenir. "Sıradaki indir" parçaları tampon sınırını beklemez.
+        """
+        while self._resolving < self.RESOLVE_WORKERS:
+            item_id = self.scheduler.pop(lambda lane: True, min_priority=PRIORITY_NEXT)
+            if item_id is None:
+                item_id = self.scheduler.pop(self._lane_has_room)
+            if item_id is None:
+                return
+            item = self._get_item_by_id(item_id)
+            if not item or item.get("stage") in (STAGE_DONE, STAGE_SKIPPED):
+                continue
+            # Şerit parçayla taşınır ("_" ile başladığı için journal'a yazılmaz)
+            lane = item["_lane"] = self._lane_for(item)
+            self._inflight += 1
+            self._resolving += 1
+            self._resolving_lanes[lane] += 1
+            self._resolve_pool.submit(self._run_resolve, item)
+
+    def _next_ready_item(self):
+        """
+        Çözümlenmiş tampondan, şeridinde boş slot olan en yüksek öncelikli
+        parçayı al (eşit öncelikte çözümlenme sırası korunur, lock altında).
+        Öncelik tampondayken değişse de bu seçimde geçerli olur.
+        """
+        if self._active >= self.max_slots:
+            return None
+        best = None
+        for item in self._ready:
+            if not self._lane_has_slot(item["_lane"]):
+                continue
+            if best is None or item.get("priority", PRIORITY_NORMAL) > best.get("priority", PRIORITY_NORMAL):
+                best = item
+        if best is not None:
+            self._ready.remove(best)
+        return best
+
+    def _dispatch_loop(self):
+        """Slot boşaldıkça sıradaki hazır parçayı indirme havuzuna verir"""
+        while True:
+            with self._dispatch_cond:
+                item = None
+                while item is None:
+                    if self.is_downloading and self.concurrency.maybe_adjust(self._active):
+                        self._update_ui()
+
+                    if not self.stop_requested:
+                        self._feed_resolvers()
+                        item = self._next_ready_item()
+                        if item:
+                            break
+
+                    if self.is_downloading and self._inflight == 0 and (
+                        self.stop_requested or not len(self.scheduler)
+                    ):
+                        self._finish_session()
+
+                    # Zaman aşımı: slot denetleyicisi boşta da değerlendirme yapabilsin
+                    self._dispatch_cond.wait(timeout=self.concurrency.interval)
+
+                lane = item["_lane"]
+                self._active += 1
+                self._active_lanes[lane] += 1
 
-            with self.lock:
-                selected_items = [
-                    self.queue[i] for i in sorted(self.selected_indices)
-                    if i < len(self.queue)
-                ]
+            try:
+                self._executor.submit(self._run_slot, item, lane)
+            except Exception as e:
+                print(f"[DOWNLOAD] İş gönderilemedi: {e}")
+                self._release_slot(lane)
+                self._finish_item(item, STAGE_FAILED, "Hata")
 
-            if not selected_items:
-                print("[DOWNLOAD] İndirilecek parça yok")
-                return
+    def _release_slot(self, lane):
+        with self._dispatch_cond:
+            self._active -= 1
+            self._active_lanes[lane] -= 1
+            self._dispatch_cond.notify_all()
 
-            print(f"[DOWNLOAD] {len(selected_items)} parça indirilecek ({max_concurrent} eşzamanlı)")
-
-            with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
-                futures = {
-                    executor.submit(self._download_single_item, item): item
-                    for item in selected_items
-                }
-
-                for future in as_completed(futures):
-                    if self.stop_requested:
-                        print("[DOWNLOAD] Kullanıcı tarafından durduruldu")
-                        executor.shutdown(wait=False, cancel_futures=True)
-                        break
-
-                    item = futures[future]
-                    try:
-                        success = future.result(timeout=300)
-                        if success:
-                            print(f"[DOWNLOAD] ✓ {item.get('title', '?')}")
-                        else:
-                            print(f"[DOWNLOAD] ✗ {item.get('title', '?')}")
-                    except Exception as e:
-                        print(f"[DOWNLOAD] Exception: {item.get('title', '?')} - {e}")
-
-            print(f"\n{'='*70}")
-            print(f"[DOWNLOAD] İndirme tamamlandı")
-            print(f"{'='*70}\n")
+    def _handoff(self, backlog, pool, fn, *args):
+        """Sonraki aşamaya devret; birikim doluysa bekle (geri basınç)"""
+        backlog.acquire()
 
-        except Exception as e:
-            print(f"[DOWNLOAD] Kritik hata: {e}")
-            import traceback
-            traceback.print_exc()
+        def run():
+            try:
+                fn(*args)
+            finally:
+                backlog.release()
+
+        pool.submit(run)
+
+    def _finish_item(self, item, stage, status):
+        """Parça pipeline'dan çıktı (tamamlandı / atlandı / hata / durduruldu)"""
+        self._set_stage(item, stage, status)
+        with self._dispatch_cond:
+            self._tokens.pop(item.get("id"), None)
+            self._inflight -= 1
+            removed = self._by_id.get(item.get("id")) is not item
+            self._dispatch_cond.notify_all()
+
+        # Yarım dosyalar sadece parça bittiğinde veya kuyruktan çıkarıldığında silinir
+        if stage in (STAGE_DONE, STAGE_SKIPPED) or removed:
+            staging.discard(item.get("id"))
+        self._update_ui()
 
-        finally:
-            self.is_downloading = False
-            self._update_ui()
+    def _finish_session(self):
+        """Tüm parçalar bitti veya durduruldu (lock altında çağrılır)"""
+        self.is_downloading = False
+        self.journal.set_meta("interrupted", 0)
 
-    def _download_single_item(self, item):
-        """Tek item indir (Spotify veya YouTube)"""
+        print(f"\n{'='*70}")
         if self.stop_requested:
-            return False
+            print(f"[DOWNLOAD] Kullanıcı tarafından durduruldu")
+        else:
+            print(f"[DOWNLOAD] İndirme tamamlandı")
+        print(f"{'='*70}\n")
+
+        self._update_ui()
+
+    # --- AŞAMA 1: ÇÖZÜMLEME ---
 
+    def _run_resolve(self, item):
+        """Mevcut dosya kontrolü + (Spotify için) YouTube eşleşmesini bul"""
+        ready = False
         try:
-            # Dosya kontrolü
+            if self.stop_requested:
+                self._finish_item(item, STAGE_QUEUED, "Beklemede")
+                return
+
             skip_existing = GLOBAL_CONFIG.get("skip_existing", True)
             if skip_existing and self._check_file_exists(item):
                 print(f"[SKIP] Mevcut: {item.get('title')}")
-                item["status"] = "Atlandı (Mevcut)"
-                self._update_ui()
-                return True
+                self._finish_item(item, STAGE_SKIPPED, "Atlandı (Mevcut)")
+                return
 
-            # İndirme
-            item_type = item.get("type", "youtube")
+            if item.get("type") == "spotify" and not item.get("video_url"):
+                error = self._match_spotify_item(item)
+                if error:
+                    self._finish_item(item, STAGE_FAILED, error)
+                    return
+
+            # Pre-flight: erişilemez videolar indirme slotu almaz
+            reason = self._preflight(item)
+            if reason and item.get("type") == "spotify":
+                # Kayıtlı eşleşme artık erişilemez: bir kez yeniden ara
+                self._forget_match(item)
+                error = self._match_spotify_item(item)
+                if error:
+                    self._finish_item(item, STAGE_FAILED, error)
+                    return
+                reason = self._preflight(item)
+            if reason:
+                print(f"[PREFLIGHT] ✗ {item.get('title')}: {preflight.status_text(reason)}")
+                self._finish_item(item, STAGE_UNAVAILABLE, preflight.status_text(reason))
+                return
 
-            if item_type == "spotify":
-                return self._download_spotify_track(item)
-            else:
-                return self._download_youtube_track(item)
+            ready = True
 
         except Exception as e:
-            print(f"[DOWNLOAD] Hata: {item.get('title')} - {e}")
-            item["status"] = "Hata"
-            self._update_ui()
-            return False
+            print(f"[RESOLVE] Hata: {item.get('title')} - {e}")
+            self._finish_item(item, STAGE_FAILED, "Hata")
 
-    # ========================================
-    # BÖLÜM 3: SPOTIFY İNDİRME (yt-dlp + YouTube Music)
-    # ========================================
+        finally:
+            dropped = False
+            with self._dispatch_cond:
+                self._resolving -= 1
+                self._resolving_lanes[item["_lane"]] -= 1
+                if ready:
+                    # Durduruldu ya da çözümlenirken kuyruktan çıkarıldı
+                    if self.stop_requested or self._by_id.get(item.get("id")) is not item:
+                        dropped = True
+                    else:
+                        self._ready.append(item)
+                self._dispatch_cond.notify_all()
+            if dropped:
+                self._finish_item(item, STAGE_QUEUED, "Beklemede")
+
+    def _match_spotify_item(self, item):
+        """Spotify parçasını eşleştir; başarısızsa durum metnini döndür"""
+        self._set_stage(item, STAGE_RESOLVING, "Aranıyor...")
+        self._update_ui()
+        video_url, entry, score = self._resolve_spotify_track(item)
+        if not video_url:
+            return "Hata: Bulunamadı" if score is None else "Hata: Eşleşme zayıf"
+        item["match_score"] = round(score, 2) if score is not None else None
+        # Çözümlenen eşleşme journal'a yazılır: yeniden başlatmada arama yok.
+        # Arama girişi parçayla taşınır ("_" ile başladığı için journal'a yazılmaz)
+        item["video_url"] = video_url
+        item["_info"] = entry
+        self.journal.update_item(item)
+        return None
 
-    def _download_spotify_track(self, item):
-        """Spotify şarkısını yt-dlp ile indir (YouTube Music arama)"""
+    @staticmethod
+    def _video_id_for(item):
+        """Parçanın indirilecek YouTube videosunun ID'si (henüz eşleşmemişse None)"""
+        if item.get("type") == "spotify":
+            return video_id_from_url(item.get("video_url"))
+        return video_id_from_url(item.get("url"))
+
+    def _preflight(self, item):
+        """Video erişilemezse nedenini döndür (flat metadata + toplu oEmbed yoklaması)"""
+        video_id = self._video_id_for(item)
+        if not video_id:
+            return None
+        entry = item.get("_info") or info_cache.get_meta(video_id)
+        return preflight.availability.check(video_id, entry)
+
+    def _resolve_spotify_track(self, item):
+        """
+        Spotify parçası için YouTube videosu bul.
+        Tek flat aramanın ilk N sonucu süre/başlık/sanatçı/ISRC ile puanlanır;
+        güven eşiğinin altındaki eşleşme reddedilir (hiç byte indirilmez).
+        Daha önce eşleşmiş parçalarda arama yapılmaz (giriş None döner).
+
+        Returns:
+            tuple: (video URL'si veya None, flat arama girişi, puan veya None)
+        """
+        track_id = spotify_track_id(item.get("url"))
+        match = spotify_cache.get_match(track_id)
+        if match:
+            print(f"[SPOTIFY→YT] ✓ Kayıtlı eşleşme: {item.get('title')} → {match['video_id']}")
+            return f"https://www.youtube.com/watch?v={match['video_id']}", None, match['score']
+
+        search_query = f"{item.get('artist', 'Unknown')} - {item.get('title', 'Unknown')}"
+        print(f"[SPOTIFY→YT] Aranıyor: {search_query}")
+
+        job_opts = {'logger': YtdlThrottleLogger(self.concurrency)}
+
+        candidates = GLOBAL_CONFIG.get("match_candidates", 5)
+        with ytdl_pool.acquire(PROFILE_FLAT, job_opts) as ydl:
+            info = ydl.extract_info(f"ytsearch{candidates}:{search_query}", download=False)
+
+        if not info or not info.get('entries'):
+            print(f"[SPOTIFY→YT] ✗ Bulunamadı: {item.get('title')}")
+            return None, None, None
+
+        entries = list(info['entries'])
+        info_cache.put_flat(entries)
+        # Flat metadata'dan erişilemez olduğu belli adaylar puanlanmaz
+        entries = [e for e in entries if e and not preflight.classify_entry(e)]
+
+        video, score = matcher.best_match(
+            item, entries, GLOBAL_CONFIG.get("match_min_confidence", 0.55)
+        )
+        if not video:
+            print(f"[SPOTIFY→YT] ✗ Güvenilir eşleşme yok ({score:.2f}): {item.get('title')}")
+            return None, None, score
+
+        video_url = video.get('url') or f"https://www.youtube.com/watch?v={video.get('id')}"
+        spotify_cache.put_match(track_id, video.get('id'), score)
+        print(f"[SPOTIFY→YT] ✓ Bulundu ({score:.2f}): {video.get('title', 'Unknown')}")
+        return video_url, video, score
+
+    # --- AŞAMA 2: İNDİRME (ağ slotu) ---
+
+    def _run_slot(self, item, lane):
+        """İndirme slot'unda parçayı indir, ham dosyayı dönüştürme aşamasına devret"""
+        token = CancelToken()
+        with self._dispatch_cond:
+            self._tokens[item.get("id")] = token
         try:
-            import yt_dlp
+            if self.stop_requested:
+                self._finish_item(item, STAGE_QUEUED, "Beklemede")
+                return
+
+            result = self._download_item(item, token)
 
-            # 1. URL ve Metadata
+            if result.cancelled:
+                self._finish_item(item, STAGE_QUEUED, "Beklemede")
+                return
+
+            if not result.success:
+                print(f"[DOWNLOAD] ✗ {item.get('title', '?')} - {result.message}")
+                if result.unavailable:
+                    if item.get("type") == "spotify":
+                        self._forget_match(item)
+                    self._finish_item(item, STAGE_UNAVAILABLE, result.message)
+                    return
+                self._finish_item(item, STAGE_FAILED, "Hata")
+                return
+
+            # Dönüştürme birikimi doluysa burada bekler (slot bırakılmadan)
+            self._handoff(self._transcode_backlog, self._transcode_pool,
+                          self._run_transcode, item, result, token)
+
+        except Exception as e:
+            print(f"[DOWNLOAD] Exception: {item.get('title', '?')} - {e}")
+            self._finish_item(item, STAGE_FAILED, "Hata")
+        finally:
+            self.concurrency.job_finished(item.get("id"))
+            self._release_slot(lane)
+
+    def _forget_match(self, item):
+        """Eşleşen video kullanılamaz: kayıtlı eşleşmeyi sil, sonraki denemede yeniden ara"""
+        video_id = video_id_from_url(item.get("video_url"))
+        if video_id:
+            spotify_cache.invalidate_video(video_id)
+        item.pop("video_url", None)
+        item.pop("_info", None)
+        self.journal.update_item(item)
+        print(f"[SPOTIFY→YT] Eşleşme geçersiz, yeniden aranacak: {item.get('title')}")
+
+    def _download_item(self, item, token=None):
+        """Downloader işini bu slot thread'inde çalıştır"""
+        from downloader import Downloader
+
+        self._set_stage(item, STAGE_DOWNLOADING, "İndiriliyor...")
+        self._update_ui()
+
+        def on_progress(pct, msg):
+            item["status"] = f"%{int(pct)}"
+
+        if item.get("type") == "spotify":
+            # Spotify: her zaman ses, albüm klasörü, "Sanatçı - Başlık" adı
+            url = item.get("video_url")
+            safe_album = sanitize_filename(item.get("album", "Tekli"))
+            job = Downloader(
+                url, item, on_progress, throughput_monitor=self.concurrency,
+                mode="audio",
+                target_directory=os.path.join(get_download_dir(), safe_album),
+                output_name=f"{sanitize_filename(item.get('artist'))} - {sanitize_filename(item.get('title'))}",
+                cancel_token=token,
+                staging_directory=staging.item_staging_dir(item["id"]),
+                info=item.get("_info"),
+            )
+        else:
             url = item.get("url", "")
-            if not url:
-                print(f"[SPOTIFY→YT] URL yok!")
-                GLib.idle_add(self._handle_worker_finish, False, "URL Yok", item["id"])
-                return False
+            job = Downloader(url, item, on_progress, throughput_monitor=self.concurrency,
+                             cancel_token=token,
+                             staging_directory=staging.item_staging_dir(item["id"]),
+                             info=item.get("_info"))
 
-            artist = item.get("artist", "Unknown")
-            title = item.get("title", "Unknown")
-            album = item.get("album", "Tekli")
-
-            # 2. Target Dizin (Album ismi ile)
-            safe_album = sanitize_filename(album)
-            download_dir = get_download_dir()
-            target_dir = os.path.join(download_dir, safe_album)
-            os.makedirs(target_dir, exist_ok=True)
-
-            # 3. Ayarları Oku
-            audio_format = GLOBAL_CONFIG.get("audio_format", "m4a")
-            if audio_format == "aac":
-                audio_format = "m4a"
-
-            config_quality = GLOBAL_CONFIG.get("audio_quality", "192")
-            if config_quality is None:
-                config_quality = "192"
-            config_quality = str(config_quality).replace("k", "")
-
-            # 4. YouTube Music'te Ara
-            search_query = f"{artist} - {title}"
-            print(f"[SPOTIFY→YT] Aranıyor: {search_query}")
-
-            # 5. Output Template
-            safe_artist = sanitize_filename(artist)
-            safe_title = sanitize_filename(title)
-            output_template = os.path.join(target_dir, f"{safe_artist} - {safe_title}.%(ext)s")
-
-            print(f"[SPOTIFY→YT] Format: {audio_format}, Bitrate: {config_quality}K")
-            print(f"[SPOTIFY→YT] Output: {target_dir}")
-
-            # 6. yt-dlp Ayarları
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'outtmpl': output_template,
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': audio_format,
-                    'preferredquality': config_quality,
-                }],
-                'default_search': 'ytsearch',
-                'noplaylist': True,
-                'quiet': False,
-                'no_warnings': False,
-            }
+        if not url:
+            from downloader import DownloadResult
+            return DownloadResult(False, "URL yok")
 
-            # 7. YouTube Music'te Ara ve İndir
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Önce ara
-                info = ydl.extract_info(f"ytsearch:{search_query}", download=False)
-
-                if not info or 'entries' not in info or not info['entries']:
-                    print(f"[SPOTIFY→YT] ✗ Bulunamadı: {title}")
-                    GLib.idle_add(self._handle_worker_finish, False, "Bulunamadı", item["id"])
-                    return False
-
-                # İlk sonucu al
-                video = info['entries'][0]
-                video_url = video['webpage_url']
-                video_title = video.get('title', 'Unknown')
-
-                print(f"[SPOTIFY→YT] ✓ Bulundu: {video_title}")
-                GLib.idle_add(self._update_queue_progress, item["id"], 30.0, "Bulundu...")
-
-                # İndir
-                GLib.idle_add(self._update_queue_progress, item["id"], 50.0, "İndiriliyor...")
-                ydl.download([video_url])
-
-            # 8. İndirilen Dosyayı Bul
-            downloaded_file = None
-            possible_extensions = [audio_format, 'webm', 'opus', 'm4a', 'mp3']
-
-            for ext in possible_extensions:
-                test_path = output_template.replace('.%(ext)s', f'.{ext}')
-                if os.path.exists(test_path):
-                    downloaded_file = test_path
-                    break
-
-            if not downloaded_file:
-                print(f"[SPOTIFY→YT] ✗ Dosya bulunamadı")
-                GLib.idle_add(self._handle_worker_finish, False, "Dosya Yok", item["id"])
-                return False
+        print(f"[YTDLP] İndiriliyor: {item.get('title')}")
+        # İş bu pool worker'ında doğrudan çalışır (ek thread yok)
+        return job()
+
+    # --- AŞAMA 3: DÖNÜŞTÜRME (CPU havuzu) ---
+
+    def _run_transcode(self, item, result, token=None):
+        """ffmpeg ile hedef formata çevir, ses ise etiketleme aşamasına devret"""
+        try:
+            self._set_stage(item, STAGE_TRANSCODING, "Dönüştürülüyor...")
+            self._update_ui()
 
-            print(f"[SPOTIFY→YT] ✓ Tamamlandı: {title}")
+            final_path = transcoder.transcode(
+                result.file_path, result.output_base, result.mode, cancel_token=token
+            )
+            print(f"[FFMPEG] ✓ {os.path.basename(final_path)}")
 
-            # 9. TAGGER.PY ÇAĞIR!
-            GLib.idle_add(self._update_queue_progress, item["id"], 95.0, "Tag yazılıyor...")
-            self._run_tagger(downloaded_file, item)
+            if result.mode == "audio":
+                # Dosya son halinde: etiketleme iptal edilmez (kısa sürer)
+                self._handoff(self._tag_backlog, self._tag_pool, self._run_tag, item, final_path)
+            else:
+                library_index.add_file(final_path)
+                self._finish_item(item, STAGE_DONE, "Tamamlandı")
 
-            GLib.idle_add(self._handle_worker_finish, True, "Tamamlandı", item["id"])
-            return True
+        except JobCancelled:
+            # Ham dosya staging'de kalır: sonraki başlatmada yeniden indirilmez
+            print(f"[FFMPEG] İptal: {item.get('title', '?')}")
+            self._finish_item(item, STAGE_QUEUED, "Beklemede")
 
         except Exception as e:
-            print(f"[SPOTIFY→YT] Kritik Hata: {e}")
-            import traceback
-            traceback.print_exc()
-            GLib.idle_add(self._handle_worker_finish, False, "Hata", item["id"])
-            return False
+            print(f"[FFMPEG] Hata: {item.get('title', '?')} - {e}")
+            self._finish_item(item, STAGE_FAILED, "Hata: Dönüştürme")
+
+    # --- AŞAMA 4: ETİKETLEME ---
+
+    def _run_tag(self, item, file_path):
+        """Etiket ve kapak yaz, parçayı tamamla"""
+        try:
+            self._set_stage(item, STAGE_TAGGING, "Etiketleniyor...")
+            self._update_ui()
+            self._run_tagger(file_path, item)
+            library_index.add_file(file_path)
+            print(f"[DOWNLOAD] ✓ {item.get('title', '?')}")
+            self._finish_item(item, STAGE_DONE, "Tamamlandı")
+        except Exception as e:
+            print(f"[TAGGER] Hata: {item.get('title', '?')} - {e}")
+            self._finish_item(item, STAGE_FAILED, "Hata: Etiket")
+
+    # ========================================
+    # BÖLÜM 3: ETİKETLEME (tagger.py)
+    # ========================================
 
     def _run_tagger(self, file_path, item):
         """Tagger.py çalıştır - TÜM METADATA ile"""
@@ -502,53 +1047,7 @@ class QueueManager:
             traceback.print_exc()
 
     # ========================================
-    # BÖLÜM 4: YOUTUBE İNDİRME
-    # ========================================
-
-    def _download_youtube_track(self, item):
-        """Tek bir YouTube videosunu indir"""
-        try:
-            item["status"] = "İndiriliyor..."
-            self._update_ui()
-
-            from downloader import Downloader
-
-            url = item.get("url", "")
-            if not url:
-                item["status"] = "Hata: URL yok"
-                return False
-
-            print(f"[YTDLP] İndiriliyor: {item.get('title')}")
-
-            done = threading.Event()
-            result = {"success": False}
-
-            def on_progress(pct, msg):
-                item["status"] = f"%{int(pct)}"
-
-            def on_done(success, msg):
-                result["success"] = success
-                done.set()
-
-            dl = Downloader(url, item, on_progress, on_done)
-            dl.start()
-
-            done.wait(timeout=300)
-
-            if result["success"]:
-                print(f"[YTDLP] ✓ OK: {item.get('title')}")
-            else:
-                print(f"[YTDLP] ✗ Hata: {item.get('title')}")
-
-            return result["success"]
-
-        except Exception as e:
-            print(f"[YTDLP] Exception: {e}")
-            item["status"] = "Hata"
-            return False
-
-    # ========================================
-    # BÖLÜM 5: YARDIMCI METOTLAR
+    # BÖLÜM 4: YARDIMCI METOTLAR
     # ========================================
 
     def _check_file_exists(self, item):
@@ -562,50 +1061,34 @@ class QueueManager:
             if not artist or artist in ["Bilinmeyen", "Unknown"]:
                 return False
 
-            download_dir = get_download_dir()
+            # İndeks ilk çağrıda bir kez kurulur, sonra FileMonitor ile güncel kalır
+            library_index.ensure_built(get_download_dir())
 
-            search_name = f"{artist} - {title}"
-
-            for root, dirs, files in os.walk(download_dir):
-                for f in files:
-                    ext = os.path.splitext(f)[1].lower()
-                    if ext not in ['.mp3', '.m4a', '.opus', '.flac', '.wav', '.ogg']:
-                        continue
-
-                    fname = os.path.splitext(f)[0].lower()
-                    if title.lower() in fname and artist.lower() in fname:
-                        full_path = os.path.join(root, f)
-                        print(f"[CHECK] Mevcut bulundu: {full_path}")
-                        return True
+            full_path = library_index.find(artist, title)
+            if full_path:
+                print(f"[CHECK] Mevcut bulundu: {full_path}")
+                return True
 
             return False
         except Exception as e:
             print(f"[CHECK] Hata: {e}")
             return False
 
+    def _set_stage(self, item, stage, status):
+        """Öğenin aşamasını ve durum metnini güncelle, journal'a yaz"""
+        item["stage"] = stage
+        item["status"] = status
+        try:
+            self.journal.set_stage(item["id"], stage, status)
+        except Exception as e:
+            print(f"[QUEUE] Journal yazma hatası: {e}")
+
     def _get_item_by_id(self, item_id):
-        """ID ile item bul"""
+        """ID ile item bul (O(1), _by_id indeksinden)"""
         with self.lock:
-            for item in self.queue:
-                if item.get("id") == item_id:
-                    return item
-        return None
+            return self._by_id.get(item_id)
 
     def _update_ui(self):
         """UI güncelle"""
         if hasattr(self.main_window, 'downloads_tab'):
             GLib.idle_add(self.main_window.downloads_tab.update_downloads_page_content)
-
-    def _update_queue_progress(self, item_id, percent, message):
-        """Progress güncelle"""
-        item = self._get_item_by_id(item_id)
-        if item:
-            item["status"] = message
-        self._update_ui()
-
-    def _handle_worker_finish(self, success, message, item_id):
-        """İndirme bittiğinde"""
-        item = self._get_item_by_id(item_id)
-        if item:
-            item["status"] = "Tamamlandı" if success else "Hata"
-        self._update_ui()
@@ -0,0 +1,115 @@
+"""
+4KTube Free - Download Scheduler
+QueueManager dispatch döngüsü için sıralama politikası:
+- Öğe başına öncelik ("sıradaki indir" en yüksek öncelik)
+- Aynı öncelikteki batch'ler (playlist / TXT) arasında round-robin
+- Şerit (lane) limitleri: uzun video işleri tüm slotları kaplayamaz
+"""
+
+from collections import OrderedDict, deque
+
+LANE_AUDIO = "audio"
+LANE_VIDEO = "video"
+
+PRIORITY_NORMAL = 0
+PRIORITY_NEXT = 100  # "Sıradaki indir"
+
+
+def lane_limits(total_slots, video_slots=None):
+    """
+    Şerit başına en fazla slot sayısı.
+    Birden fazla slot varsa en az biri her zaman ses işlerine ayrılır.
+    """
+    if video_slots is None:
+        video_slots = total_slots - 1 if total_slots > 1 else 1
+    video_slots = max(1, min(int(video_slots), total_slots))
+    return {LANE_AUDIO: total_slots, LANE_VIDEO: video_slots}
+
+
+class DownloadScheduler:
+    """
+    Bekleyen öğe id'lerini öncelik -> (batch, lane) -> FIFO yapısında tutar.
+    Thread-safe değildir; QueueManager'ın dispatch lock'u altında kullanılır.
+    """
+
+    def __init__(self):
+        # öncelik -> OrderedDict((batch_id, lane) -> deque[item_id])
+        self._levels = {}
+        self._where = {}  # item_id -> (öncelik, (batch_id, lane))
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, item_id):
+        return item_id in self._where
+
+    def push(self, item_id, batch_id, lane, priority=PRIORITY_NORMAL):
+        """Öğeyi kuyruğa ekle (zaten varsa dokunma)"""
+        if item_id in self._where:
+            return
+        if priority >= PRIORITY_NEXT:
+            # Önce işaretlenen önce iner: tek bir "next" batch'i FIFO
+            batch_id = "__next__"
+        key = (batch_id or item_id, lane)
+        batches = self._levels.setdefault(priority, OrderedDict())
+        batches.setdefault(key, deque()).append(item_id)
+        self._where[item_id] = (priority, key)
+
+    def discard(self, item_id):
+        """Öğeyi kuyruktan çıkar"""
+        where = self._where.pop(item_id, None)
+        if not where:
+            return
+        priority, key = where
+        batches = self._levels.get(priority)
+        if not batches or key not in batches:
+            return
+        try:
+            batches[key].remove(item_id)
+        except ValueError:
+            pass
+        if not batches[key]:
+            del batches[key]
+        if not batches:
+            del self._levels[priority]
+
+    def reprioritize(self, item_id, priority, batch_id=None):
+        """Öğenin önceliğini değiştir (kuyrukta değilse False)"""
+        where = self._where.get(item_id)
+        if not where:
+            return False
+        _, (old_batch, lane) = where
+        self.discard(item_id)
+        self.push(item_id, batch_id or old_batch, lane, priority)
+        return True
+
+    def pop(self, lane_allowed, min_priority=None):
+        """
+        En yüksek öncelikli seviyede, izin verilen şeritlerdeki batch'ler
+        arasında round-robin ile sıradaki öğeyi döndür.
+        lane_allowed: lane -> bool (o şeritte boş slot var mı)
+        min_priority: verilirse sadece bu öncelik ve üstündeki öğeler
+        """
+        for priority in sorted(self._levels, reverse=True):
+            if min_priority is not None and priority < min_priority:
+                break
+            batches = self._levels[priority]
+            for key in list(batches):
+                if not lane_allowed(key[1]):
+                    continue
+                queue = batches[key]
+                item_id = queue.popleft()
+                del self._where[item_id]
+                # Round-robin: servis edilen batch sona taşınır
+                if queue:
+                    batches.move_to_end(key)
+                else:
+                    del batches[key]
+                if not batches:
+                    del self._levels[priority]
+                return item_id
+        return None
+
+    def clear(self):
+        self._levels.clear()
+        self._where.clear()
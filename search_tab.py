@@ -1,6 +1,5 @@
 import gi
 import threading
-import time
 import html
 import os
 
@@ -286,36 +285,34 @@ class SearchTab(Adw.Bin):
         if not path or not os.path.exists(path):
             return
 
-        count = 0
         try:
             with open(path, 'r', encoding='utf-8') as f:
                 lines = f.readlines()
 
+            links = [
+                line.strip() for line in lines
+                if line.strip() and not line.strip().startswith("#") and "http" in line
+            ]
+
+            if not links or not self.main_window.queue_manager:
+                GLib.idle_add(self._show_toast, "⚠️ TXT içinde link bulunamadı")
+                return
+
             GLib.idle_add(lambda: self.stack.set_visible_child_name("loading"))
 
-            # İlk link için kuyruğu temizle, sonrakiler için eklemeye devam et
-            first_link = True
-
-            for line in lines:
-                link = line.strip()
-                if not link or link.startswith("#"):
-                    continue
-
-                if "http" in link:
-                    if self.main_window.queue_manager:
-                        # İlk link: kuyruğu temizle, sonrakiler: ekle
-                        self.main_window.queue_manager.add_url_to_queue(
-                            link,
-                            clear_queue=first_link,
-                            batch_name="TXT Batch"
-                        )
-                        first_link = False
-                        count += 1
-                        time.sleep(0.1)
-
-            print(f"Loaded {count} links from TXT")
-            GLib.idle_add(self._show_toast, f"✅ {count} link kuyruğa eklendi!")
-            GLib.idle_add(lambda: self.stack.set_visible_child_name("empty"))
+            def on_complete(added):
+                print(f"Loaded {len(links)} links from TXT ({added} parça)")
+                GLib.idle_add(self._show_toast, f"✅ {added} parça kuyruğa eklendi!")
+                GLib.idle_add(lambda: self.stack.set_visible_child_name("empty"))
+
+            # Kuyruk bir kez temizlenir; linkler sınırlı havuzda paralel çözümlenir
+            # ve her biri bittiği anda kuyrukta görünür
+            self.main_window.queue_manager.add_urls_to_queue(
+                links,
+                clear_queue=True,
+                batch_name="TXT Batch",
+                on_complete=on_complete
+            )
 
         except Exception as e:
             print(f"TXT error: {e}")
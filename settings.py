@@ -33,7 +33,8 @@ os.makedirs(CACHE_DIR, exist_ok=True)
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
 COOKIES_FILE = os.path.join(CONFIG_DIR, "cookies.txt")
 LOG_FILE = os.path.join(CONFIG_DIR, "app.log")
-TASKS_FILE = os.path.join(CONFIG_DIR, "tasks.json")
+TASKS_FILE = os.path.join(CONFIG_DIR, "tasks.db")  # Kuyruk journal'ı (SQLite, WAL)
+STAGING_DIRNAME = ".4ktube-staging"  # İndirme klasöründe, parça başına yarım dosyalar
 
 # Default configuration
 DEFAULT_CONFIG = {
@@ -44,8 +45,15 @@ DEFAULT_CONFIG = {
     "audio_format": "m4a",
     "video_format": "mp4",
     "video_codec": "h264",
-    "concurrent_downloads": 3,
+    "concurrent_downloads": 3,         # Başlangıç slot sayısı
+    "adaptive_concurrency": True,      # Slot sayısını throughput/429'a göre ayarla
+    "concurrent_downloads_min": 1,
+    "concurrent_downloads_max": 8,
     "skip_existing": True,
+    "partial_max_age_days": 7,         # Bu süreden eski yarım indirmeler silinir
+    "match_candidates": 5,             # Spotify eşleşmesinde puanlanan YouTube sonucu
+    "match_min_confidence": 0.55,      # Bu puanın altındaki eşleşme indirilmez
+    "cover_cache_mb": 64,              # Disk kapak önbelleği bütçesi
     "embed_metadata": True,
     "embed_thumbnail": True,
     "use_sponsorblock": False,
@@ -115,6 +123,14 @@ def get_download_dir():
     return GLOBAL_CONFIG.get("download_dir", DEFAULT_DOWNLOAD_DIR)
 
 
+def get_staging_dir():
+    """
+    Yarım indirmelerin tutulduğu klasör.
+    İndirme klasörüyle aynı dosya sisteminde olması için onun içindedir.
+    """
+    return os.path.join(get_download_dir(), STAGING_DIRNAME)
+
+
 def update_download_dir(new_dir):
     """Update download directory"""
     global GLOBAL_CONFIG
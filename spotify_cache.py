@@ -0,0 +1,145 @@
+"""
+4KTube Free - Spotify Cache
+Ayrıştırılmış playlist/albüm parça listelerini CACHE_DIR altında SQLite'ta tutar.
+
+- Playlist'ler Spotify'ın snapshot_id'si ile doğrulanır: değişmemiş bir
+  playlist yeniden kuyruğa eklendiğinde tek bir ucuz metadata isteği yeter.
+- Albümlerin snapshot'ı yoktur; COLLECTION_TTL boyunca önbellekten gelir.
+- Spotify parça ID'si -> seçilen YouTube video ID'si eşleşmeleri kalıcıdır;
+  video kullanılamaz hale gelince silinir ve parça yeniden aranır.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from settings import CACHE_DIR
+
+SPOTIFY_CACHE_FILE = os.path.join(CACHE_DIR, "spotify.db")
+SPOTIFY_TOKEN_FILE = os.path.join(CACHE_DIR, "spotify_token.json")
+
+COLLECTION_TTL = 30 * 86400  # Snapshot'sız içerikler (albümler) için
+
+SPOTIFY_TRACK_ID = re.compile(r"track[/:]([0-9A-Za-z]{22})")
+
+
+def spotify_track_id(url):
+    """Spotify parça URL'si/URI'sinden parça ID'si (bulunamazsa None)"""
+    if not url:
+        return None
+    match = SPOTIFY_TRACK_ID.search(url)
+    return match.group(1) if match else None
+
+
+class SpotifyCache:
+    """Thread-safe Spotify içerik önbelleği"""
+
+    def __init__(self, path=SPOTIFY_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS collections ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " snapshot_id TEXT,"
+            " header TEXT NOT NULL,"
+            " tracks TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            " track_id TEXT PRIMARY KEY,"
+            " video_id TEXT NOT NULL,"
+            " score REAL,"
+            " matched_at REAL NOT NULL)"
+        )
+
+    def get_collection(self, collection_id, snapshot_id=None):
+        """
+        Önbellekteki (header, tracks) veya None.
+        snapshot_id verilirse sadece eşleşen kayıt döner; verilmezse TTL uygulanır.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT snapshot_id, header, tracks, updated_at FROM collections WHERE id = ?",
+                (collection_id,)
+            ).fetchone()
+        if not row:
+            return None
+
+        cached_snapshot, header, tracks, updated_at = row
+        if snapshot_id is not None:
+            if cached_snapshot != snapshot_id:
+                return None
+        elif time.time() - updated_at > COLLECTION_TTL:
+            return None
+
+        try:
+            return json.loads(header), json.loads(tracks)
+        except ValueError:
+            return None
+
+    def put_collection(self, collection_id, kind, header, tracks, snapshot_id=None):
+        """Tamamı çekilmiş parça listesini kaydet"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO collections"
+                " (id, kind, snapshot_id, header, tracks, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (collection_id, kind, snapshot_id,
+                 json.dumps(header, ensure_ascii=False),
+                 json.dumps(tracks, ensure_ascii=False), time.time())
+            )
+
+    # --- SPOTIFY -> YOUTUBE EŞLEŞMELERİ ---
+
+    def get_match(self, track_id):
+        """Kayıtlı eşleşme: {"video_id", "score", "matched_at"} veya None"""
+        if not track_id:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT video_id, score, matched_at FROM matches WHERE track_id = ?", (track_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"video_id": row[0], "score": row[1], "matched_at": row[2]}
+
+    def put_match(self, track_id, video_id, score=None):
+        if not track_id or not video_id:
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO matches (track_id, video_id, score, matched_at)"
+                " VALUES (?, ?, ?, ?)",
+                (track_id, video_id, score, time.time())
+            )
+
+    def invalidate_video(self, video_id):
+        """Video kullanılamaz: ona işaret eden tüm eşleşmeleri sil"""
+        with self.lock:
+            self.conn.execute("DELETE FROM matches WHERE video_id = ?", (video_id,))
+
+    def clear_collections(self):
+        """
+        Playlist/albüm önbelleğini açık bağlantı üzerinden sil.
+        Spotify -> YouTube eşleşmeleri kalıcıdır, korunur.
+        """
+        with self.lock:
+            self.conn.execute("DELETE FROM collections")
+            self.conn.execute("VACUUM")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# Global cache
+spotify_cache = SpotifyCache()
@@ -1,10 +1,38 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import spotipy
+from spotipy.cache_handler import CacheFileHandler
 from spotipy.oauth2 import SpotifyClientCredentials
 from settings import GLOBAL_CONFIG
+from http_pool import http_pool
+from spotify_cache import spotify_cache, SPOTIFY_TOKEN_FILE
+
+# Sayfa boyutları (API üst sınırları)
+PLAYLIST_PAGE_SIZE = 100
+ALBUM_PAGE_SIZE = 50
+
+# Eşzamanlı sayfa isteği sayısı
+PAGE_WORKERS = 4
+
+# _parse_track_object'in kullandığı alanlar (fields filtresi)
+TRACK_FIELDS = (
+    "name,track_number,duration_ms,external_ids(isrc),"
+    "artists(name),album(name,images,release_date),external_urls"
+)
+PLAYLIST_ITEM_FIELDS = f"items(track({TRACK_FIELDS}))"
+PLAYLIST_META_FIELDS = "name,owner(display_name),snapshot_id,tracks(total)"
+PLAYLIST_FIELDS = f"name,owner(display_name),snapshot_id,tracks(total,{PLAYLIST_ITEM_FIELDS})"
+
 
 class SpotifyClient:
     def __init__(self):
         self.sp = None
+        # Token ve API istekleri uygulamanın ortak bağlantı havuzunu kullanır
+        self.session = http_pool.session
+        self._page_pool = ThreadPoolExecutor(max_workers=PAGE_WORKERS, thread_name_prefix="downx-spotify")
+        # Parça listeleri snapshot_id ile, token diskte saklanır
+        self.cache = spotify_cache
         self._connect()
 
     def _connect(self):
@@ -19,8 +47,12 @@ class SpotifyClient:
             self.sp = spotipy.Spotify(
                 auth_manager=SpotifyClientCredentials(
                     client_id=client_id,
-                    client_secret=client_secret
-                )
+                    client_secret=client_secret,
+                    requests_session=self.session,
+                    # Geçerli token diskten okunur: açılışta token isteği yapılmaz
+                    cache_handler=CacheFileHandler(cache_path=SPOTIFY_TOKEN_FILE)
+                ),
+                requests_session=self.session
             )
             print("✅ [API] Bağlantı Başarılı.")
         except Exception as e:
@@ -28,6 +60,24 @@ class SpotifyClient:
             self.sp = None
 
     def get_content_info(self, url):
+        """Tüm parçaları tek listede döndür (stream_content_info'nun toplanmış hali)"""
+        content = self.stream_content_info(url)
+        if not content:
+            return None
+        try:
+            tracks = [t for page in content.pop("pages") for t in page]
+        except Exception as e:
+            print(f"❌ [API] Veri Hatası: {e}")
+            return None
+        content["tracks"] = tracks
+        return content
+
+    def stream_content_info(self, url):
+        """
+        İçeriğin başlık bilgisini hemen, parçalarını sayfa sayfa döndür.
+        Dönen sözlükteki "pages", her API sayfası geldikçe parça listesi
+        üreten bir generator'dır; tüm liste bellekte birikmez.
+        """
         if not self.sp: return None
 
         try:
@@ -36,7 +86,10 @@ class SpotifyClient:
             elif "album/" in url:
                 return self._get_album_tracks(url)
             elif "track/" in url:
-                return self._get_single_track(url)
+                content = self._get_single_track(url)
+                if content:
+                    content["pages"] = iter([content.pop("tracks")])
+                return content
             return None
         except Exception as e:
             print(f"❌ [API] Veri Hatası: {e}")
@@ -46,72 +99,147 @@ class SpotifyClient:
         try:
             playlist_id = playlist_url.split("playlist/")[-1].split("?")[0]
             
-            # --- DEĞİŞİKLİK: fields parametresini kaldırdık. Her şeyi çek! ---
-            results = self.sp.playlist(playlist_id)
+            # Önce ucuz metadata isteği: snapshot_id değişmediyse parçalar önbellekten
+            meta = self.sp.playlist(playlist_id, fields=PLAYLIST_META_FIELDS)
+            snapshot_id = meta.get('snapshot_id')
+            cached = self.cache.get_collection(playlist_id, snapshot_id) if snapshot_id else None
             
             # İsmi al (API'den gelen 'name' kesinlikle dolu olmalı)
-            playlist_name = results['name']
-            owner_name = results['owner']['display_name']
+            playlist_name = meta['name']
+            owner_name = meta['owner']['display_name']
             
             # İsim boşsa ID'yi kullan (İmkansız ama önlem)
             if not playlist_name:
                 playlist_name = f"Playlist {playlist_id}"
                 
             print(f"✅ [API] Playlist: '{playlist_name}' (Sahibi: {owner_name})")
-
-            tracks = []
-            items_data = results['tracks']
             
-            while True:
-                for item in items_data['items']:
-                    track = item.get('track')
-                    if not track: continue
-                    
-                    # Playlist adını albüm adı olarak zorla
-                    parsed = self._parse_track_object(track, override_album=playlist_name)
-                    if parsed: tracks.append(parsed)
-                
-                if items_data.get('next'):
-                    items_data = self.sp.next(items_data)
-                else:
-                    break
-
-            return {
+            header = {
                 "title": playlist_name, 
                 "type": "playlist", 
-                "tracks": tracks, 
+                "total": meta['tracks'].get('total'),
                 "album": playlist_name 
             }
+            
+            if cached:
+                print(f"✅ [API] Playlist değişmemiş, parçalar önbellekten ({snapshot_id[:12]}…)")
+                return {**header, "pages": self._iter_cached_pages(cached[1], PLAYLIST_PAGE_SIZE)}
+            
+            # Sadece gereken alanlar: ilk sayfanın parçaları
+            results = self.sp.playlist(playlist_id, fields=PLAYLIST_FIELDS, additional_types=("track",))
+            pages = self._iter_playlist_pages(playlist_id, results['tracks'], playlist_name)
+            return {
+                **header,
+                "pages": self._cache_pages(pages, playlist_id, "playlist", header,
+                                           results.get('snapshot_id') or snapshot_id)
+            }
         except Exception as e:
             print(f"❌ [API] Playlist Hatası: {e}")
             return None
 
+    @staticmethod
+    def _iter_cached_pages(tracks, page_size):
+        """Önbellekteki listeyi API sayfası boyutunda parçalar halinde üret"""
+        for start in range(0, len(tracks), page_size):
+            yield tracks[start:start + page_size]
+
+    def _cache_pages(self, pages, collection_id, kind, header, snapshot_id=None):
+        """Sayfaları aynen üret; liste sonuna kadar çekilebildiyse önbelleğe yaz"""
+        collected = []
+        for page in pages:
+            collected.extend(page)
+            yield page
+        try:
+            self.cache.put_collection(collection_id, kind, header, collected, snapshot_id)
+        except Exception as e:
+            print(f"⚠️ [API] Önbelleğe yazılamadı: {e}")
+
+    def _iter_offset_pages(self, first_items, total, page_size, fetch):
+        """
+        İlk sayfayı hemen, kalan offset sayfalarını sınırlı havuzda eşzamanlı
+        çekerek sırayla üret. Bellekte en fazla PAGE_WORKERS * 2 sayfa bekler.
+
+        Args:
+            first_items: İlk yanıtta gömülü gelen sayfanın 'items' listesi
+            total: Toplam öğe sayısı
+            fetch: offset -> o sayfanın 'items' listesi
+        """
+        yield first_items
+        
+        offsets = deque(range(len(first_items), total or 0, page_size))
+        pending = deque()
+        while offsets or pending:
+            while offsets and len(pending) < PAGE_WORKERS * 2:
+                pending.append(self._page_pool.submit(fetch, offsets.popleft()))
+            yield pending.popleft().result()
+
+    def _iter_playlist_pages(self, playlist_id, first_page, playlist_name):
+        """Playlist sayfalarını eşzamanlı çek, her sayfanın parçalarını sırayla üret"""
+        def fetch(offset):
+            page = self.sp.playlist_items(
+                playlist_id, fields=PLAYLIST_ITEM_FIELDS, limit=PLAYLIST_PAGE_SIZE,
+                offset=offset, additional_types=("track",)
+            )
+            return page.get('items') or []
+        
+        pages = self._iter_offset_pages(
+            first_page.get('items') or [], first_page.get('total'), PLAYLIST_PAGE_SIZE, fetch
+        )
+        for items in pages:
+            tracks = []
+            for item in items:
+                track = item.get('track')
+                if not track: continue
+                
+                # Playlist adını albüm adı olarak zorla
+                parsed = self._parse_track_object(track, override_album=playlist_name)
+                if parsed: tracks.append(parsed)
+            yield tracks
+
     def _get_album_tracks(self, album_url):
         try:
             album_id = album_url.split("album/")[-1].split("?")[0]
+            
+            # Albümlerin snapshot'ı yok: süresi dolmamışsa hiç istek yapılmaz
+            cached = self.cache.get_collection(album_id)
+            if cached:
+                header, tracks = cached
+                print(f"✅ [API] Albüm (önbellek): {header.get('title')}")
+                return {**header, "pages": self._iter_cached_pages(tracks, ALBUM_PAGE_SIZE)}
+            
             album = self.sp.album(album_id)
             album_name = album['name']
             
             print(f"✅ [API] Albüm: {album_name}")
             
-            tracks = []
-            results = self.sp.album_tracks(album_id)
-            
-            while True:
-                for item in results['items']:
-                    track_obj = self._parse_simple_track(item, album, album_name)
-                    tracks.append(track_obj)
-                
-                if results.get('next'):
-                    results = self.sp.next(results)
-                else:
-                    break
-            
-            return {"title": album_name, "type": "album", "tracks": tracks, "album": album_name}
+            header = {
+                "title": album_name,
+                "type": "album",
+                "total": album.get('total_tracks'),
+                "album": album_name
+            }
+            pages = self._iter_album_pages(album_id, album, album_name)
+            return {**header, "pages": self._cache_pages(pages, album_id, "album", header)}
         except Exception as e:
             print(f"❌ [API] Albüm Hatası: {e}")
             return None
 
+    def _iter_album_pages(self, album_id, album, album_name):
+        """
+        Albüm yanıtına gömülü ilk sayfayı kullan (ayrı album_tracks isteği yok),
+        kalan sayfaları eşzamanlı çek.
+        """
+        def fetch(offset):
+            page = self.sp.album_tracks(album_id, limit=ALBUM_PAGE_SIZE, offset=offset)
+            return page.get('items') or []
+        
+        first_page = album.get('tracks') or {}
+        pages = self._iter_offset_pages(
+            first_page.get('items') or [], first_page.get('total'), ALBUM_PAGE_SIZE, fetch
+        )
+        for items in pages:
+            yield [self._parse_simple_track(item, album, album_name) for item in items]
+
     def _get_single_track(self, track_url):
         try:
             track_id = track_url.split("track/")[-1].split("?")[0]
@@ -148,6 +276,8 @@ class SpotifyClient:
                 "cover_url": cover,
                 "year": year,
                 "track_no": track.get('track_number', 0),
+                "duration_ms": track.get('duration_ms'),
+                "isrc": (track.get('external_ids') or {}).get('isrc'),
                 "url": track['external_urls']['spotify']
             }
         except: return None
@@ -164,5 +294,7 @@ class SpotifyClient:
             "cover_url": cover,
             "year": album_data.get('release_date', '')[:4],
             "track_no": item.get('track_number', 0),
+            "duration_ms": item.get('duration_ms'),
+            "isrc": None,  # Albüm parça listesi (simplified) ISRC içermez
             "url": item['external_urls']['spotify']
         }
\ No newline at end of file
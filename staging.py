@@ -0,0 +1,87 @@
+"""
+4KTube Free - Staging Area
+Her parça kendi staging klasörüne (indirme klasörü/.4ktube-staging/<id>)
+indirilir. Yarım dosyalar (.part, .ytdl, fragmanlar) durdurma, çökme
+veya ağ kopmasından sonra burada kalır ve yt-dlp (continuedl) HTTP range
+istekleriyle kaldığı yerden devam eder.
+
+Klasör parça tamamlanınca ya da kuyruktan çıkarılınca silinir; sahipsiz
+kalanlar "partial_max_age_days" günden eskiyse toplanır. Kuyrukta bekleyen
+(duraklatılmış) parçaların klasörlerine yaşı ne olursa olsun dokunulmaz.
+"""
+
+import os
+import shutil
+import time
+
+from settings import GLOBAL_CONFIG, get_staging_dir
+
+
+def item_staging_dir(item_id, create=True):
+    """Parçanın staging klasörü (kuyruk id'si yeniden başlatmalarda sabittir)"""
+    path = os.path.join(get_staging_dir(), str(item_id))
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def discard(item_id):
+    """Parçanın yarım dosyalarını sil"""
+    path = item_staging_dir(item_id, create=False)
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _last_activity(path):
+    """Klasördeki en yeni dosyanın mtime'ı (boşsa klasörün kendisi)"""
+    latest = os.stat(path).st_mtime
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                latest = max(latest, entry.stat(follow_symlinks=False).st_mtime)
+            except OSError:
+                continue
+    return latest
+
+
+def collect_stale(max_age_days=None, live_ids=()):
+    """
+    Son etkinliği max_age_days günden eski staging klasörlerini sil.
+    live_ids: kuyrukta hâlâ duran parçaların id'leri (klasörleri korunur)
+
+    Returns:
+        tuple: (silinen klasör sayısı, boşaltılan byte)
+    """
+    if max_age_days is None:
+        max_age_days = GLOBAL_CONFIG.get("partial_max_age_days", 7)
+    root = get_staging_dir()
+    if not max_age_days or max_age_days <= 0 or not os.path.isdir(root):
+        return 0, 0
+
+    cutoff = time.time() - float(max_age_days) * 86400
+    live_ids = {str(i) for i in live_ids}
+    removed = 0
+    freed = 0
+
+    with os.scandir(root) as it:
+        entries = [
+            e for e in it if e.is_dir(follow_symlinks=False) and e.name not in live_ids
+        ]
+
+    for entry in entries:
+        try:
+            if _last_activity(entry.path) >= cutoff:
+                continue
+            size = sum(
+                f.stat(follow_symlinks=False).st_size
+                for f in os.scandir(entry.path) if f.is_file(follow_symlinks=False)
+            )
+        except OSError:
+            continue
+        shutil.rmtree(entry.path, ignore_errors=True)
+        removed += 1
+        freed += size
+
+    if removed:
+        print(f"[STAGING] {removed} eski yarım indirme silindi ({freed / 1024 / 1024:.1f} MB)")
+    return removed, freed
@@ -2,25 +2,28 @@
 4KTube Free - Tagger (TEYP UYUMLU VERSİYON)
 Mutagen ile MP3 ve M4A etiketleme.
 ✅ LRU Cache ile memory leak düzeltildi
+✅ Küçültülmüş kapaklar diskte önbelleklenir (cover_cache.py)
+✅ Aynı kapağı isteyen eşzamanlı worker'lar tek indirmeyi bekler (single-flight)
+✅ Kapaklar kuyruğa eklenirken arka planda önceden indirilir (CoverPrefetcher)
+✅ JPEG kapaklar küçültülürken draft() ile düşük çözünürlükte açılır (cover_resize.py)
 ✅ Kapak resmi otomatik küçültülür (300x300, max 80KB)
 ✅ Ford X-9030 gibi eski teyplerle uyumlu
 ✅ Zaman aşımı koruması
 """
 
 import os
-import io
+import threading
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from http_pool import http_pool
+from cover_cache import cover_cache
+from cover_resize import PIL_AVAILABLE, resize_cover_for_car
 from mutagen.id3 import ID3, TIT2, TPE1, TALB, TRCK, TDRC, APIC, ID3NoHeaderError
 from mutagen.mp3 import MP3
 from mutagen.mp4 import MP4, MP4Cover
 from collections import OrderedDict
 
-# PIL/Pillow import - Kapak resmi küçültme için
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+if not PIL_AVAILABLE:
     print("[TAGGER UYARI] Pillow yüklü değil. Kapak resimleri küçültülmeyecek.")
     print("[TAGGER UYARI] Yüklemek için: pip install Pillow --break-system-packages")
 
@@ -28,108 +31,99 @@ except ImportError:
 class LRUCoverCache:
     """
     LRU (Least Recently Used) Cache - Kapak resimleri için
-    Maksimum boyut sınırı ile memory leak önlenir
+    Maksimum boyut sınırı ile memory leak önlenir.
+    Birden çok etiketleme worker'ı aynı anda kullandığı için kilitlidir.
     """
     def __init__(self, max_size=100):
         self.cache = OrderedDict()
         self.max_size = max_size
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
     def get(self, url):
         """URL'den kapak al, cache'te varsa en üste taşı"""
-        if url in self.cache:
-            self.cache.move_to_end(url)
-            return self.cache[url]
-        return None
+        with self.lock:
+            if url in self.cache:
+                self.cache.move_to_end(url)
+                self.hits += 1
+                return self.cache[url]
+            self.misses += 1
+            return None
+
+    def peek(self, url):
+        """get gibi, ama isabet/ıskalama sayaçlarına dokunmaz (tekrar kontrol için)"""
+        with self.lock:
+            if url in self.cache:
+                self.cache.move_to_end(url)
+                return self.cache[url]
+            return None
 
     def set(self, url, data):
         """Kapak resmini cache'e ekle, limit aşılırsa en eskiyi sil"""
-        if url in self.cache:
-            self.cache.move_to_end(url)
-        self.cache[url] = data
-        if len(self.cache) > self.max_size:
-            self.cache.popitem(last=False)  # En eski öğeyi sil
+        with self.lock:
+            if url in self.cache:
+                self.cache.move_to_end(url)
+            self.cache[url] = data
+            if len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)  # En eski öğeyi sil
 
     def clear(self):
         """Tüm cache'i temizle"""
-        self.cache.clear()
+        with self.lock:
+            self.cache.clear()
 
     def size(self):
         """Cache'teki öğe sayısı"""
-        return len(self.cache)
-
+        with self.lock:
+            return len(self.cache)
 
-# Global cache instance - Maksimum 100 kapak resmi saklar
-_cover_cache = LRUCoverCache(max_size=100)
 
-# Minimum dosya boyutu (50KB - gerçekçi bir değer)
-MIN_AUDIO_FILE_SIZE = 50_000
+class SingleFlight:
+    """
+    Aynı anahtar için eşzamanlı çağrıları tek işe indirger: ilk gelen
+    çalıştırır, diğerleri onun sonucunu bekler (aynı albümün parçaları
+    aynı kapağı bir kez indirir ve bir kez küçültür).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._calls = {}  # anahtar -> Future
+        self.waits = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.waits += 1
 
+        if not leader:
+            return future.result()
 
-def resize_cover_for_car(cover_data, max_size_px=300, max_size_kb=80):
-    """
-    Kapak resmini teyp uyumlu boyuta küçült.
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                self._calls.pop(key, None)
+        return future.result()
 
-    Args:
-        cover_data: Orijinal kapak resmi (bytes)
-        max_size_px: Maksimum boyut (piksel) - varsayılan 300x300
-        max_size_kb: Maksimum dosya boyutu (KB) - varsayılan 80KB
 
-    Returns:
-        bytes: Küçültülmüş kapak resmi veya None
-    """
-    if not PIL_AVAILABLE:
-        print("[TAGGER] Pillow yok, orijinal kapak kullanılıyor")
-        return cover_data
+# Global cache instance - Maksimum 100 kapak resmi saklar
+# (disk önbelleğinin önündeki bellek katmanı)
+_cover_cache = LRUCoverCache(max_size=100)
+_cover_flight = SingleFlight()
 
-    try:
-        # Resmi aç
-        img = Image.open(io.BytesIO(cover_data))
-
-        # Orijinal boyut bilgisi
-        original_size = len(cover_data)
-        original_dimensions = img.size
-        print(f"[TAGGER] Orijinal kapak: {original_dimensions[0]}x{original_dimensions[1]}, {original_size // 1024}KB")
-
-        # Eğer zaten küçükse ve boyut limiti altındaysa, direkt dön
-        if original_dimensions[0] <= max_size_px and original_dimensions[1] <= max_size_px:
-            if original_size <= max_size_kb * 1024:
-                print(f"[TAGGER] Kapak zaten uygun boyutta, küçültme gerekmiyor")
-                return cover_data
-
-        # RGB formatına çevir (RGBA varsa)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
-
-        # Oranı koruyarak küçült (thumbnail)
-        img.thumbnail((max_size_px, max_size_px), Image.LANCZOS)
-
-        # Quality ile deneme yap - 80KB altına düşmeye çalış
-        for quality in [85, 75, 65, 55, 45]:
-            output = io.BytesIO()
-            img.save(output, format='JPEG', quality=quality, optimize=True)
-            output_size = output.tell()
-
-            if output_size <= max_size_kb * 1024:
-                result = output.getvalue()
-                new_dimensions = img.size
-                print(f"[TAGGER] ✅ Kapak küçültüldü: {new_dimensions[0]}x{new_dimensions[1]}, {output_size // 1024}KB (quality={quality})")
-                return result
-
-        # En düşük quality ile bile büyükse, en son halini dön
-        result = output.getvalue()
-        print(f"[TAGGER] ⚠️ Kapak küçültüldü ama hala büyük: {len(result) // 1024}KB")
-        return result
+# Disk önbelleği anahtarı: resize_cover_for_car ayarları değişirse eski kapaklar kullanılmaz
+COVER_MAX_PX = 300
+COVER_MAX_KB = 80
+COVER_PROFILE = f"car-{COVER_MAX_PX}px-{COVER_MAX_KB}kb"
 
-    except Exception as e:
-        print(f"[TAGGER HATA] Kapak küçültme hatası: {e}")
-        print(f"[TAGGER] Orijinal kapak kullanılıyor")
-        return cover_data
+# Minimum dosya boyutu (50KB - gerçekçi bir değer)
+MIN_AUDIO_FILE_SIZE = 50_000
 
 
 def set_id3_tags(file_path, info):
@@ -179,8 +173,15 @@ def set_id3_tags(file_path, info):
         return False
 
 
+def _cover_candidates(url):
+    """maxresdefault her videoda yoktur: 404 olursa hqdefault denenir"""
+    if "ytimg.com" in url and "/maxresdefault." in url:
+        return [url, url.replace("/maxresdefault.", "/hqdefault.")]
+    return [url]
+
+
 def _download_cover(url):
-    """Kapak resmini indir, önbellekte varsa kullan."""
+    """Kapak resmini indir; önce bellek, sonra disk önbelleğine bak."""
     if not url:
         return None
 
@@ -190,35 +191,119 @@ def _download_cover(url):
         print(f"[TAGGER] Kapak cache'ten alındı (Cache: {_cover_cache.size()}/{_cover_cache.max_size})")
         return cached
 
+    # Aynı URL için çalışan indirme (veya ön yükleme) varsa onu bekle
+    cover = _cover_flight.do(url, lambda: _load_cover(url))
+    if cover:
+        _cover_cache.set(url, cover)
+    return cover
+
+
+def _load_cover(url):
+    """Single-flight lideri: önce disk önbelleği, gerekirse ağ."""
+    # Önceki lider az önce bitirmiş olabilir
+    cached = _cover_cache.peek(url)
+    if cached:
+        return cached
+
+    for candidate in _cover_candidates(url):
+        cover = _fetch_cover(candidate)
+        if cover:
+            return cover
+    return None
+
+
+class CoverPrefetcher:
+    """
+    Kuyruğa eklenen parçaların kapaklarını, indirmeleri sürerken düşük
+    öncelikle (az sayıda worker) disk önbelleğine alır. Etiketleme anında
+    kapak hazırdır; ön yükleme henüz bitmediyse etiketleme onu bekler
+    (single-flight), aynı kapak iki kez indirilmez.
+    """
+    WORKERS = 2
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._pending = set()  # Sırada veya çalışmakta olan URL'ler
+        self._pool = None
+        self.prefetched = 0
+
+    def prefetch(self, urls):
+        """URL'leri sıraya ekle (aynı URL bir kez)"""
+        with self.lock:
+            for url in urls:
+                if not url or url in self._pending:
+                    continue
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.WORKERS, thread_name_prefix="downx-cover"
+                    )
+                self._pending.add(url)
+                self._pool.submit(self._warm, url)
+
+    def _warm(self, url):
+        try:
+            if _cover_flight.do(url, lambda: _load_cover(url)):
+                self.prefetched += 1
+        except Exception as e:
+            print(f"[TAGGER] Kapak ön yükleme hatası: {e}")
+        finally:
+            with self.lock:
+                self._pending.discard(url)
+
+
+cover_prefetcher = CoverPrefetcher()
+
+
+def _fetch_cover(url):
+    """Tek URL: disk önbelleği, gerekirse (koşullu) indir ve küçült."""
+    entry = cover_cache.get(url, COVER_PROFILE)
+    if entry and entry["missing"]:
+        print(f"[TAGGER] Kapak yok (404, önbellekte): {url[:50]}...")
+        return None
+    if entry and not entry["stale"]:
+        print(f"[TAGGER] Kapak disk önbelleğinden alındı")
+        return entry["data"]
+
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+        # Ortak keep-alive havuzu: aynı hosta her kapakta yeniden bağlanılmaz
         # KRİTİK: Timeout eklendi (10 saniye). İnternet yoksa program donmasın.
-        r = requests.get(url, timeout=10, headers=headers)
+        r = http_pool.get(
+            url, timeout=10,
+            etag=entry["etag"] if entry else None,
+            last_modified=entry["last_modified"] if entry else None
+        )
+
+        if r.status_code == 304 and entry:
+            cover_cache.touch(url, COVER_PROFILE)
+            return entry["data"]
 
         if r.status_code == 200 and len(r.content) > 1000:
             # Kapak resmini küçült (teyp uyumlu)
-            resized_cover = resize_cover_for_car(r.content, max_size_px=300, max_size_kb=80)
+            resized_cover = resize_cover_for_car(r.content, max_size_px=COVER_MAX_PX, max_size_kb=COVER_MAX_KB)
+            etag, last_modified = http_pool.validators(r)
 
             if resized_cover:
-                _cover_cache.set(url, resized_cover)
-                print(f"[TAGGER] Kapak indirildi, küçültüldü ve cache'e eklendi (Cache: {_cover_cache.size()}/{_cover_cache.max_size})")
+                cover_cache.put(url, COVER_PROFILE, resized_cover, etag, last_modified)
+                print(f"[TAGGER] Kapak indirildi, küçültüldü ve cache'e eklendi")
                 return resized_cover
             else:
                 print(f"[TAGGER] Kapak küçültülemedi, orijinal kullanılıyor")
-                _cover_cache.set(url, r.content)
+                cover_cache.put(url, COVER_PROFILE, r.content, etag, last_modified)
                 return r.content
+        elif r.status_code == 404:
+            cover_cache.put_missing(url)
+            print(f"[TAGGER] Kapak bulunamadı: HTTP 404")
+            return None
         else:
             print(f"[TAGGER] Kapak indirilemedi: HTTP {r.status_code}")
-            return None
+            return entry["data"] if entry else None
 
     except requests.Timeout:
         print(f"[TAGGER] Kapak indirme zaman aşımı: {url[:50]}...")
-        return None
+        return entry["data"] if entry else None
     except requests.RequestException as e:
         print(f"[TAGGER] Kapak indirme hatası (Network): {e}")
-        return None
+        return entry["data"] if entry else None
     except Exception as e:
         print(f"[TAGGER] Beklenmeyen kapak indirme hatası: {e}")
         return None
@@ -341,17 +426,26 @@ def _tag_m4a(path, info):
 
 
 def clear_cache():
-    """Cache'i manuel temizleme fonksiyonu (isteğe bağlı kullanım için)"""
+    """Cache'i manuel temizleme fonksiyonu (bellek + disk)"""
     global _cover_cache
     _cover_cache.clear()
+    cover_cache.clear()
     print(f"[TAGGER] Kapak cache'i temizlendi")
 
 
 def get_cache_stats():
-    """Cache istatistikleri (debug için)"""
+    """Cache istatistikleri (bellek katmanı + disk önbelleği)"""
+    disk = cover_cache.stats()
     return {
         "size": _cover_cache.size(),
-        "max_size": _cover_cache.max_size
+        "max_size": _cover_cache.max_size,
+        "hits": _cover_cache.hits,
+        "misses": _cover_cache.misses,
+        "waits": _cover_flight.waits,
+        "prefetched": cover_prefetcher.prefetched,
+        "disk_hits": disk.pop("hits"),
+        "disk_misses": disk.pop("misses"),
+        **disk
     }
 
 
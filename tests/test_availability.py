@@ -0,0 +1,33 @@
+"""Pre-flight: yt-dlp hata metinlerinin sınıflandırılması"""
+
+import pytest
+
+pytest.importorskip("requests")
+
+import availability  # noqa: E402
+
+
+@pytest.mark.parametrize("message", [
+    "ERROR: [youtube] abc: Video unavailable. This content isn't available, try again later.",
+    "ERROR: [youtube] abc: Video unavailable. This content isn't available.",
+    "ERROR: unable to download video data: HTTP Error 429: Too Many Requests",
+    "ERROR: [youtube] abc: Sign in to confirm you're not a bot",
+    "",
+])
+def test_transient_errors_are_not_unavailable(message):
+    assert availability.classify_error(message) is None
+
+
+@pytest.mark.parametrize("message, reason", [
+    ("ERROR: [youtube] abc: Video unavailable. This video has been removed by the uploader",
+     availability.REASON_REMOVED),
+    ("ERROR: [youtube] abc: Video unavailable", availability.REASON_REMOVED),
+    ("ERROR: [youtube] abc: Private video. Sign in if you've been granted access",
+     availability.REASON_PRIVATE),
+    ("ERROR: [youtube] abc: The uploader has not made this video available in your country",
+     availability.REASON_REGION),
+    ("ERROR: [youtube] abc: Join this channel to get access to members-only content",
+     availability.REASON_MEMBERS),
+])
+def test_permanent_errors_are_classified(message, reason):
+    assert availability.classify_error(message) == reason
@@ -0,0 +1,64 @@
+"""AdaptiveConcurrency: throughput ölçümü ve slot kararları"""
+
+import pytest
+
+import concurrency
+from concurrency import AdaptiveConcurrency
+
+MB = 1024 * 1024
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(concurrency.time, "monotonic", fake)
+    return fake
+
+
+def test_resumed_download_does_not_count_existing_part(clock):
+    ctrl = AdaptiveConcurrency(initial=2, interval=10)
+    # Devam eden indirmenin ilk raporu diskteki 50 MB'ı içerir
+    ctrl.record_progress("a", 50 * MB, 1 * MB)
+    ctrl.record_progress("a", 51 * MB, 1 * MB)
+    assert ctrl._window_bytes == 1 * MB
+
+
+def test_counter_drop_resets_baseline(clock):
+    ctrl = AdaptiveConcurrency(initial=2, interval=10)
+    ctrl.record_progress("a", 0, None)
+    ctrl.record_progress("a", 10 * MB, None)
+    # İkinci formata geçiş: sayaç sıfırdan başlar
+    ctrl.record_progress("a", 1 * MB, None)
+    ctrl.record_progress("a", 3 * MB, None)
+    assert ctrl._window_bytes == 12 * MB
+
+
+def run_windows(ctrl, clock, count, window_bytes=20 * MB):
+    """Düz hat: her pencere aynı throughput, tüm slotlar dolu; pencere sonu limitleri"""
+    limits = []
+    for _ in range(count):
+        ctrl.record_progress("job", ctrl._job_bytes.get("job", 0) + window_bytes, None)
+        clock.now += ctrl.interval
+        ctrl.maybe_adjust(ctrl.limit)
+        limits.append(ctrl.limit)
+    return limits
+
+
+def test_flat_link_holds_after_revert(clock):
+    ctrl = AdaptiveConcurrency(initial=2, maximum=8, interval=10)
+    ctrl.record_progress("job", 0, None)
+
+    # Deneme artışı throughput getirmedi: geri alınır
+    assert run_windows(ctrl, clock, 2) == [3, 2]
+    # Bekleme süresince yeniden denenmez
+    assert run_windows(ctrl, clock, ctrl.REVERT_HOLD - 1) == [2] * (ctrl.REVERT_HOLD - 1)
+    # Bekleme bitince bir kez daha denenir
+    assert run_windows(ctrl, clock, 1) == [3]
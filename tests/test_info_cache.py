@@ -0,0 +1,17 @@
+"""Info cache: açık bağlantı üzerinden temizleme"""
+
+from info_cache import InfoCache
+
+
+def test_clear_keeps_database_usable(tmp_path):
+    path = tmp_path / "ytdl_info.db"
+    cache = InfoCache(str(path))
+    cache.put_flat([{"id": "abcdefghijk", "title": "Title"}])
+
+    cache.clear()
+
+    assert cache.get_meta("abcdefghijk") is None
+    assert path.exists()
+    cache.put_flat([{"id": "abcdefghijk", "title": "Title"}])
+    assert cache.get_meta("abcdefghijk")["title"] == "Title"
+    cache.close()
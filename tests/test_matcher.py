@@ -0,0 +1,88 @@
+"""Spotify → YouTube eşleşme puanlaması"""
+
+import pytest
+
+import matcher
+
+MIN_CONFIDENCE = 0.55  # settings.py: match_min_confidence
+
+
+def track(title, artist, seconds, isrc=None):
+    return {"title": title, "artist": artist, "duration_ms": seconds * 1000, "isrc": isrc}
+
+
+def entry(title, channel, seconds, **extra):
+    return {"id": title, "title": title, "channel": channel, "duration": seconds, **extra}
+
+
+def test_marker_inside_word_is_not_penalized():
+    # "oliver" içinde "live" geçer
+    t = track("Life Goes On", "Oliver Tree", 162)
+    official = matcher.score_candidate(t, entry("Oliver Tree - Life Goes On (Official Video)", "Oliver Tree", 170))
+    live = matcher.score_candidate(t, entry("Oliver Tree - Life Goes On (Live)", "Oliver Tree", 165))
+    assert official > 0.9
+    assert official - live > 0.2
+
+
+@pytest.mark.parametrize("text, markers", [
+    ("Oliver Tree - Life Goes On", set()),
+    ("Discover the Music", set()),
+    ("Happy Hours", {"hours"}),
+    ("Hello (Live at the NRJ Awards)", {"live"}),
+    ("Hello - Adele (Cover)", {"cover"}),
+    ("Adele - Hello 10 Hours", {"hours"}),
+    ("Hello [Sped Up]", {"sped up"}),
+])
+def test_unwanted_markers_match_whole_words(text, markers):
+    assert matcher.unwanted_markers(text) == markers
+
+
+def test_marker_in_spotify_title_is_not_penalized():
+    t = track("Hello - Live at the NRJ Awards", "Adele", 300)
+    assert matcher.score_candidate(t, entry("Adele - Hello (Live at the NRJ Awards)", "Adele", 300)) > 0.9
+
+
+def test_official_video_with_long_intro_is_accepted():
+    t = track("Hello", "Adele", 295)
+    video, score = matcher.best_match(t, [
+        entry("Adele - Hello (Official Music Video)", "Adele", 366),
+    ], MIN_CONFIDENCE)
+    assert video is not None
+    assert score > 0.7
+
+
+def test_other_song_by_same_artist_is_rejected():
+    t = track("Hello", "Adele", 295)
+    video, _ = matcher.best_match(t, [
+        entry("Adele - Someone Like You (Official Music Video)", "Adele", 285),
+    ], MIN_CONFIDENCE)
+    assert video is None
+
+
+def test_same_title_by_other_artist_is_rejected():
+    t = track("Hello", "Adele", 295)
+    video, _ = matcher.best_match(t, [
+        entry("Lionel Richie - Hello (Official Music Video)", "LionelRichieVEVO", 330),
+    ], MIN_CONFIDENCE)
+    assert video is None
+
+
+def test_isrc_is_found_in_tags():
+    t = track("Hello", "Adele", 295, isrc="GBBKS1500214")
+    plain = entry("Hello", "Some Channel", 295)
+    tagged = entry("Hello", "Some Channel", 295, tags=["adele", "GBBKS1500214"])
+    assert matcher.score_candidate(t, tagged) > matcher.score_candidate(t, plain)
+
+
+@pytest.mark.parametrize("title, artist, candidate, seconds", [
+    ("Music", "Madonna", "Madonna - Music (Official Video)", 225),
+    ("Lyrics", "Ariana Grande", "Ariana Grande - Lyrics", 180),
+    ("Video Games", "Lana Del Rey", "Lana Del Rey - Video Games", 282),
+    ("Radio Video", "System of a Down", "System Of A Down - Radio/Video (Official HD Video)", 249),
+])
+def test_noise_words_in_spotify_title_are_kept(title, artist, candidate, seconds):
+    video, score = matcher.best_match(
+        track(title, artist, seconds), [entry(candidate, artist, seconds)], MIN_CONFIDENCE
+    )
+    assert video is not None
+    assert score > 0.8
@@ -0,0 +1,147 @@
+"""QueueManager pipeline: çözümleme tamponu, şeritler, öncelik ve kuyruktan çıkarma"""
+
+import types
+
+import pytest
+
+pytest.importorskip("gi")
+pytest.importorskip("yt_dlp")
+pytest.importorskip("requests")
+
+import queue_manager  # noqa: E402
+from queue_journal import QueueJournal  # noqa: E402
+from scheduler import PRIORITY_NEXT  # noqa: E402
+
+
+class InlinePool:
+    """Çözümleme havuzu yerine: işi çağıran thread'de hemen çalıştırır"""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(queue_manager, "QueueJournal", lambda: QueueJournal(str(tmp_path / "tasks.db")))
+    monkeypatch.setattr(queue_manager.QueueManager, "_housekeeping", lambda self: None)
+    monkeypatch.setattr(queue_manager.preflight.availability, "prefetch", lambda video_ids: None)
+    monkeypatch.setitem(queue_manager.GLOBAL_CONFIG, "download_mode", "video")
+    monkeypatch.setitem(queue_manager.GLOBAL_CONFIG, "video_lane_slots", None)
+    qm = queue_manager.QueueManager(types.SimpleNamespace())
+    qm._check_file_exists = lambda item: False
+    qm._preflight = lambda item: None
+    qm._resolve_pool = InlinePool()
+    qm.concurrency.limit = 2  # ses şeridi 2, video şeridi 1 slot
+    qm.is_downloading = True
+    yield qm
+    qm.journal.close()
+
+
+def video_item(item_id):
+    return {
+        "id": item_id,
+        "type": "youtube",
+        "url": f"https://www.youtube.com/watch?v={item_id}",
+        "title": item_id,
+        "artist": "Test",
+        "status": "Beklemede",
+    }
+
+
+def audio_item(item_id):
+    # Eşleşmesi önceden bulunmuş Spotify parçası: çözümleme aramaz
+    item = video_item(item_id)
+    item.update(type="spotify", video_url=item["url"])
+    return item
+
+
+def feed(qm):
+    with qm.lock:
+        qm._feed_resolvers()
+
+
+def dispatch(qm):
+    """_dispatch_loop gibi tampondan bir parça alıp slotunu tut"""
+    with qm.lock:
+        item = qm._next_ready_item()
+        if item:
+            qm._active += 1
+            qm._active_lanes[item["_lane"]] += 1
+        return item
+
+
+def ready_ids(qm):
+    return [i["id"] for i in qm._ready]
+
+
+def test_full_video_buffer_does_not_block_audio(manager):
+    manager._append_items([video_item(f"v{n}") for n in range(10)], "videos")
+    manager._append_items([audio_item("a")], "audio")
+    feed(manager)
+
+    assert "a" in ready_ids(manager)
+    # Video slotu dolu: ayrılmış ses slotu boş kalmaz
+    assert dispatch(manager)["id"] == "v0"
+    assert dispatch(manager)["id"] == "a"
+
+
+def test_download_next_skips_past_full_buffer(manager):
+    manager._append_items([audio_item(f"a{n}") for n in range(10)], "batch")
+    feed(manager)
+    assert "a9" not in ready_ids(manager)
+
+    manager.download_next("a9")
+    feed(manager)
+
+    assert dispatch(manager)["id"] == "a9"
+
+
+def test_priority_change_reranks_resolved_items(manager):
+    manager._append_items([audio_item(f"a{n}") for n in range(3)], "batch")
+    feed(manager)
+    assert ready_ids(manager) == ["a0", "a1", "a2"]
+
+    manager.set_priority("a2", PRIORITY_NEXT)
+
+    assert dispatch(manager)["id"] == "a2"
+    assert dispatch(manager)["id"] == "a0"
+
+
+def test_item_removed_after_resolve_is_not_dispatched(manager):
+    manager._append_items([audio_item("a")], "batch")
+    feed(manager)
+    assert manager._inflight == 1
+
+    manager.remove_item("a")
+
+    assert dispatch(manager) is None
+    assert manager._inflight == 0
+    assert manager._resolving == 0
+
+
+def test_item_removed_while_resolving_is_not_dispatched(manager):
+    def remove_during_preflight(item):
+        manager.remove_item(item["id"])
+        return None
+
+    manager._preflight = remove_during_preflight
+    manager._append_items([audio_item("a")], "batch")
+    feed(manager)
+
+    assert dispatch(manager) is None
+    assert manager._inflight == 0
+    assert manager._resolving == 0
+
+
+def test_clearing_queue_drops_resolved_items(manager):
+    manager._append_items([audio_item("a"), audio_item("b")], "batch")
+    feed(manager)
+    assert len(manager._ready) == 2
+
+    # add_urls_to_queue(clear_queue=True) kuyruğu bu şekilde boşaltır
+    with manager.lock:
+        manager._remove_where(lambda i: True)
+
+    assert dispatch(manager) is None
+    assert manager._inflight == 0
+    assert manager._get_item_by_id("a") is None
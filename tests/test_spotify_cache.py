@@ -0,0 +1,15 @@
+"""Spotify cache: önbellek temizlenirken eşleşmeler korunur"""
+
+from spotify_cache import SpotifyCache
+
+
+def test_clear_collections_keeps_matches(tmp_path):
+    cache = SpotifyCache(str(tmp_path / "spotify.db"))
+    cache.put_collection("playlist1", "playlist", {"title": "P"}, [{"title": "T"}], snapshot_id="s1")
+    cache.put_match("4uLU6hMCjMI75M1A2tKUQC", "dQw4w9WgXcQ", 0.9)
+
+    cache.clear_collections()
+
+    assert cache.get_collection("playlist1", "s1") is None
+    assert cache.get_match("4uLU6hMCjMI75M1A2tKUQC")["video_id"] == "dQw4w9WgXcQ"
+    cache.close()
@@ -0,0 +1,31 @@
+"""Staging: eski yarım indirmelerin toplanması"""
+
+import os
+import time
+
+import staging
+
+
+def make_dir(root, name, age_days):
+    path = root / name
+    path.mkdir()
+    part = path / "video.webm.part"
+    part.write_bytes(b"x" * 10)
+    old = time.time() - age_days * 86400
+    os.utime(part, (old, old))
+    os.utime(path, (old, old))
+    return path
+
+
+def test_collect_stale_keeps_live_items(tmp_path, monkeypatch):
+    monkeypatch.setattr(staging, "get_staging_dir", lambda: str(tmp_path))
+    orphan = make_dir(tmp_path, "orphan", 30)
+    queued = make_dir(tmp_path, "queued", 30)
+    recent = make_dir(tmp_path, "recent", 1)
+
+    removed, freed = staging.collect_stale(max_age_days=7, live_ids={"queued"})
+
+    assert (removed, freed) == (1, 10)
+    assert not orphan.exists()
+    assert queued.exists()
+    assert recent.exists()
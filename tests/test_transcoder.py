@@ -0,0 +1,43 @@
+"""Transcoder: kütüphaneye taşıma"""
+
+import transcoder
+
+
+def test_move_into_place_does_not_overwrite(tmp_path):
+    library = tmp_path / "library"
+    library.mkdir()
+    existing = library / "Artist - Title.mp3"
+    existing.write_bytes(b"user's track")
+    (library / "Artist - Title (2).mp3").write_bytes(b"another copy")
+    staged = tmp_path / "staged.mp3"
+    staged.write_bytes(b"new download")
+
+    final = transcoder.move_into_place(str(staged), str(existing))
+
+    assert final == str(library / "Artist - Title (3).mp3")
+    assert existing.read_bytes() == b"user's track"
+    assert (library / "Artist - Title (3).mp3").read_bytes() == b"new download"
+    assert not staged.exists()
+
+
+def test_move_into_place_keeps_free_name(tmp_path):
+    staged = tmp_path / "staged.mp3"
+    staged.write_bytes(b"new download")
+    target = tmp_path / "Artist - Title.mp3"
+
+    assert transcoder.move_into_place(str(staged), str(target)) == str(target)
+    assert target.read_bytes() == b"new download"
+
+
+def test_video_only_is_remuxed_not_reencoded(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setitem(transcoder.GLOBAL_CONFIG, "video_format", "mp4")
+    monkeypatch.setattr(transcoder, "run_ffmpeg",
+                        lambda src, dst, args, token=None: (calls.append(args), open(dst, "wb").close()))
+    src = tmp_path / "raw.webm"
+    src.write_bytes(b"vp9")
+
+    final = transcoder.transcode(str(src), str(tmp_path / "out" / "Video"), "video")
+
+    assert final.endswith("Video.mp4")
+    assert calls == [transcoder.build_remux_args()]
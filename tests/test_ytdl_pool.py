@@ -0,0 +1,44 @@
+"""YoutubeDL havuzu: yeniden kullanılan iç alanlar ve yedek yol"""
+
+import pytest
+
+yt_dlp = pytest.importorskip("yt_dlp")
+
+import ytdl_pool  # noqa: E402
+from ytdl_pool import PROFILE_FLAT, REUSE_ATTRS, YtdlPool, supports_reuse  # noqa: E402
+
+
+def test_installed_yt_dlp_supports_reuse():
+    # Bu test kırılırsa: yt-dlp iç alanları değişti, _configure güncellenmeli
+    ydl = yt_dlp.YoutubeDL({"quiet": True})
+    missing = [name for name in REUSE_ATTRS if not hasattr(ydl, name)]
+    assert not missing, f"yt-dlp {yt_dlp.version.__version__}: eksik alanlar {missing}"
+    ydl.close()
+
+
+def test_reused_instance_gets_job_params():
+    pool = YtdlPool()
+    with pool.acquire(PROFILE_FLAT, {"format": "bestaudio"}) as ydl:
+        first = ydl
+    with pool.acquire(PROFILE_FLAT) as ydl:
+        assert ydl is first
+        assert "format" not in ydl.params
+        assert ydl.format_selector is None
+    assert (pool.created, pool.reused) == (1, 1)
+    pool.close()
+
+
+def test_missing_internals_fall_back_to_fresh_instances(monkeypatch):
+    monkeypatch.setattr(ytdl_pool, "REUSE_ATTRS", REUSE_ATTRS + ("_removed_in_new_release",))
+    pool = YtdlPool()
+
+    with pool.acquire(PROFILE_FLAT, {"format": "bestaudio"}) as ydl:
+        assert ydl.params["format"] == "bestaudio"
+    with pool.acquire(PROFILE_FLAT) as second:
+        assert second is not ydl
+        assert "format" not in second.params
+
+    assert not pool.reuse
+    assert pool.reused == 0
+    assert not supports_reuse(second)
+    pool.close()
@@ -14,6 +14,9 @@ import threading
 from pathlib import Path
 
 from settings import CACHE_DIR, get_download_dir
+from cover_cache import cover_cache, COVER_DIR
+from info_cache import info_cache, INFO_CACHE_FILE
+from spotify_cache import spotify_cache, SPOTIFY_CACHE_FILE
 
 
 class ToolsTab(Adw.PreferencesPage):
@@ -162,7 +165,15 @@ class ToolsTab(Adw.PreferencesPage):
                         total_size += file.stat().st_size
 
             size_mb = total_size / (1024 * 1024)
-            GLib.idle_add(self.row_cache_size.set_subtitle, f"{size_mb:.2f} MB")
+            covers = cover_cache.stats()
+            lookups = covers["hits"] + covers["misses"]
+            hit_rate = f" · %{covers['hits'] * 100 // lookups} isabet" if lookups else ""
+            GLib.idle_add(
+                self.row_cache_size.set_subtitle,
+                f"{size_mb:.2f} MB · Kapaklar: {covers['covers']} "
+                f"({covers['bytes'] / (1024 * 1024):.1f} / {covers['budget'] // (1024 * 1024)} MB)"
+                f"{hit_rate}"
+            )
         except Exception as e:
             GLib.idle_add(self.row_cache_size.set_subtitle, f"Hesaplanamadı: {e}")
 
@@ -313,12 +324,23 @@ class ToolsTab(Adw.PreferencesPage):
             cache_path = Path(CACHE_DIR)
 
             if cache_path.exists():
+                # Açık veritabanları kendi bağlantılarıyla temizlenir;
+                # dosyaları (ve -wal / -shm) bağlantının altından silinmez
+                cover_cache.clear()
+                info_cache.clear()
+                spotify_cache.clear_collections()
+                open_databases = (
+                    os.path.basename(INFO_CACHE_FILE), os.path.basename(SPOTIFY_CACHE_FILE)
+                )
                 for file in cache_path.rglob("*"):
-                    if file.is_file():
-                        file.unlink()
+                    if not file.is_file() or Path(COVER_DIR) in file.parents:
+                        continue
+                    if file.name.startswith(open_databases):
+                        continue
+                    file.unlink()
 
                 self._show_toast("✅ Önbellek temizlendi!")
-                self.row_cache_size.set_subtitle("0.00 MB")
+                threading.Thread(target=self._calculate_cache_size, daemon=True).start()
             else:
                 self._show_toast("⚠️ Önbellek klasörü bulunamadı")
         except Exception as e:
@@ -0,0 +1,278 @@
+"""
+4KTube Free - Transcoder
+İndirme aşamasından gelen ham dosyayı hedef formata çeviren FFmpeg aşaması.
+QueueManager bunu ağ slotlarından ayrı, çekirdek sayısı kadar worker'lı
+CPU havuzunda çalıştırır; böylece ffmpeg ağ slotlarını meşgul etmez.
+"""
+
+import errno
+import os
+import shutil
+import subprocess
+import threading
+
+from settings import GLOBAL_CONFIG
+from cancellation import JobCancelled
+
+# Hedef format -> ffmpeg ses codec'i
+AUDIO_CODECS = {
+    "mp3": "libmp3lame",
+    "m4a": "aac",
+    "opus": "libopus",
+    "ogg": "libvorbis",
+    "flac": "flac",
+    "wav": "pcm_s16le",
+}
+
+# Hedef formatla aynı codec'i taşıyan kaynak uzantıları (yeniden kodlama yok, -c:a copy)
+COPY_COMPATIBLE = {
+    "m4a": {".m4a", ".aac"},
+    "mp3": {".mp3"},
+    "opus": {".opus"},
+    "ogg": {".ogg"},
+    "flac": {".flac"},
+}
+
+LOSSLESS_FORMATS = {"flac", "wav"}
+
+# Ad seçimi + rename tek adımda: iki worker aynı boş adı seçemez
+_place_lock = threading.Lock()
+
+
+class TranscodeError(Exception):
+    """ffmpeg başarısız oldu"""
+
+
+def audio_settings():
+    """Ses dönüştürme ayarlarını config'ten oku"""
+    fmt = (GLOBAL_CONFIG.get("audio_format") or "m4a").lower()
+    if fmt == "aac":
+        fmt = "m4a"
+
+    quality = str(GLOBAL_CONFIG.get("audio_quality") or "192").lower().replace("k", "")
+
+    codec = AUDIO_CODECS.get(fmt, "aac")
+    if fmt == "mp3":
+        codec = GLOBAL_CONFIG.get("mp3_codec", codec)
+    elif fmt == "m4a":
+        codec = GLOBAL_CONFIG.get("aac_codec", codec)
+
+    return {
+        "format": fmt,
+        "codec": codec,
+        "quality": quality,
+        "bitrate_mode": GLOBAL_CONFIG.get("audio_bitrate_mode", "cbr"),
+        "sample_rate": str(GLOBAL_CONFIG.get("audio_sample_rate", "44100")),
+        "channels": str(GLOBAL_CONFIG.get("audio_channels", "2")),
+    }
+
+
+def video_settings():
+    """Video dönüştürme ayarlarını config'ten oku"""
+    return {
+        "format": (GLOBAL_CONFIG.get("video_format") or "mp4").lower(),
+        "codec": GLOBAL_CONFIG.get("video_codec", "h264"),
+        "bitrate": GLOBAL_CONFIG.get("video_bitrate", "auto"),
+        "fps": GLOBAL_CONFIG.get("video_fps", "source"),
+        "crf": str(GLOBAL_CONFIG.get("video_crf", "23")),
+        "preset": GLOBAL_CONFIG.get("video_preset", "medium"),
+    }
+
+
+def build_audio_args(src_ext, s):
+    """Ham ses dosyası için ffmpeg çıkış argümanları"""
+    args = ["-vn"]
+
+    if src_ext.lower() in COPY_COMPATIBLE.get(s["format"], ()):
+        # Kaynak zaten hedef codec'te: sadece kapsayıcıyı değiştir
+        return args + ["-c:a", "copy"]
+
+    args += ["-acodec", s["codec"]]
+
+    if s["format"] not in LOSSLESS_FORMATS and s["quality"].isdigit():
+        bitrate = f"{s['quality']}k"
+        if s["bitrate_mode"] == "cbr":
+            args += ["-b:a", bitrate, "-minrate", bitrate, "-maxrate", bitrate, "-bufsize", "2M"]
+        else:
+            args += ["-b:a", bitrate]
+
+    args += ["-ar", s["sample_rate"], "-ac", s["channels"]]
+    return args
+
+
+def build_video_args(s, include_audio):
+    """Video dönüştürme için ffmpeg çıkış argümanları"""
+    args = []
+
+    if s["codec"] == "h264":
+        args += ["-vcodec", "libx264"]
+    elif s["codec"] == "h265":
+        args += ["-vcodec", "libx265"]
+    else:
+        args += ["-vcodec", "copy"]
+
+    if s["codec"] in ("h264", "h265") and s["crf"] != "auto":
+        args += ["-crf", s["crf"], "-preset", s["preset"]]
+
+    if s["bitrate"] != "auto":
+        args += ["-b:v", s["bitrate"]]
+
+    if s["fps"] != "source":
+        args += ["-r", s["fps"]]
+
+    if include_audio:
+        args += ["-acodec", "aac", "-b:a", "192k"]
+    else:
+        args += ["-an"]
+
+    return args
+
+
+def build_remux_args():
+    """Sadece video modunda kapsayıcı değişimi: akış kopyalanır, yeniden kodlama yok"""
+    return ["-c:v", "copy", "-an"]
+
+
+def _terminate(proc):
+    """ffmpeg'i nazikçe durdur, 1 sn içinde çıkmazsa öldür"""
+    if proc.poll() is not None:
+        return
+    try:
+        proc.terminate()
+        proc.wait(timeout=1)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+    except OSError:
+        pass
+
+
+def run_ffmpeg(src, dst, out_args, cancel_token=None):
+    """
+    ffmpeg'i çalıştır, hata olursa TranscodeError fırlat.
+    cancel_token iptal edilirse alt süreç sonlandırılır ve JobCancelled fırlatılır.
+    """
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y", "-i", src] + out_args + [dst]
+    if cancel_token:
+        cancel_token.raise_if_cancelled()
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    stop = lambda: _terminate(proc)
+    if cancel_token:
+        cancel_token.register(stop)
+    try:
+        _, stderr = proc.communicate()
+    finally:
+        if cancel_token:
+            cancel_token.unregister(stop)
+
+    if cancel_token and cancel_token.cancelled:
+        raise JobCancelled("İptal edildi")
+    if proc.returncode != 0:
+        raise TranscodeError((stderr or "").strip()[-300:] or f"ffmpeg çıkış kodu {proc.returncode}")
+
+
+def unique_path(path):
+    """Hedef doluysa "Ad (2).mp3", "Ad (3).mp3" ... şeklinde boş bir ad"""
+    if not os.path.exists(path):
+        return path
+    base, ext = os.path.splitext(path)
+    n = 2
+    while os.path.exists(f"{base} ({n}){ext}"):
+        n += 1
+    return f"{base} ({n}){ext}"
+
+
+def _place(src, dst):
+    """src'yi dst'nin boş bir varyantına rename et, kullanılan yolu döndür"""
+    with _place_lock:
+        final = unique_path(dst)
+        os.replace(src, final)
+    if final != dst:
+        print(f"[FFMPEG] Hedef zaten var, yeni ad: {os.path.basename(final)}")
+    return final
+
+
+def move_into_place(src, dst):
+    """
+    Dosyayı kütüphaneye atomik olarak taşı; mevcut dosyanın üzerine yazılmaz.
+    Staging aynı dosya sistemindeyse tek bir rename; değilse hedef klasörde
+    gizli bir kopya oluşturulup onun üzerinden rename edilir.
+
+    Returns:
+        str: Dosyanın son yolu (hedef doluysa " (2)" ekli ad)
+    """
+    try:
+        return _place(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    directory, name = os.path.split(dst)
+    tmp_path = os.path.join(directory, f".{name}.moving")
+    try:
+        shutil.copyfile(src, tmp_path)
+        final = _place(tmp_path, dst)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    os.remove(src)
+    return final
+
+
+def transcode(src, output_base, mode, cancel_token=None):
+    """
+    Ham dosyayı hedef formata çevir.
+
+    Args:
+        src: İndirme aşamasının ürettiği ham dosya
+        output_base: Uzantısız hedef yol (klasör/ad)
+        mode: "audio", "video" veya "video+audio"
+        cancel_token: İptal edilirse ffmpeg durdurulur, yarım çıktı silinir
+
+    Returns:
+        str: Son dosyanın yolu
+    """
+    src_ext = os.path.splitext(src)[1]
+
+    if mode == "audio":
+        s = audio_settings()
+        out_args = build_audio_args(src_ext, s)
+    else:
+        s = video_settings()
+        if src_ext.lower() == f".{s['format']}":
+            # Zaten hedef kapsayıcıda: yeniden kodlama yok (FFmpegVideoConvertor davranışı)
+            out_args = None
+        elif mode == "video":
+            # Sadece video eskiden hiç dönüştürülmezdi: kapsayıcı -c copy ile değişir
+            out_args = build_remux_args()
+        else:
+            out_args = build_video_args(s, include_audio=True)
+
+    final_path = f"{output_base}.{s['format']}"
+    os.makedirs(os.path.dirname(final_path) or ".", exist_ok=True)
+
+    if out_args is None:
+        return move_into_place(src, final_path)
+
+    # Çıktı önce kaynağın staging klasörüne yazılır, bitince kütüphaneye taşınır:
+    # kütüphanede yarım dosya hiç görünmez
+    name = os.path.basename(final_path)
+    tmp_path = os.path.join(os.path.dirname(src), f".{name}.transcode.{s['format']}")
+    try:
+        try:
+            run_ffmpeg(src, tmp_path, out_args, cancel_token)
+        except TranscodeError as e:
+            if mode != "video":
+                raise
+            # Codec hedef kapsayıcıya sığmıyor (ör. VP9 -> avi): yeniden kodla
+            print(f"[FFMPEG] Remux olmadı, yeniden kodlanıyor: {e}")
+            run_ffmpeg(src, tmp_path, build_video_args(s, include_audio=False), cancel_token)
+        final_path = move_into_place(tmp_path, final_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    if os.path.abspath(src) != os.path.abspath(final_path) and os.path.exists(src):
+        os.remove(src)
+
+    return final_path
@@ -1,21 +1,16 @@
-import yt_dlp
-import os
-from settings import COOKIES_FILE
+from ytdl_pool import ytdl_pool, PROFILE_FLAT
+from info_cache import info_cache
 
 class YouTubeClient:
     def __init__(self):
+        # Havuzdaki flat profilin üzerine arama için uygulanan ayarlar
+        # (cookies.txt havuzun ortak cookie jar'ından gelir)
         self.ytdlp_opts = {
             "quiet": False, 
-            "extract_flat": True,
-            "skip_download": True,
             "format": "best", 
             "youtube_client": "web", # Arama için web kullanmak daha iyidir
         }
 
-        # Eğer cookies dosyası varsa ekle
-        if os.path.exists(COOKIES_FILE):
-            self.ytdlp_opts["cookiefile"] = COOKIES_FILE
-
     def search_videos(self, query, limit=10):
         """
         Verilen sorguya göre YouTube'da video arar.
@@ -24,10 +19,12 @@ class YouTubeClient:
         # ytsearch, arama yapmayı sağlar.
         search_query = f"ytsearch{limit}:{query}" 
 
-        with yt_dlp.YoutubeDL(self.ytdlp_opts) as ydl:
+        with ytdl_pool.acquire(PROFILE_FLAT, self.ytdlp_opts) as ydl:
             try:
                 # download=False sadece meta veriyi indirir
                 info = ydl.extract_info(search_query, download=False)
+                # Sonuçların metadata'sı önbelleğe: kuyruğa eklenince yeniden çekilmez
+                info_cache.put_flat(info.get("entries"))
                 
                 # entries alanındaki her bir sonuç için gerekli bilgileri alıyoruz
                 for entry in info.get("entries", []):
@@ -58,10 +55,20 @@ class YouTubeClient:
     def get_playlist_tracks_meta(self, url):
         """
         Playlist URL'sinden tüm parçaların meta verisini döner.
-        Playlist ID'sini URL'den ayırarak daha saf bir sorgu gönderir.
+        (stream_playlist_tracks'in toplanmış hali)
         """
-        
-        # Playlist ID'sini ayıkla
+        playlist = self.stream_playlist_tracks(url)
+        if not playlist:
+            return []
+        try:
+            return [t for page in playlist["pages"] for t in page]
+        except Exception as e:
+            print(f"[HATA] Playlist meta veri hatası: {e}")
+            return []
+
+    @staticmethod
+    def _playlist_url(url):
+        """Playlist ID'sini URL'den ayırarak daha saf bir sorgu oluşturur"""
         playlist_id = None
         if "list=" in url:
              playlist_id = url.split("list=")[-1].split("&")[0]
@@ -70,54 +77,83 @@ class YouTubeClient:
         
         if not playlist_id:
              print(f"[HATA] Geçersiz playlist URL formatı: {url}")
-             return []
+             return None
         
-        # Sadece Playlist ID'si ile yeni URL oluştur
-        playlist_url = f"https://www.youtube.com/playlist?list={playlist_id}"
+        return f"https://www.youtube.com/playlist?list={playlist_id}"
+
+    def stream_playlist_tracks(self, url, page_size=100):
+        """
+        Playlist başlığını hemen, videoları sayfa sayfa döndür.
+        extract_info(process=False) ile girişler tembel (lazy) okunur:
+        YouTube'un her devam sayfası ancak ihtiyaç olduğunda çekilir.
+
+        Returns:
+            dict: {"title": ..., "pages": generator(list[track])} veya None
+        """
+        playlist_url = self._playlist_url(url)
+        if not playlist_url:
+            return None
         
+        pages = self._iter_playlist_pages(playlist_url, page_size)
+        try:
+            # İlk adım playlist başlığını getirir (ilk sayfa henüz işlenmedi)
+            playlist_title = next(pages)
+        except StopIteration:
+            return None
+        except Exception as e:
+            print(f"[HATA] Playlist meta veri hatası: {e}")
+            return None
+        
+        return {"title": playlist_title, "pages": pages}
+
+    def _iter_playlist_pages(self, playlist_url, page_size):
+        """Önce playlist başlığını, sonra page_size'lık parça listelerini üretir"""
         ydl_opts = {
-            "quiet": True, 
-            "extract_flat": True, 
-            "skip_download": True,
-            "force_generic_extractor": True, 
             "youtube_client": "web",
         }
         
-        if os.path.exists(COOKIES_FILE):
-             ydl_opts["cookiefile"] = COOKIES_FILE
-             
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            try:
-                info = ydl.extract_info(playlist_url, download=False)
+        # Havuz örneği generator tükenene (veya kapatılana) kadar bu işte kalır
+        with ytdl_pool.acquire(PROFILE_FLAT, ydl_opts) as ydl:
+            info = ydl.extract_info(playlist_url, download=False, process=False)
+            
+            if not info or info.get('_type') != 'playlist':
+                return
+            
+            playlist_title = info.get("title", "YouTube Playlist")
+            yield playlist_title
+            
+            tracks = []
+            for idx, entry in enumerate(info.get("entries") or (), 1):
+                if not entry or not entry.get("id"):
+                    continue
                 
-                if info.get('_type') == 'playlist':
+                thumbnail = entry.get("thumbnail")
+                if not thumbnail and entry.get("thumbnails"):
+                    thumbnail = entry["thumbnails"][-1].get("url")
+                # Yüksek kalite thumbnail URL'si oluştur
+                video_id = entry.get("id")
+                if not thumbnail and video_id:
+                    thumbnail = f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg"
+                
+                tracks.append({
+                    "id": video_id,
+                    "url": entry.get("url") or f"https://www.youtube.com/watch?v={video_id}",
+                    "title": entry.get("title", "Video"),
+                    "channel": entry.get("channel", "YouTube"),
+                    "duration": entry.get("duration"),
+                    "thumbnail": thumbnail,
+                    "cover_url": thumbnail,  # tagger için
+                    "playlist_title": playlist_title,
+                    "track_no": idx,
+                    "artist": entry.get("channel", "YouTube"),
+                    "album": playlist_title
+                })
+                
+                if len(tracks) >= page_size:
+                    info_cache.put_flat(tracks)
+                    yield tracks
                     tracks = []
-                    playlist_title = info.get("title", "YouTube Playlist")
-                    
-                    # Sadece temel bilgileri çekiyoruz
-                    for idx, entry in enumerate(info.get("entries", []), 1):
-                        if entry and entry.get("id"):
-                            thumbnail = entry.get("thumbnail")
-                            # Yüksek kalite thumbnail URL'si oluştur
-                            video_id = entry.get("id")
-                            if not thumbnail and video_id:
-                                thumbnail = f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg"
-                            
-                            tracks.append({
-                                "url": entry.get("url") or f"https://www.youtube.com/watch?v={video_id}",
-                                "title": entry.get("title", "Video"),
-                                "channel": entry.get("channel", "YouTube"),
-                                "thumbnail": thumbnail,
-                                "cover_url": thumbnail,  # tagger için
-                                "playlist_title": playlist_title,
-                                "track_no": idx,
-                                "artist": entry.get("channel", "YouTube"),
-                                "album": playlist_title
-                            })
-                    return tracks
-                else:
-                    return []
-                    
-            except Exception as e:
-                print(f"[HATA] Playlist meta veri hatası: {e}")
-                return []
\ No newline at end of file
+            
+            if tracks:
+                info_cache.put_flat(tracks)
+                yield tracks
@@ -0,0 +1,221 @@
+"""
+4KTube Free - YoutubeDL Context Pool
+Uzun ömürlü yt_dlp.YoutubeDL örnekleri. Her örnek aynı anda tek bir
+worker tarafından kullanılır (acquire/release) ve iş başına yeniden
+parametrelenir; böylece extractor durumu, TCP/TLS bağlantıları ve
+cookies.txt'den bir kez okunan ortak cookie jar sıcak kalır.
+
+Yeniden parametreleme yt-dlp'nin iç durumuna (REUSE_ATTRS) dokunur;
+requirements.txt desteklenen sürüm aralığını sabitler. Kurulu sürümde bu
+alanlardan biri yoksa havuz kapanır ve her iş kendi yeni örneğini kurar.
+
+Kullanım:
+    with ytdl_pool.acquire(PROFILE_FLAT) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    with ytdl_pool.acquire(PROFILE_DOWNLOAD, job_opts) as ydl:
+        ydl.extract_info(url, download=True)
+"""
+
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+import yt_dlp
+
+from settings import COOKIES_FILE
+
+try:
+    from yt_dlp.cookies import YoutubeDLCookieJar
+except ImportError:  # Çok eski yt-dlp: her örnek cookiefile'ı kendisi okur
+    YoutubeDLCookieJar = None
+
+PROFILE_FLAT = "flat"          # Arama, playlist ve tekli video metadata'sı
+PROFILE_DOWNLOAD = "download"  # Downloader işleri
+
+PROFILES = {
+    PROFILE_FLAT: {
+        "quiet": True,
+        "no_warnings": True,
+        "extract_flat": True,
+        "skip_download": True,
+    },
+    PROFILE_DOWNLOAD: {
+        "quiet": False,
+        "noprogress": True,
+        "noplaylist": True,
+    },
+}
+
+
+# _configure'un yeniden parametrelemek için dokunduğu YoutubeDL iç alanları
+REUSE_ATTRS = (
+    "params", "_progress_hooks", "_postprocessor_hooks", "_parse_outtmpl",
+    "format_selector", "build_format_selector", "add_progress_hook",
+    "add_postprocessor_hook",
+)
+
+
+def supports_reuse(ydl):
+    """Bu yt-dlp sürümünde örnek işler arasında yeniden parametrelenebilir mi"""
+    return all(hasattr(ydl, name) for name in REUSE_ATTRS)
+
+
+class YtdlPool:
+    """Profil başına boşta bekleyen YoutubeDL örnekleri. Thread-safe."""
+
+    def __init__(self, max_idle_per_profile=8):
+        self.max_idle = max_idle_per_profile
+        self.lock = threading.Lock()
+        self._idle = defaultdict(list)
+        self._cookiejar = None
+        self._cookiejar_loaded = False
+        self.reuse = True  # Desteklenmeyen yt-dlp sürümünde False olur
+
+        # Ölçüm (benchmarks/ytdl_pool_overhead.py)
+        self.created = 0
+        self.reused = 0
+
+    # --- COOKIE ---
+
+    def cookiejar(self):
+        """cookies.txt'yi bir kez oku, tüm örneklerle paylaş (None: dosya yok)"""
+        with self.lock:
+            if not self._cookiejar_loaded:
+                self._cookiejar_loaded = True
+                if YoutubeDLCookieJar and os.path.exists(COOKIES_FILE):
+                    try:
+                        jar = YoutubeDLCookieJar(COOKIES_FILE)
+                        jar.load()
+                        self._cookiejar = jar
+                    except Exception as e:
+                        print(f"[YTDL] Cookie dosyası okunamadı: {e}")
+            return self._cookiejar
+
+    def save_cookies(self):
+        """Oturum boyunca güncellenen cookie'leri cookies.txt'ye yaz"""
+        jar = self._cookiejar
+        if jar is None:
+            return
+        try:
+            jar.save()
+        except Exception as e:
+            print(f"[YTDL] Cookie kaydedilemedi: {e}")
+
+    # --- ÖRNEK YÖNETİMİ ---
+
+    def _create(self, profile, job_opts=None):
+        opts = dict(PROFILES[profile])
+        opts.update(job_opts or {})
+        jar = self.cookiejar()
+        if jar is None and os.path.exists(COOKIES_FILE):
+            opts["cookiefile"] = COOKIES_FILE
+
+        ydl = yt_dlp.YoutubeDL(opts)
+        if jar is not None:
+            # İlk istekten önce atanır: request director bu jar ile kurulur
+            ydl.cookiejar = jar
+
+        # İş başına parametreler bu tabana göre sıfırlanır
+        if self.reuse and not job_opts:
+            ydl._downx_base_params = dict(ydl.params)
+        self.created += 1
+        return ydl
+
+    @staticmethod
+    def _configure(ydl, job_opts):
+        """
+        Örneği işe göre parametrele: önceki işin ayarları, hook'ları ve
+        format seçicisi temizlenir.
+        """
+        ydl.params.clear()
+        ydl.params.update(ydl._downx_base_params)
+        ydl.params.update(job_opts or {})
+
+        ydl._progress_hooks = []
+        for hook in ydl.params.get("progress_hooks", []):
+            ydl.add_progress_hook(hook)
+        ydl._postprocessor_hooks = []
+        for hook in ydl.params.get("postprocessor_hooks", []):
+            ydl.add_postprocessor_hook(hook)
+
+        if job_opts and "outtmpl" in job_opts:
+            ydl._parse_outtmpl()
+
+        fmt = ydl.params.get("format")
+        if isinstance(fmt, str):
+            ydl.format_selector = ydl.build_format_selector(fmt)
+        elif fmt is None:
+            ydl.format_selector = None
+
+    def _checkout(self, profile, job_opts):
+        """Havuzdan (veya yeni) işe göre parametrelenmiş örnek"""
+        if self.reuse:
+            with self.lock:
+                idle = self._idle[profile]
+                ydl = idle.pop() if idle else None
+
+            if ydl is not None:
+                self.reused += 1
+            else:
+                ydl = self._create(profile)
+
+            if supports_reuse(ydl):
+                self._configure(ydl, job_opts)
+                return ydl
+
+            missing = [name for name in REUSE_ATTRS if not hasattr(ydl, name)]
+            print(f"[YTDL] Bu yt-dlp sürümünde örnek yeniden kullanılamıyor "
+                  f"({', '.join(missing)} yok), her iş yeni örnekle çalışacak")
+            self.reuse = False
+            try:
+                ydl.close()
+            except Exception:
+                pass
+
+        # Yedek yol: iş ayarlarıyla baştan kurulan, işten sonra kapatılan örnek
+        return self._create(profile, job_opts)
+
+    @contextmanager
+    def acquire(self, profile, job_opts=None):
+        """Profil için boşta bir örnek al (yoksa oluştur), iş bitince havuza geri koy"""
+        ydl = self._checkout(profile, job_opts)
+
+        healthy = True
+        try:
+            yield ydl
+        except BaseException:
+            # İptal ve ağ hataları örneği bozmaz; yine de yarım kalmış
+            # indirme durumunu taşımamak için yenisiyle değiştirilir
+            healthy = False
+            raise
+        finally:
+            self._release(profile, ydl, healthy)
+
+    def _release(self, profile, ydl, healthy):
+        with self.lock:
+            idle = self._idle[profile]
+            if healthy and self.reuse and len(idle) < self.max_idle:
+                idle.append(ydl)
+                return
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Uygulama kapanırken: örnekleri kapat, cookie'leri kaydet"""
+        with self.lock:
+            instances = [y for idle in self._idle.values() for y in idle]
+            self._idle.clear()
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception:
+                pass
+        self.save_cookies()
+
+
+# Global havuz
+ytdl_pool = YtdlPool()